@@ -0,0 +1,5 @@
+#!/bin/bash
+# Runs once when the primary's volume is initialised: allow the replica
+# service to stream WAL from it.
+set -e
+echo "host replication ${POSTGRES_USER} all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,26 @@
+# backend/gunicorn.conf.py
+"""
+Gunicorn settings shared by Docker and Render.
+
+Each worker is its own process, so Prometheus samples are written to files
+under PROMETHEUS_MULTIPROC_DIR and aggregated by /metrics at scrape time
+(see ngao_core.apps.common.metrics). The directory is emptied when the
+master starts, and a dead worker's live gauges are dropped when it exits.
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "ngao_prometheus"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,26 @@
+# ngao_core/api/handlers.py
+"""
+Per-view options for middleware.
+
+Middleware that needs a per-endpoint setting (database routing, query
+budgets) reads it from the view in process_view: the handler for this
+request's method (a viewset action or APIView method) first, then the view
+class, then the outermost function view, so a decorator on one action
+overrides a class attribute.
+"""
+
+
+def view_option(request, view_func, name, default=None):
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    handler = None
+    if cls is not None:
+        actions = getattr(view_func, "actions", None)
+        method = request.method.lower()
+        handler_name = actions.get(method) if actions else method
+        handler = getattr(cls, handler_name, None) if handler_name else None
+
+    for target in (handler, cls, view_func):
+        value = getattr(target, name, None)
+        if value is not None:
+            return value
+    return default
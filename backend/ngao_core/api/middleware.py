@@ -0,0 +1,84 @@
+# ngao_core/api/middleware.py
+"""
+Response compression for API payloads.
+
+Uses brotli when the client accepts it and the `brotli` package is
+installed, gzip otherwise. Only compressible content types are touched;
+PDFs, zips and images are already compressed, and static files arrive
+pre-compressed from WhiteNoise.
+
+HTML is never compressed. Pages such as the admin and the DRF browsable
+API embed the CSRF token next to reflected request data, which is what a
+BREACH attack needs. API payloads carry no CSRF token (the API is
+JWT-only), so they are compressed.
+"""
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/geo+json",
+    "application/javascript",
+    "text/plain",
+    "text/csv",
+    "text/css",
+    "text/javascript",
+)
+MIN_SIZE = 512
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = self._choose_encoding(request.headers.get("Accept-Encoding", ""), response)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            if len(response.content) < MIN_SIZE:
+                return response
+            if encoding == "br":
+                compressed = brotli.compress(response.content, quality=5)
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Strong ETags describe the uncompressed body
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _choose_encoding(accept_encoding, response):
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        # brotli has no incremental helper here; stream with gzip
+        if brotli is not None and "br" in accepted and not response.streaming:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
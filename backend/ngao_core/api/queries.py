@@ -0,0 +1,179 @@
+# ngao_core/api/queries.py
+"""
+Per-request SQL instrumentation and query budgets.
+
+QueryCountMiddleware records every query a request runs, on every
+database alias: the count, total database time, exact duplicates (same
+SQL and parameters) and the most repeated statement shape, which is how
+an N+1 shows up. In DEBUG the numbers go out as X-DB-* response headers;
+otherwise requests over budget or with repeated shapes are logged as one
+JSON line on the "ngao_core.queries" logger.
+
+Budgets are declared on views the same way as db_route: `query_budget = n`
+on the class, or `@query_budget(n)` on a handler, viewset action or
+function view. Views without one get QUERY_DEFAULT_BUDGET (unlimited when
+unset). With QUERY_BUDGET_STRICT on, as in the test helpers below, going
+over budget raises QueryBudgetExceeded instead of logging, so CI fails.
+
+Queries run while a streaming response is iterated are not counted.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .handlers import view_option
+
+logger = logging.getLogger("ngao_core.queries")
+
+_LITERAL = re.compile(r"%s|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\?(?:\s*,\s*\?)*\)")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """Statement shape: parameters and literals become ?, IN lists of any length compare equal."""
+    return _LIST.sub("(?, ...)", _LITERAL.sub("?", sql))
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+            try:
+                self.statements[(sql, repr(params))] += 1
+            except Exception:  # params that cannot be repr'd
+                pass
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @property
+    def duplicates(self):
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    @property
+    def top_shape(self):
+        """(sql, count) of the most repeated statement shape."""
+        return self.shapes.most_common(1)[0] if self.shapes else ("", 0)
+
+    def stats(self, budget=None):
+        shape, repeats = self.top_shape
+        return {
+            "queries": self.count,
+            "db_ms": round(self.duration * 1000, 2),
+            "duplicates": self.duplicates,
+            "top_repeats": repeats,
+            "top_shape": shape[:500] if repeats > 1 else "",
+            "budget": budget,
+        }
+
+
+def query_budget(limit):
+    """Declare the most queries a view or action may run per request."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSTRUMENTATION:
+            return self.get_response(request)
+
+        request._query_budget = settings.QUERY_DEFAULT_BUDGET
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+
+        budget = request._query_budget
+        stats = recorder.stats(budget)
+        response.query_stats = stats
+        over = budget is not None and stats["queries"] > budget
+
+        if over and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.path} ran {stats['queries']} queries, budget {budget}; "
+                f"most repeated ({stats['top_repeats']}x): {stats['top_shape']}"
+            )
+        if settings.DEBUG:
+            response["X-DB-Queries"] = str(stats["queries"])
+            response["X-DB-Time-Ms"] = str(stats["db_ms"])
+            response["X-DB-Duplicates"] = str(stats["duplicates"])
+            if budget is not None:
+                response["X-DB-Budget"] = str(budget)
+        if over or stats["top_repeats"] >= settings.QUERY_REPEAT_THRESHOLD:
+            logger.warning(json.dumps({
+                "event": "query_budget" if over else "repeated_queries",
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **stats,
+            }))
+        elif settings.QUERY_LOG_ALL:
+            logger.info(json.dumps({"event": "queries", "method": request.method, "path": request.path, **stats}))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_query_budget"):
+            request._query_budget = view_option(request, view_func, "query_budget", request._query_budget)
+
+
+# ---------- Test helpers ----------
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin: requests made with the test client fail when a view
+    goes over its declared budget, and the assertions below check counts
+    directly.
+    """
+
+    def setUp(self):
+        super().setUp()
+        strict = self.settings(QUERY_INSTRUMENTATION=True, QUERY_BUDGET_STRICT=True)
+        strict.enable()
+        self.addCleanup(strict.disable)
+
+    def assertWithinBudget(self, response, budget=None):
+        stats = response.query_stats
+        budget = stats["budget"] if budget is None else budget
+        self.assertIsNotNone(budget, "no query budget declared for this view")
+        self.assertLessEqual(stats["queries"], budget, f"query budget exceeded: {stats}")
+
+    @contextmanager
+    def assertMaxQueries(self, limit, using="default"):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > limit:
+            shapes = Counter(fingerprint(query["sql"]) for query in context.captured_queries)
+            shape, repeats = shapes.most_common(1)[0]
+            self.fail(f"{executed} queries, limit {limit}; most repeated ({repeats}x): {shape}")
@@ -0,0 +1,32 @@
+# ngao_core/api/renderers.py
+"""
+MessagePack rendering for low-bandwidth clients.
+
+Clients opt in with `Accept: application/msgpack` (or `?format=msgpack`).
+Values msgpack cannot encode natively (UUIDs, dates, decimals, geometry)
+are converted the same way the JSON renderer converts them.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+
+def _default(value):
+    if hasattr(value, "coords"):
+        return value.coords
+    return _encoder.default(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
@@ -0,0 +1,116 @@
+# ngao_core/api/scope.py
+"""
+Jurisdiction scoping for querysets.
+
+An officer's jurisdiction is the subtree under their OfficerProfile.area
+and/or OfficerProfile.admin_unit. Both trees keep a materialized `path`
+(see common.mixins.TreePathModel), so "inside my jurisdiction" compiles to
+one prefix match on an indexed column per tree:
+
+    area_id IN (SELECT id FROM geography_area WHERE path LIKE '<officer path>%')
+
+however deep the hierarchy is. Staff and superusers are not scoped.
+Officers without an area or admin unit only see rows they own.
+"""
+from django.db.models import Q
+
+from ngao_core.apps.accounts.models import OfficerProfile
+from ngao_core.apps.admin_structure.models import AdminUnit
+from ngao_core.apps.geography.models import Area
+
+
+def get_jurisdiction(user):
+    """Return (area path, admin unit path) for the user, or None when unrestricted."""
+    if user.is_staff or user.is_superuser:
+        return None
+    if not hasattr(user, "_jurisdiction"):
+        paths = (
+            OfficerProfile.objects.filter(user=user)
+            .values_list("area__path", "admin_unit__path")
+            .first()
+        )
+        user._jurisdiction = tuple(p or "" for p in paths) if paths else ("", "")
+    return user._jurisdiction
+
+
+def jurisdiction_q(user, area_fields=(), unit_fields=(), owner_fields=()):
+    """
+    Q matching rows inside the user's jurisdiction, or None when the user is
+    unrestricted. `area_fields` / `unit_fields` name foreign keys to Area /
+    AdminUnit; `owner_fields` name user foreign keys that grant access
+    regardless of location.
+    """
+    jurisdiction = get_jurisdiction(user)
+    if jurisdiction is None:
+        return None
+
+    area_path, unit_path = jurisdiction
+    q = Q(pk__in=[])
+    if area_path and area_fields:
+        subtree = Area.objects.filter(path__startswith=area_path).values("pk")
+        for field in area_fields:
+            q |= Q(**{f"{field}__in": subtree})
+    if unit_path and unit_fields:
+        subtree = AdminUnit.objects.filter(path__startswith=unit_path).values("pk")
+        for field in unit_fields:
+            q |= Q(**{f"{field}__in": subtree})
+    for field in owner_fields:
+        q |= Q(**{field: user})
+    return q
+
+
+def jurisdiction_filter(user, area_fields=(), unit_fields=(), owner_fields=()):
+    """
+    The jurisdiction_q test for rows that are not in the database (e.g.
+    archived dicts keyed by "<field>_id"): a predicate over a row, or None
+    when the user is unrestricted.
+    """
+    jurisdiction = get_jurisdiction(user)
+    if jurisdiction is None:
+        return None
+
+    area_path, unit_path = jurisdiction
+    checks = []
+    if area_path and area_fields:
+        areas = {str(pk) for pk in Area.objects.filter(path__startswith=area_path).values_list("pk", flat=True)}
+        checks += [(f"{field}_id", areas) for field in area_fields]
+    if unit_path and unit_fields:
+        units = {str(pk) for pk in AdminUnit.objects.filter(path__startswith=unit_path).values_list("pk", flat=True)}
+        checks += [(f"{field}_id", units) for field in unit_fields]
+    checks += [(f"{field}_id", {str(user.pk)}) for field in owner_fields]
+
+    def allowed(row):
+        return any(str(row.get(key)) in values for key, values in checks)
+
+    return allowed
+
+
+def scope_queryset(queryset, user, area_fields=(), unit_fields=(), owner_fields=()):
+    if not user.is_authenticated:
+        return queryset.none()
+    q = jurisdiction_q(user, area_fields, unit_fields, owner_fields)
+    return queryset if q is None else queryset.filter(q)
+
+
+class JurisdictionScopeMixin:
+    """
+    ViewSet mixin restricting every action's queryset to the requesting
+    officer's jurisdiction. Objects outside it are a 404, not a 403.
+    """
+
+    scope_area_fields = ()
+    scope_unit_fields = ()
+    scope_owner_fields = ()
+
+    def get_queryset(self):
+        return self.scope(super().get_queryset())
+
+    def scope(self, queryset):
+        return scope_queryset(
+            queryset,
+            self.request.user,
+            self.scope_area_fields,
+            self.scope_unit_fields,
+            self.scope_owner_fields,
+        )
+
@@ -0,0 +1,134 @@
+# ngao_core/api/sparse.py
+"""
+Sparse fieldsets: ?fields= and ?expand=.
+
+Without either parameter responses keep their full shape. Once a client
+asks for `fields`, the response holds only those fields, and nested
+relations are collapsed to their primary keys unless listed in `expand`.
+Dotted paths reach into nested objects:
+
+    /api/incidents/?fields=id,title,status,area
+    /api/incidents/?fields=id,title,area.name,area.code
+    /api/incidents/?fields=id,title,area&expand=area
+
+Naming a nested field (`area.name`) implies expanding its parent.
+SparseQuerysetMixin uses the same spec to drop joins and columns the
+response will not use.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def parse_spec(request):
+    """Return (fields tree, expand tree) from the query string, or None when not requested."""
+    if request is None:
+        return None
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    fields = [f for value in params.getlist("fields") for f in value.split(",")]
+    expand = [f for value in params.getlist("expand") for f in value.split(",")]
+    if not fields and not expand:
+        return None
+
+    field_tree = _tree(fields)
+    expand_tree = _tree(expand)
+    # Asking for area.name implies expanding area
+    for name, sub in field_tree.items():
+        if sub:
+            expand_tree.setdefault(name, {})
+    return field_tree, expand_tree
+
+
+class SparseFieldsMixin:
+    """Serializer mixin applying the ?fields= / ?expand= spec."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = getattr(self, "_sparse_spec", None)
+        if spec is None and self._is_root():
+            spec = parse_spec(self.context.get("request"))
+        if spec is None:
+            return fields
+
+        selected, expand = spec
+        if selected:
+            fields = {name: field for name, field in fields.items() if name in selected}
+
+        for name, field in list(fields.items()):
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            if name in expand:
+                nested._sparse_spec = ((selected or {}).get(name, {}), expand[name])
+            elif selected:
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=field.source,
+                    many=isinstance(field, serializers.ListSerializer),
+                    read_only=True,
+                )
+        return fields
+
+    def _is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+
+class SparseQuerysetMixin:
+    """
+    ViewSet mixin: with a sparse spec, join only the relations that will be
+    rendered in full and load only the columns the response needs.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        if parse_spec(self.request) is None:
+            return queryset
+        return prune_queryset(queryset, self.get_serializer())
+
+
+def prune_queryset(queryset, serializer):
+    model = queryset.model
+    select, prefetch, columns = [], [], {model._meta.pk.name}
+    only_safe = True
+
+    for field in serializer.fields.values():
+        source = field.source
+        if source == "*" or "." in source:
+            only_safe = False
+            continue
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            # Method fields and properties may touch any column
+            only_safe = False
+            continue
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.append(source)
+        elif model_field.is_relation:
+            columns.add(source)
+            if isinstance(nested, serializers.BaseSerializer):
+                select.append(source)
+        else:
+            columns.add(source)
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only_safe and not select:
+        queryset = queryset.only(*columns)
+    return queryset
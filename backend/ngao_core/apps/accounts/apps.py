@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = "ngao_core.apps.accounts"
-    label = "accounts"
\ No newline at end of file
+    label = "accounts"
+
+    def ready(self):
+        import ngao_core.apps.accounts.signals
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+POPULATE_SEARCH_DOCUMENT = """
+    UPDATE accounts_officerprofile AS o
+    SET search_document = lower(concat_ws(' ',
+        NULLIF(u.first_name, ''), NULLIF(u.last_name, ''), NULLIF(u.email, ''),
+        NULLIF(o.badge_number, ''), NULLIF(o.phone, ''), NULLIF(o.id_number, '')
+    ))
+    FROM accounts_customuser AS u
+    WHERE u.id = o.user_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_officerprofile_area'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='officerprofile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='officerprofile',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('search_document', config='simple'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_DOCUMENT, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='officerprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='officer_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='officerprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='officer_search_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
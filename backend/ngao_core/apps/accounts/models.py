@@ -8,6 +8,8 @@ from django.contrib.auth.models import (
     Permission,
 )
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.contrib.gis.geos import Point
 from django.core.validators import RegexValidator
 from django.db import models
@@ -162,13 +164,39 @@ class OfficerProfile(models.Model):
     otp_expiry = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Lower-cased name, email, badge, phone and ID number for directory search
+    search_document = models.TextField(blank=True, default="", editable=False)
+    search_vector = models.GeneratedField(
+        expression=SearchVector("search_document", config="simple"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
     class Meta:
         ordering = ("-created_at",)
         indexes = [
             models.Index(fields=["badge_number"]),
             models.Index(fields=["id_number"]),
+            GinIndex(fields=["search_vector"], name="officer_search_vector_idx"),
+            GinIndex(
+                fields=["search_document"],
+                name="officer_search_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
         ]
 
+    def build_search_document(self):
+        user = self.user
+        parts = [user.first_name, user.last_name, user.email, self.badge_number, self.phone, self.id_number]
+        return " ".join(p for p in parts if p).lower()
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.role_text}"
 
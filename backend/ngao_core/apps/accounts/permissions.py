@@ -3,6 +3,14 @@ from rest_framework.permissions import BasePermission
 
 from ngao_core.apps.accounts.models import OfficerProfile, Role
 
+
+def is_within_admin_unit(unit, target):
+    """True when `target` is `unit` or below it; a path prefix check, no queries."""
+    if unit is None or not hasattr(target, "is_within"):
+        return False
+    return target.is_within(unit)
+
+
 class IsChiefOrAdmin(BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role in ['admin', 'chief', 'assistant']
@@ -109,12 +117,12 @@ class HierarchyPermission(RolePermission):
         # obj should have an admin_unit field or location -> admin unit mapping
         if request.user.is_superuser:
             return True
-        user_unit = getattr(request.user, "admin_unit", None)
+        profile = getattr(request.user, "officer_profile", None)
+        user_unit = profile.admin_unit if profile else None
         if user_unit is None:
             return False
         # allow when obj.admin_unit is equal or descendant of user_unit
         target_unit = getattr(obj, "admin_unit", None) or getattr(obj, "location", None)
-        # You'll need a helper to check if target_unit is within user_unit's tree:
         return is_within_admin_unit(
             user_unit, target_unit
         ) or super().has_object_permission(request, view, obj)
@@ -158,16 +166,6 @@ class HierarchicalAccess(BasePermission):
         if not profile or not profile.admin_unit:
             return False
 
-        # Example policy: if object's admin_unit equal or child of officer admin_unit -> allow.
-        # Assumes models have parent relationship and object's admin_unit is accessible.
+        # Allow when the object's admin_unit is the officer's unit or below it
         target_unit = getattr(obj, "admin_unit", None) or getattr(obj, "location", None)
-        if target_unit is None:
-            return False
-
-        # Walk up parents on target to determine if profile.admin_unit is an ancestor
-        current = target_unit
-        while current is not None:
-            if current == profile.admin_unit:
-                return True
-            current = getattr(current, "parent", None)
-        return False
+        return is_within_admin_unit(profile.admin_unit, target_unit)
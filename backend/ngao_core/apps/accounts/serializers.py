@@ -17,6 +17,7 @@ from ngao_core.apps.accounts.models import (
 from ngao_core.apps.admin_structure.models import AdminUnit
 from .models import Device, DeviceApprovalRequest
 from ngao_core.apps.geography.serializers import AreaSerializer
+from ngao_core.api.sparse import SparseFieldsMixin
 
 
 User = get_user_model()
@@ -35,7 +36,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         )
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Role
         fields = ["id", "name", "description", "hierarchy_level"]
@@ -47,7 +48,7 @@ class AdminUnitSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "parent", "code"]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     role = RoleSerializer(read_only=True)
     class Meta:
         model = CustomUser
@@ -72,7 +73,7 @@ class ContactPointSerializer(serializers.ModelSerializer):
         ]
 
 
-class OfficerProfileSerializer(serializers.ModelSerializer):
+class OfficerProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer()
     # role = RoleSerializer(read_only=True)
     admin_unit = AdminUnitSerializer(read_only=True)
@@ -0,0 +1,36 @@
+# accounts/services/officer_search.py
+"""
+Officer directory search over OfficerProfile.search_document.
+
+Whole words and prefixes ("wanj", "b-102") go through the full-text index;
+substrings anywhere in the document ("0722") through the trigram index.
+Results are ranked by full-text rank plus word similarity, so exact name
+and badge matches come first.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+
+MIN_SUBSTRING_LENGTH = 3
+
+
+def search_officers(queryset, term):
+    term = " ".join(term.lower().split())
+    tokens = re.findall(r"\w+", term)
+    if not tokens:
+        return queryset.none()
+
+    query = SearchQuery(" & ".join(f"{token}:*" for token in tokens), search_type="raw", config="simple")
+    condition = Q(search_vector=query)
+    if len(term) >= MIN_SUBSTRING_LENGTH:
+        condition |= Q(search_document__contains=term)
+
+    return (
+        queryset.filter(condition)
+        .annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+            + TrigramWordSimilarity(term, "search_document")
+        )
+        .order_by("-search_rank", "-created_at")
+    )
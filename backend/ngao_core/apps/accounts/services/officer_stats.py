@@ -0,0 +1,102 @@
+# accounts/services/officer_stats.py
+"""
+Officer head-counts, overall and per administrative unit / area.
+
+The whole report costs three queries however large the hierarchy is: one
+aggregate for the totals, and one recursive CTE each for AdminUnit and Area
+that groups officers per unit and rolls them up into all of its ancestors (a county's
+total includes its sub-counties, locations, ...). The result is cached
+until an officer, unit or area changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+
+from ngao_core.apps.admin_structure.models import AdminUnit
+from ngao_core.apps.geography.models import Area
+
+from ..models import OfficerProfile
+
+CACHE_KEY = "accounts:officer_stats"
+
+
+def officer_stats():
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = compute_officer_stats()
+        cache.set(CACHE_KEY, stats, settings.OFFICER_STATS_CACHE_TTL)
+    return stats
+
+
+def invalidate_officer_stats():
+    cache.delete(CACHE_KEY)
+
+
+def compute_officer_stats():
+    totals = OfficerProfile.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+    )
+    admin_units = _rollup(AdminUnit, "admin_unit_id", "level")
+    areas = _rollup(Area, "area_id", "area_type")
+
+    return {
+        "total": totals["total"],
+        "active": totals["active"],
+        "inactive": totals["total"] - totals["active"],
+        # Kept for existing dashboard clients: direct officers per unit name
+        "by_admin_unit": {unit["name"]: unit["officers"] for unit in admin_units},
+        "admin_units": admin_units,
+        "areas": areas,
+    }
+
+
+def _rollup(unit_model, officer_column, type_column):
+    unit_table = connection.ops.quote_name(unit_model._meta.db_table)
+    officer_table = connection.ops.quote_name(OfficerProfile._meta.db_table)
+
+    sql = f"""
+        WITH RECURSIVE counts AS (
+            SELECT {officer_column} AS unit_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE is_active) AS active
+            FROM {officer_table}
+            WHERE {officer_column} IS NOT NULL
+            GROUP BY {officer_column}
+        ),
+        lineage (unit_id, ancestor_id) AS (
+            SELECT unit_id, unit_id FROM counts
+            UNION
+            SELECT l.unit_id, u.parent_id
+            FROM lineage l
+            JOIN {unit_table} u ON u.id = l.ancestor_id
+            WHERE u.parent_id IS NOT NULL
+        )
+        SELECT u.id, u.name, u.{type_column}, u.parent_id,
+               COALESCE(own.total, 0), COALESCE(own.active, 0),
+               COALESCE(SUM(c.total), 0), COALESCE(SUM(c.active), 0)
+        FROM {unit_table} u
+        LEFT JOIN counts own ON own.unit_id = u.id
+        LEFT JOIN lineage l ON l.ancestor_id = u.id
+        LEFT JOIN counts c ON c.unit_id = l.unit_id
+        GROUP BY u.id, own.total, own.active
+        ORDER BY u.name
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "id": str(unit_id),
+            "name": name,
+            "type": unit_type,
+            "parent": str(parent_id) if parent_id else None,
+            "officers": officers,
+            "active": active,
+            "total_officers": total,
+            "total_active": total_active,
+        }
+        for unit_id, name, unit_type, parent_id, officers, active, total, total_active in rows
+    ]
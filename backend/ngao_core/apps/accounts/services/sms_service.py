@@ -1,21 +1,15 @@
 # accounts/services/sms_service.py
 
-import requests
-from django.conf import settings
+from ngao_core.apps.communications.sms import queue_sms
 
 
 class SMSService:
     """
-    Generic SMS sender — replace with real provider.
+    Sends through the SMS queue (ngao_core.apps.communications.sms); the
+    send_sms worker delivers it.
     """
 
     @staticmethod
     def send_sms(phone, message):
-        print(f"SMS to {phone}: {message}")  # ➤ For now, just print (sandbox)
+        queue_sms(message, [phone])
         return True
-
-        # Example integration:
-        # url = "https://api.africastalking.com/version1/messaging"
-        # headers = {"apiKey": settings.AT_API_KEY}
-        # data = {"username": settings.AT_USERNAME, "to": phone, "message": message}
-        # requests.post(url, headers=headers, data=data)
@@ -0,0 +1,31 @@
+# ngao_core/apps/accounts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ngao_core.apps.admin_structure.models import AdminUnit
+from ngao_core.apps.geography.models import Area
+
+from .models import CustomUser, OfficerProfile
+from .services.officer_stats import invalidate_officer_stats
+
+
+@receiver([post_save, post_delete], sender=OfficerProfile)
+@receiver([post_save, post_delete], sender=AdminUnit)
+@receiver([post_save, post_delete], sender=Area)
+def officer_stats_changed(sender, **kwargs):
+    invalidate_officer_stats()
+
+
+@receiver(post_save, sender=CustomUser)
+def refresh_officer_search_document(sender, instance, raw=False, **kwargs):
+    # Names and email live on the user; keep the officer's search document in step
+    if raw:
+        return
+    try:
+        officer = instance.officer_profile
+    except OfficerProfile.DoesNotExist:
+        return
+    officer.user = instance
+    document = officer.build_search_document()
+    if document != officer.search_document:
+        OfficerProfile.objects.filter(pk=officer.pk).update(search_document=document)
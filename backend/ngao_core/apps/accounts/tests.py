@@ -1,16 +1,180 @@
+import datetime
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ngao_core.apps.admin_structure.models import AdminUnit
+from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.apps.civil_registration.models import BirthRegistration
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.incidents.models import Incident
 
-from .models import AdminUnit, CustomUser, OfficerProfile, Role
+from .models import CustomUser, OfficerProfile, Role
 
 
 class AccountsModelTest(TestCase):
     def test_role_creation(self):
-        r = Role.objects.create(name="TestRole", level=1)
+        r = Role.objects.create(name="TestRole", hierarchy_level=1)
         self.assertEqual(str(r), "TestRole")
 
     def test_user_and_profile(self):
         u = CustomUser.objects.create_user(email="t@example.com", password="pw")
-        a = AdminUnit.objects.create(name="TestCounty", unit_type="county")
-        r = Role.objects.create(name="Tester", level=1)
+        a = AdminUnit.objects.create(name="TestCounty", level="CC")
+        r = Role.objects.create(name="Tester", hierarchy_level=1)
         p = OfficerProfile.objects.create(user=u, role=r, admin_unit=a)
         self.assertEqual(p.user.email, "t@example.com")
+
+
+class OfficerStatsTest(TestCase):
+    def make_officer(self, n, unit, is_active=True):
+        user = CustomUser.objects.create_user(email=f"officer{n}@example.com", password="pw")
+        return OfficerProfile.objects.create(
+            user=user, phone=f"+2547000000{n:02d}", badge_number=f"B{n}", id_number=f"ID{n}",
+            office_email=f"officer{n}@example.com", admin_unit=unit, is_active=is_active,
+        )
+
+    def test_counts_roll_up_the_hierarchy(self):
+        from .services.officer_stats import officer_stats
+
+        county = AdminUnit.objects.create(name="Nyeri", level="CC")
+        sub_county = AdminUnit.objects.create(name="Mathira", level="DCC", parent=county)
+        location = AdminUnit.objects.create(name="Karatina", level="LOCATION", parent=sub_county)
+        self.make_officer(1, county)
+        self.make_officer(2, location)
+        self.make_officer(3, location, is_active=False)
+
+        with self.assertNumQueries(3):
+            stats = officer_stats()
+        units = {u["name"]: u for u in stats["admin_units"]}
+
+        self.assertEqual((stats["total"], stats["active"], stats["inactive"]), (3, 2, 1))
+        self.assertEqual(units["Nyeri"]["officers"], 1)
+        self.assertEqual(units["Nyeri"]["total_officers"], 3)
+        self.assertEqual(units["Mathira"]["total_officers"], 2)
+        self.assertEqual(units["Karatina"]["total_active"], 1)
+
+        # Cached until an officer changes
+        with self.assertNumQueries(0):
+            officer_stats()
+        self.make_officer(4, sub_county)
+        self.assertEqual(officer_stats()["total"], 4)
+
+
+class OfficerSearchTest(TestCase):
+    def setUp(self):
+        for n, (first, last) in enumerate([("Jane", "Wanjiku"), ("John", "Otieno"), ("Wanjiru", "Kamau")], 1):
+            user = CustomUser.objects.create_user(
+                email=f"officer{n}@example.com", password="pw", first_name=first, last_name=last,
+            )
+            OfficerProfile.objects.create(
+                user=user, phone=f"+25472200000{n}", badge_number=f"NG-{n:04d}", id_number=f"2900000{n}",
+                office_email=f"officer{n}@example.com", is_active=n != 3,
+            )
+
+    def search(self, term, **filters):
+        from .services.officer_search import search_officers
+
+        queryset = OfficerProfile.objects.filter(**filters)
+        return [o.user.last_name for o in search_officers(queryset, term)]
+
+    def test_prefix_substring_and_filters(self):
+        # Equal matches: newest officer first
+        self.assertEqual(self.search("wanj"), ["Kamau", "Wanjiku"])
+        self.assertEqual(self.search("wanjik"), ["Wanjiku"])
+        self.assertEqual(self.search("ng-0002"), ["Otieno"])
+        self.assertEqual(self.search("22000003"), ["Kamau"])
+        self.assertEqual(self.search("wanj", is_active=True), ["Wanjiku"])
+
+    def test_document_follows_user_changes(self):
+        user = CustomUser.objects.get(email="officer2@example.com")
+        user.last_name = "Mwangi"
+        user.save()
+        self.assertEqual(self.search("mwangi"), ["Mwangi"])
+
+
+class JurisdictionScopeTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.county = AdminUnit.objects.create(name="Nyeri", level="CC")
+        self.sub_county = AdminUnit.objects.create(name="Mathira", level="DCC", parent=self.county)
+        self.location = AdminUnit.objects.create(name="Karatina", level="LOCATION", parent=self.sub_county)
+        self.other = AdminUnit.objects.create(name="Kisumu", level="CC")
+        self.county_area = Area.objects.create(name="Nyeri", code="NYR", area_type="county")
+        self.sub_county_area = Area.objects.create(
+            name="Mathira", code="MTH", area_type="sub_county", parent=self.county_area
+        )
+        self.other_area = Area.objects.create(name="Kisumu", code="KSM", area_type="county")
+        areas = {"Nyeri": self.county_area, "Mathira": self.sub_county_area, "Kisumu": self.other_area}
+        self.officers = {}
+        for n, unit in enumerate([self.county, self.sub_county, self.location, self.other], 1):
+            user = CustomUser.objects.create_user(email=f"officer{n}@example.com", password="pw")
+            self.officers[unit.name] = OfficerProfile.objects.create(
+                user=user, phone=f"+2547100000{n:02d}", badge_number=f"S{n}", id_number=f"SID{n}",
+                office_email=f"officer{n}@example.com", admin_unit=unit, area=areas.get(unit.name),
+            )
+
+    def get_as(self, unit_name, url):
+        self.client.force_authenticate(self.officers[unit_name].user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return data["results"] if isinstance(data, dict) else data
+
+    def visible(self, unit_name):
+        from ngao_core.api.scope import scope_queryset
+
+        user = CustomUser.objects.get(pk=self.officers[unit_name].user_id)
+        queryset = scope_queryset(OfficerProfile.objects.all(), user, unit_fields=("admin_unit",))
+        return sorted(o.admin_unit.name for o in queryset)
+
+    def test_subtree_predicate(self):
+        self.assertEqual(self.visible("Nyeri"), ["Karatina", "Mathira", "Nyeri"])
+        self.assertEqual(self.visible("Mathira"), ["Karatina", "Mathira"])
+        self.assertEqual(self.visible("Kisumu"), ["Kisumu"])
+
+    def test_moving_a_unit_moves_its_subtree(self):
+        self.sub_county.parent = self.other
+        self.sub_county.save()
+        self.location.refresh_from_db()
+        self.assertTrue(self.location.is_within(self.other))
+        self.assertFalse(self.location.is_within(self.county))
+        self.assertEqual(self.visible("Kisumu"), ["Karatina", "Kisumu", "Mathira"])
+        self.assertEqual(AdminUnit.rebuild_paths(), 0)
+
+    def test_officer_list_is_scoped(self):
+        rows = self.get_as("Mathira", "/api/officers/")
+        self.assertEqual(sorted(r["badge_number"] for r in rows), ["S2", "S3"])
+
+    def test_incident_list_is_scoped(self):
+        Incident.objects.create(title="Karatina fire", description=".", reporter_phone="0", location=self.location)
+        Incident.objects.create(title="Mathira flood", description=".", reporter_phone="0", area=self.sub_county_area)
+        Incident.objects.create(title="Kisumu fire", description=".", reporter_phone="0", location=self.other)
+
+        def titles(unit):
+            return sorted(r["title"] for r in self.get_as(unit, "/api/incidents/"))
+
+        self.assertEqual(titles("Nyeri"), ["Karatina fire", "Mathira flood"])
+        self.assertEqual(titles("Karatina"), ["Karatina fire"])
+        self.assertEqual(titles("Kisumu"), ["Kisumu fire"])
+
+    def test_registration_list_is_scoped(self):
+        mother = Citizen.objects.create(
+            first_name="Amina", last_name="Njeri", gender="F",
+            date_of_birth=datetime.date(1990, 1, 1), place_of_birth="Nyeri",
+        )
+        common = {"mother": mother, "gender": "F", "date_of_birth": datetime.date(2025, 1, 1)}
+        mathira = BirthRegistration.objects.create(place_of_birth="Mathira", area=self.sub_county_area, **common)
+        kisumu = BirthRegistration.objects.create(place_of_birth="Kisumu", area=self.other_area, **common)
+        own = BirthRegistration.objects.create(
+            place_of_birth="Kisumu", area=self.other_area,
+            initiated_by=self.officers["Karatina"].user, **common
+        )
+
+        def ids(unit):
+            return {r["id"] for r in self.get_as(unit, "/api/registrations/births/")}
+
+        self.assertEqual(ids("Nyeri"), {str(mathira.pk)})
+        self.assertEqual(ids("Kisumu"), {str(kisumu.pk), str(own.pk)})
+        # Karatina has no area, but still sees what its officer initiated
+        self.assertEqual(ids("Karatina"), {str(own.pk)})
@@ -11,10 +11,15 @@ from django.contrib.auth import get_user_model
 from django.db import transaction
 from .serializers import UserSerializer
 from .permissions import IsChiefOrAdmin
+from .services.officer_search import search_officers
+from .services.officer_stats import officer_stats
+from ngao_core.api.queries import query_budget
 
 # Local Imports
 from ngao_core.apps.admin_structure.models import AdminUnit
 from ngao_core.apps.accounts.permissions import IsCountyCommissioner
+from ngao_core.api.scope import JurisdictionScopeMixin
+from ngao_core.api.sparse import SparseQuerysetMixin
 
 from .models import (
     ContactPoint,
@@ -81,10 +86,13 @@ class AdminUnitViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "code"]
 
 
-class OfficerProfileViewSet(viewsets.ModelViewSet):
+class OfficerProfileViewSet(JurisdictionScopeMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = OfficerProfile.objects.select_related("user", "admin_unit").all()
     serializer_class = OfficerProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    scope_area_fields = ("area",)
+    scope_unit_fields = ("admin_unit",)
+    scope_owner_fields = ("user",)
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -254,12 +262,7 @@ class OfficerProfileViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_active=is_active.lower() == "true")
 
         if search:
-            queryset = (
-                queryset.filter(user__first_name__icontains=search)
-                | queryset.filter(user__last_name__icontains=search)
-                | queryset.filter(user__email__icontains=search)
-                | queryset.filter(badge_number__icontains=search)
-            )
+            queryset = search_officers(queryset, search)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -303,27 +306,12 @@ class OfficerProfileViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"], url_path="stats")
+    @query_budget(10)
     def stats(self, request):
         """
-        Get officer statistics
+        Get officer statistics, with counts rolled up the unit hierarchy
         """
-        total = self.queryset.count()
-        active = self.queryset.filter(is_active=True).count()
-        inactive = total - active
-
-        by_unit = {}
-        for unit in AdminUnit.objects.all():
-            count = self.queryset.filter(admin_unit=unit).count()
-            by_unit[unit.name] = count
-
-        return Response(
-            {
-                "total": total,
-                "active": active,
-                "inactive": inactive,
-                "by_admin_unit": by_unit,
-            }
-        )
+        return Response(officer_stats())
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
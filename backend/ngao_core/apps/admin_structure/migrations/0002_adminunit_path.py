@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+BACKFILL_PATHS = """
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT id, replace(id::text, '-', '') || '/' FROM admin_structure_adminunit WHERE parent_id IS NULL
+        UNION ALL
+        SELECT child.id, tree.path || replace(child.id::text, '-', '') || '/'
+        FROM admin_structure_adminunit child JOIN tree ON child.parent_id = tree.id
+    )
+    UPDATE admin_structure_adminunit SET path = tree.path
+    FROM tree
+    WHERE admin_structure_adminunit.id = tree.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_structure', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminunit',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunSQL(
+            BACKFILL_PATHS,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -13,6 +13,7 @@ from django.utils.translation import gettext_lazy as _
 from django.db import models
 
 from ngao_core.apps.accounts.models import CustomUser
+from ngao_core.apps.common.mixins import TreePathModel
 
 
 # =========================================================
@@ -113,7 +114,7 @@ def save(self, *args, **kwargs):
     super().save(*args, **kwargs)
 
 
-class AdminUnit(models.Model):
+class AdminUnit(TreePathModel):
     """
     Administrative Unit forming the NGAO hierarchy.
     Supports PostGIS geometry for mapping.
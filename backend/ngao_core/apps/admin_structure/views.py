@@ -8,6 +8,7 @@ from ngao_core.apps.admin_structure.serializers import AdminUnitSerializer
 from rest_framework import viewsets
 from .models import Location, AdminUnit
 from .serializers import LocationSerializer, AdminUnitSerializer
+from ngao_core.apps.common.cache import cached_view
 
 
 
@@ -42,6 +43,7 @@ class AdminUnitViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
 
     @action(detail=False, methods=["get"])
+    @cached_view(ttl=60 * 60, tags=("admin_units",))
     def hierarchy(self, request):
         """
         Returns full admin hierarchy tree.
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+from django.db import migrations
+
+import ngao_core.apps.common.partitions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citizen_repo', '0005_alter_citizen_id_number'),
+    ]
+
+    operations = [
+        ngao_core.apps.common.partitions.ConvertToPartitioned(
+            model_name='CitizenQueryLog',
+            column='timestamp',
+        ),
+    ]
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Citizen, CitizenQueryLog
+from ngao_core.api.sparse import SparseFieldsMixin
 
-class CitizenSerializer(serializers.ModelSerializer):
+class CitizenSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
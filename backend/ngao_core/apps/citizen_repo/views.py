@@ -5,6 +5,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
+from ngao_core.api.scope import scope_queryset
+from ngao_core.apps.common.routers import use_replica, without_stickiness
+
 from .models import Citizen, CitizenQueryLog
 from .serializers import CitizenSerializer
 
@@ -14,7 +17,11 @@ class CitizenLookupView(APIView):
     Supports autocomplete functionality for birth registration forms
     """
     permission_classes = [IsAuthenticated]
+    # Autocomplete: profile anything slower than a keystroke can tolerate
+    profile_slow_ms = 300
 
+    # A search sent as POST; only the query log is written, see without_stickiness
+    @use_replica
     def post(self, request):
         query = request.data.get("query", "").strip()
         id_number = request.data.get("id_number", "").strip()
@@ -68,8 +75,13 @@ class CitizenLookupView(APIView):
                     ).filter(full_name__icontains=query).values_list('id', flat=True)
                 )
             
-            # Execute query with optimizations
-            citizens = Citizen.objects.filter(q_objects).select_related(
+            # Execute query with optimizations; name search is limited to
+            # citizens living in the officer's jurisdiction
+            citizens = scope_queryset(
+                Citizen.objects.filter(q_objects),
+                request.user,
+                area_fields=("current_area",),
+            ).select_related(
                 'current_area'  # Optimize if you have related fields
             ).distinct()[:limit]
             
@@ -97,15 +109,16 @@ class CitizenLookupView(APIView):
                 citizens = [citizen]
                 found = True
 
-        # 🔐 Audit log
-        CitizenQueryLog.objects.create(
-            user=request.user,
-            id_number_queried=id_number if id_number else None,
-            last_name_provided=last_name if last_name else None,
-            module=module,
-            was_found=found,
-            ip_address=self._get_client_ip(request),
-        )
+        # 🔐 Audit log (not read back, so it does not pin the user to the primary)
+        with without_stickiness():
+            CitizenQueryLog.objects.create(
+                user=request.user,
+                id_number_queried=id_number if id_number else None,
+                last_name_provided=last_name if last_name else None,
+                module=module,
+                was_found=found,
+                ip_address=self._get_client_ip(request),
+            )
 
         # Return appropriate response
         if not found:
@@ -3,7 +3,9 @@ from .models import (
     RegistrationRequest,
     BirthRegistration,
     DeathRegistration,
-    MarriageRegistration
+    MarriageRegistration,
+    CertificateBatch,
+    IntakeRecord,
 )
 
 @admin.register(RegistrationRequest)
@@ -28,3 +30,16 @@ class DeathRegistrationAdmin(admin.ModelAdmin):
 class MarriageRegistrationAdmin(admin.ModelAdmin):
     list_display = ("reference_number", "spouse_1", "spouse_2", "status", "initiated_by", "approved_at")
     readonly_fields = ("reference_number", "status", "approved_at")
+
+
+@admin.register(CertificateBatch)
+class CertificateBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "total", "rendered", "requested_by", "created_at", "completed_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("status", "total", "rendered", "skipped", "archive", "error", "completed_at")
+
+
+@admin.register(IntakeRecord)
+class IntakeRecordAdmin(admin.ModelAdmin):
+    list_display = ("key", "kind", "registration_id", "submitted_by", "created_at")
+    search_fields = ("key",)
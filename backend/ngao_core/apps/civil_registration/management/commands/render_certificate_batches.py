@@ -0,0 +1,34 @@
+# ngao_core/apps/civil_registration/management/commands/render_certificate_batches.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from ngao_core.apps.civil_registration.models import CertificateBatch
+from ngao_core.apps.civil_registration.services.certificates import process_batch, requeue_stale_batches
+
+
+class Command(BaseCommand):
+    help = "Render queued certificate batches, requeueing any whose worker died mid-render"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new batches")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_batches()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale batch(es)")
+            queued = list(
+                CertificateBatch.objects.filter(status="queued")
+                .order_by("created_at")
+                .values_list("id", flat=True)
+            )
+            for batch_id in queued:
+                if process_batch(batch_id):
+                    batch = CertificateBatch.objects.get(id=batch_id)
+                    self.stdout.write(f"{batch_id}: {batch.status} ({batch.rendered}/{batch.total})")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
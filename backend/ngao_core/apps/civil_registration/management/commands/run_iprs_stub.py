@@ -0,0 +1,44 @@
+# ngao_core/apps/civil_registration/management/commands/run_iprs_stub.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from ngao_core.apps.civil_registration.services.iprs_stub import IPRSStubServer
+
+
+class Command(BaseCommand):
+    help = "Run a local IPRS stub server for development, tests and benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8099)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request")
+        parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+        parser.add_argument("--records", type=str, help="JSON file mapping id_number -> citizen record")
+        parser.add_argument(
+            "--synthetic",
+            action="store_true",
+            help="Resolve any all-digit ID number to a generated citizen",
+        )
+
+    def handle(self, *args, **options):
+        records = {}
+        if options["records"]:
+            with open(options["records"], encoding="utf-8") as f:
+                records = json.load(f)
+
+        stub = IPRSStubServer(
+            records=records,
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            fail_rate=options["fail_rate"],
+            synthetic=options["synthetic"],
+            verbose=True,
+        )
+        self.stdout.write(self.style.SUCCESS(f"IPRS stub listening on {stub.url}"))
+        self.stdout.write(f"Point IPRS_API_URL at it, e.g. IPRS_API_URL={stub.url}")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping IPRS stub")
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:00
+
+from django.db import migrations
+
+SEQUENCES = [
+    "civil_registration_request_ref_seq",
+    "civil_registration_birth_ref_seq",
+    "civil_registration_death_ref_seq",
+    "civil_registration_marriage_ref_seq",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('civil_registration', '0005_deathregistration_comments'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=f"CREATE SEQUENCE IF NOT EXISTS {name}",
+            reverse_sql=f"DROP SEQUENCE IF EXISTS {name}",
+        )
+        for name in SEQUENCES
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('civil_registration', '0008_intakerecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificatebatch',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
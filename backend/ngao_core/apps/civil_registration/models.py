@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.conf import settings
 from ngao_core.apps.citizen_repo.models import Citizen
 from ngao_core.apps.geography.models import Area
+from .services.references import next_reference
 
 User = settings.AUTH_USER_MODEL
 
@@ -59,8 +60,9 @@ class RegistrationRequest(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            now_str = timezone.now().strftime("%Y%m%d%H%M%S")
-            self.reference_number = f"REQ-{self.registration_type[:3].upper()}-{now_str}"
+            self.reference_number = next_reference(
+                "request", prefix=f"REQ-{self.registration_type[:3].upper()}"
+            )
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -113,8 +115,7 @@ class BirthRegistration(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            now_str = timezone.now().strftime("%Y%m%d%H%M%S")
-            self.reference_number = f"BIRTH-{now_str}"
+            self.reference_number = next_reference("birth")
         super().save(*args, **kwargs)
 
     def approve(self):
@@ -157,8 +158,7 @@ class DeathRegistration(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            now_str = timezone.now().strftime("%Y%m%d%H%M%S")
-            self.reference_number = f"DEATH-{now_str}"
+            self.reference_number = next_reference("death")
         super().save(*args, **kwargs)
 
     def approve(self):
@@ -204,11 +204,60 @@ class MarriageRegistration(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            now_str = timezone.now().strftime("%Y%m%d%H%M%S")
-            self.reference_number = f"MARR-{now_str}"
+            self.reference_number = next_reference("marriage")
         super().save(*args, **kwargs)
 
     def approve(self):
         self.status = "approved"
         self.approved_at = timezone.now()
         self.save()
+
+
+# ---------- Certificate Batch ----------
+class CertificateBatch(models.Model):
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("rendering", "Rendering"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    )
+    KIND_CHOICES = (("birth", "Birth"), ("death", "Death"), ("marriage", "Marriage"))
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    registration_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    skipped = models.JSONField(default=dict, blank=True)
+    archive = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="certificate_batches"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Lease start while rendering; stale leases are requeued by render_certificate_batches
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} certificates ({self.status})"
+
+
+# ---------- Intake Record ----------
+class IntakeRecord(models.Model):
+    """Receipt for a record ingested through the batch endpoint, keyed by the client's idempotency key."""
+    key = models.CharField(max_length=100, unique=True)
+    kind = models.CharField(max_length=20, choices=(("birth", "Birth"), ("death", "Death")))
+    registration_id = models.UUIDField()
+    outcome = models.JSONField(default=dict)
+    submitted_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="intake_records"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} -> {self.kind} {self.registration_id}"
@@ -3,12 +3,15 @@ from .models import (
     RegistrationRequest,
     BirthRegistration,
     DeathRegistration,
-    MarriageRegistration
+    MarriageRegistration,
+    CertificateBatch,
 )
+from django.conf import settings
 from ngao_core.apps.citizen_repo.models import Citizen
 from ngao_core.apps.citizen_repo.serializers import CitizenSerializer
 from ngao_core.apps.geography.serializers import AreaSerializer
 from ngao_core.apps.accounts.serializers import UserSerializer
+from ngao_core.api.sparse import SparseFieldsMixin
 
 
 # ---------- Registration Request Serializer ----------
@@ -40,7 +43,7 @@ class RegistrationRequestSerializer(serializers.ModelSerializer):
 
 
 # ---------- Birth Registration Serializer ----------
-class BirthRegistrationSerializer(serializers.ModelSerializer):
+class BirthRegistrationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Nested read serializers for displaying related data
     child = CitizenSerializer(read_only=True)
     mother = CitizenSerializer(read_only=True)
@@ -73,7 +76,7 @@ class BirthRegistrationSerializer(serializers.ModelSerializer):
 
 
 # ---------- Death Registration Serializer ----------
-class DeathRegistrationSerializer(serializers.ModelSerializer):
+class DeathRegistrationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     citizen = CitizenSerializer(read_only=True)
     initiated_by = UserSerializer(read_only=True)
     area = AreaSerializer(read_only=True)
@@ -104,7 +107,7 @@ class DeathRegistrationSerializer(serializers.ModelSerializer):
 
 
 # ---------- Marriage Registration Serializer ----------
-class MarriageRegistrationSerializer(serializers.ModelSerializer):
+class MarriageRegistrationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MarriageRegistration
         fields = "__all__"
@@ -128,3 +131,26 @@ class MarriageRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(f"{s2} is already in a marriage registration.")
 
         return data
+
+
+# ---------- Certificate Batch Serializer ----------
+class CertificateBatchSerializer(serializers.ModelSerializer):
+    registration_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    class Meta:
+        model = CertificateBatch
+        fields = [
+            "id", "kind", "registration_ids", "status", "total", "rendered",
+            "skipped", "error", "requested_by", "created_at", "completed_at",
+        ]
+        read_only_fields = [
+            "status", "total", "rendered", "skipped", "error", "requested_by",
+            "created_at", "completed_at",
+        ]
+
+    def validate_registration_ids(self, value):
+        if len(value) > settings.CERTIFICATE_BATCH_LIMIT:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {settings.CERTIFICATE_BATCH_LIMIT} registrations."
+            )
+        return list(dict.fromkeys(value))
@@ -0,0 +1,111 @@
+# ngao_core/apps/civil_registration/services/approvals.py
+"""
+Set-based approval of birth and death registrations.
+
+Approving N registrations costs a constant number of statements regardless
+of N: lock the approvable rows, flip their status, update the linked
+citizens with a single UPDATE ... FROM, and read back whatever was skipped.
+"""
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.apps.common.cache import invalidate_tags
+from ngao_core.apps.sync.services import record_changes
+
+from ..models import BirthRegistration, DeathRegistration
+
+
+def bulk_approve_births(ids, queryset=None):
+    """Approve submitted birth registrations and mark the children alive."""
+    return _bulk_approve(BirthRegistration, "birth", ids, _mark_children_alive, queryset)
+
+
+def bulk_approve_deaths(ids, queryset=None):
+    """Approve submitted death registrations and record the deaths on the citizens."""
+    return _bulk_approve(DeathRegistration, "death", ids, _mark_citizens_deceased, queryset)
+
+
+def _bulk_approve(model, sync_alias, ids, update_citizens, queryset=None):
+    """
+    Returns {registration_id: {"result": ...}} where result is one of
+    "approved", "not_found", "invalid_id", "locked" (being approved by a
+    concurrent request) or "invalid_status" (with the current "status").
+
+    `queryset` limits which registrations may be approved (e.g. to the
+    caller's jurisdiction); rows outside it are reported as "not_found".
+    """
+    valid_ids, results = [], {}
+    for raw in ids:
+        try:
+            valid_ids.append(uuid.UUID(str(raw)))
+        except ValueError:
+            results[str(raw)] = {"result": "invalid_id"}
+
+    if not valid_ids:
+        return results
+
+    base = model.objects.all() if queryset is None else queryset
+    now = timezone.now()
+    with transaction.atomic():
+        # Rows another transaction is approving are skipped, not waited on
+        approved = set(
+            base.select_for_update(skip_locked=True)
+            .filter(id__in=valid_ids, status="submitted")
+            .values_list("id", flat=True)
+        )
+        if approved:
+            model.objects.filter(id__in=approved).update(status="approved", approved_at=now)
+            update_citizens(list(approved), now)
+            record_changes(sync_alias, approved)
+            # update() sends no post_save
+            invalidate_tags("registrations")
+
+        skipped = dict(
+            base.filter(id__in=valid_ids)
+            .exclude(id__in=approved)
+            .values_list("id", "status")
+        )
+
+    for reg_id in valid_ids:
+        if reg_id in approved:
+            results[str(reg_id)] = {"result": "approved"}
+        elif reg_id not in skipped:
+            results[str(reg_id)] = {"result": "not_found"}
+        elif skipped[reg_id] == "submitted":
+            results[str(reg_id)] = {"result": "locked"}
+        else:
+            results[str(reg_id)] = {"result": "invalid_status", "status": skipped[reg_id]}
+    return results
+
+
+def _mark_children_alive(registration_ids, now):
+    citizen_table = connection.ops.quote_name(Citizen._meta.db_table)
+    birth_table = connection.ops.quote_name(BirthRegistration._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {citizen_table} AS c
+            SET is_alive = TRUE, updated_at = %s
+            FROM {birth_table} AS b
+            WHERE b.child_id = c.id AND b.id = ANY(%s)
+            """,
+            [now, registration_ids],
+        )
+
+
+def _mark_citizens_deceased(registration_ids, now):
+    citizen_table = connection.ops.quote_name(Citizen._meta.db_table)
+    death_table = connection.ops.quote_name(DeathRegistration._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {citizen_table} AS c
+            SET is_alive = FALSE, date_of_death = d.date_of_death, updated_at = %s
+            FROM {death_table} AS d
+            WHERE d.citizen_id = c.id AND d.id = ANY(%s)
+            """,
+            [now, registration_ids],
+        )
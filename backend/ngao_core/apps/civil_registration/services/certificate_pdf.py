@@ -0,0 +1,125 @@
+# ngao_core/apps/civil_registration/services/certificate_pdf.py
+"""
+PDF layout for registration certificates.
+
+This module deliberately has no Django imports: it is loaded by the
+certificate worker processes, which only ever receive plain dicts. Fonts
+and the emblem are registered once per process by `init_worker` and reused
+for every certificate that process draws.
+"""
+import io
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+# Bump when the layout changes so stored certificates are re-rendered
+TEMPLATE_VERSION = 1
+
+TEMPLATES = {
+    "birth": {
+        "title": "CERTIFICATE OF BIRTH",
+        "fields": [
+            ("Name", "name"),
+            ("Sex", "gender"),
+            ("Date of Birth", "date_of_birth"),
+            ("Place of Birth", "place_of_birth"),
+            ("Name of Mother", "mother"),
+            ("Name of Father", "father"),
+            ("Date of Registration", "registered_on"),
+        ],
+    },
+    "death": {
+        "title": "CERTIFICATE OF DEATH",
+        "fields": [
+            ("Name", "name"),
+            ("ID Number", "id_number"),
+            ("Age", "age"),
+            ("Date of Death", "date_of_death"),
+            ("Place of Death", "place_of_death"),
+            ("Cause of Death", "cause_of_death"),
+            ("Date of Registration", "registered_on"),
+        ],
+    },
+    "marriage": {
+        "title": "CERTIFICATE OF MARRIAGE",
+        "fields": [
+            ("Spouse", "spouse_1"),
+            ("Spouse", "spouse_2"),
+            ("Date of Marriage", "date_of_marriage"),
+            ("Place of Marriage", "place_of_marriage"),
+            ("Venue", "venue_of_marriage"),
+            ("Date of Registration", "registered_on"),
+        ],
+    },
+}
+
+_assets = None
+
+
+def load_assets(config):
+    """Register fonts and decode the emblem described by `config`."""
+    assets = {"regular": "Helvetica", "bold": "Helvetica-Bold", "emblem": None}
+
+    for style, font_name in (("regular", "Certificate"), ("bold", "Certificate-Bold")):
+        path = config.get(f"font_{style}")
+        if path:
+            pdfmetrics.registerFont(TTFont(font_name, path))
+            assets[style] = font_name
+
+    if config.get("emblem"):
+        assets["emblem"] = ImageReader(config["emblem"])
+
+    return assets
+
+
+def init_worker(config):
+    global _assets
+    _assets = load_assets(config)
+
+
+def render_pdf(context, assets=None):
+    """Draw one certificate and return the PDF bytes."""
+    assets = assets or _assets or load_assets({})
+    template = TEMPLATES[context["kind"]]
+    width, height = A4
+
+    buffer = io.BytesIO()
+    # invariant=1 drops timestamps/ids so the same context yields the same bytes
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=1, pageCompression=1)
+    pdf.setTitle(f"{template['title'].title()} {context['reference_number']}")
+
+    top = height - 25 * mm
+    if assets["emblem"]:
+        pdf.drawImage(
+            assets["emblem"], width / 2 - 15 * mm, top - 30 * mm, 30 * mm, 30 * mm,
+            mask="auto", preserveAspectRatio=True,
+        )
+        top -= 40 * mm
+
+    pdf.setFont(assets["bold"], 12)
+    pdf.drawCentredString(width / 2, top, "REPUBLIC OF KENYA")
+    pdf.setFont(assets["bold"], 18)
+    pdf.drawCentredString(width / 2, top - 12 * mm, template["title"])
+    pdf.setFont(assets["regular"], 10)
+    pdf.drawCentredString(width / 2, top - 20 * mm, f"Reference No. {context['reference_number']}")
+
+    y = top - 40 * mm
+    for label, key in template["fields"]:
+        pdf.setFont(assets["bold"], 11)
+        pdf.drawString(25 * mm, y, label)
+        pdf.setFont(assets["regular"], 11)
+        pdf.drawString(80 * mm, y, str(context.get(key) or "-"))
+        y -= 10 * mm
+
+    pdf.setFont(assets["regular"], 8)
+    pdf.drawCentredString(
+        width / 2, 15 * mm,
+        f"Issued by {context.get('area') or 'the Civil Registration Department'}",
+    )
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,290 @@
+# ngao_core/apps/civil_registration/services/certificates.py
+"""
+Certificate generation for approved registrations.
+
+PDFs are stored under the SHA-256 of everything that goes onto the page
+(plus the template version), so asking for the same certificate twice is a
+storage read, not a render. Batches are rendered in a process pool and
+packed into a zip on the same storage, which may be the local filesystem
+or any S3-compatible bucket (see CERTIFICATE_STORAGE).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import BirthRegistration, CertificateBatch, DeathRegistration, MarriageRegistration
+from .certificate_pdf import TEMPLATE_VERSION, init_worker, load_assets, render_pdf
+
+logger = logging.getLogger(__name__)
+
+REGISTRATIONS = {
+    "birth": (BirthRegistration, ["child", "mother", "father", "area"]),
+    "death": (DeathRegistration, ["citizen", "area"]),
+    "marriage": (MarriageRegistration, ["spouse_1", "spouse_2", "area"]),
+}
+
+
+# ---------- Certificate content ----------
+def _name(citizen):
+    if citizen is None:
+        return ""
+    return " ".join(filter(None, [citizen.first_name, citizen.middle_name, citizen.last_name]))
+
+
+def _date(value):
+    return value.strftime("%d %B %Y") if value else ""
+
+
+def certificate_context(kind, registration):
+    """Flatten a registration into the plain strings printed on its certificate."""
+    context = {
+        "kind": kind,
+        "reference_number": registration.reference_number,
+        "registered_on": _date(registration.approved_at),
+        "area": registration.area.name if registration.area_id else "",
+    }
+    if kind == "birth":
+        context.update(
+            name=_name(registration.child),
+            gender=registration.get_gender_display(),
+            date_of_birth=_date(registration.date_of_birth),
+            place_of_birth=registration.place_of_birth,
+            mother=_name(registration.mother),
+            father=_name(registration.father),
+        )
+    elif kind == "death":
+        context.update(
+            name=_name(registration.citizen),
+            id_number=registration.citizen.id_number or "",
+            age=str(registration.age or ""),
+            date_of_death=_date(registration.date_of_death),
+            place_of_death=registration.place_of_death,
+            cause_of_death=registration.cause_of_death,
+        )
+    else:
+        context.update(
+            spouse_1=_name(registration.spouse_1),
+            spouse_2=_name(registration.spouse_2),
+            date_of_marriage=_date(registration.date_of_marriage),
+            place_of_marriage=registration.place_of_marriage,
+            venue_of_marriage=registration.venue_of_marriage or "",
+        )
+    return context
+
+
+def certificate_name(context):
+    payload = json.dumps({"template": TEMPLATE_VERSION, **context}, sort_keys=True)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return f"{context['kind']}/{digest[:2]}/{digest}.pdf"
+
+
+# ---------- Storage ----------
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        config = settings.CERTIFICATE_STORAGE
+        _storage = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _storage
+
+
+def _store(name, content):
+    storage = get_storage()
+    if storage.exists(name):
+        return
+    saved = storage.save(name, ContentFile(content))
+    if saved != name:
+        # Another worker stored the same certificate first; keep theirs
+        storage.delete(saved)
+
+
+# ---------- Rendering ----------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _asset_config():
+    return {
+        "font_regular": settings.CERTIFICATE_FONT_REGULAR,
+        "font_bold": settings.CERTIFICATE_FONT_BOLD,
+        "emblem": settings.CERTIFICATE_EMBLEM,
+    }
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: children must not inherit the parent's DB sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.CERTIFICATE_WORKERS,
+                mp_context=get_context("spawn"),
+                initializer=init_worker,
+                initargs=(_asset_config(),),
+            )
+        return _pool
+
+
+_local_assets = None
+
+
+def get_certificate(kind, registration):
+    """Return (storage name, PDF bytes) for one registration, rendering only if not stored."""
+    global _local_assets
+    context = certificate_context(kind, registration)
+    name = certificate_name(context)
+    storage = get_storage()
+
+    if storage.exists(name):
+        with storage.open(name, "rb") as stored:
+            return name, stored.read()
+
+    if _local_assets is None:
+        _local_assets = load_assets(_asset_config())
+    content = render_pdf(context, _local_assets)
+    _store(name, content)
+    return name, content
+
+
+def render_batch(kind, registrations):
+    """Make sure every registration has a stored certificate; return {registration id: name}."""
+    storage = get_storage()
+    names, missing = {}, {}
+    for registration in registrations:
+        context = certificate_context(kind, registration)
+        name = certificate_name(context)
+        names[registration.id] = name
+        if name not in missing and not storage.exists(name):
+            missing[name] = context
+
+    if missing:
+        chunksize = max(1, len(missing) // (settings.CERTIFICATE_WORKERS * 4))
+        rendered = get_pool().map(render_pdf, missing.values(), chunksize=chunksize)
+        for name, content in zip(missing, rendered):
+            _store(name, content)
+
+    return names
+
+
+# ---------- Batches ----------
+_runner = None
+
+
+def _get_runner():
+    global _runner
+    with _pool_lock:
+        if _runner is None:
+            _runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="certificates")
+        return _runner
+
+
+def _reset_after_fork():
+    global _pool, _pool_lock, _runner, _local_assets
+    _pool, _runner, _local_assets = None, None, None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def queue_batch(kind, registration_ids, user=None):
+    batch = CertificateBatch.objects.create(
+        kind=kind,
+        registration_ids=[str(pk) for pk in registration_ids],
+        total=len(registration_ids),
+        requested_by=user,
+    )
+    # Otherwise the render_certificate_batches worker picks it up
+    if settings.CERTIFICATE_BACKGROUND_BATCHES:
+        transaction.on_commit(lambda: _get_runner().submit(_run_in_thread, batch.id))
+    return batch
+
+
+def _run_in_thread(batch_id):
+    close_old_connections()
+    try:
+        process_batch(batch_id)
+    finally:
+        close_old_connections()
+
+
+def process_batch(batch_id):
+    """Render a queued batch and pack it into a zip. Returns False if it was already claimed."""
+    claimed_at = timezone.now()
+    claimed = CertificateBatch.objects.filter(id=batch_id, status="queued").update(
+        status="rendering", claimed_at=claimed_at
+    )
+    if not claimed:
+        return False
+
+    batch = CertificateBatch.objects.get(id=batch_id)
+    result = {"rendered": 0, "skipped": {}, "archive": "", "error": ""}
+    try:
+        model, related = REGISTRATIONS[batch.kind]
+        registrations = list(
+            model.objects.select_related(*related)
+            .filter(id__in=batch.registration_ids, status="approved")
+        )
+        found = {str(r.id) for r in registrations}
+        result["skipped"] = {
+            pk: "not_found_or_not_approved" for pk in batch.registration_ids if pk not in found
+        }
+
+        names = render_batch(batch.kind, registrations)
+        result["archive"] = _write_archive(batch, registrations, names)
+        result["rendered"] = len(registrations)
+        result["status"] = "completed"
+    except Exception as exc:
+        logger.exception("Certificate batch %s failed", batch_id)
+        result["status"] = "failed"
+        result["error"] = str(exc)
+
+    # Only the lease holder may finish the batch; a requeued one belongs to its new worker
+    CertificateBatch.objects.filter(id=batch_id, status="rendering", claimed_at=claimed_at).update(
+        completed_at=timezone.now(), **result
+    )
+    return True
+
+
+def requeue_stale_batches():
+    """Put batches whose rendering lease has expired back in the queue. Returns how many."""
+    expired = timezone.now() - timedelta(seconds=settings.CERTIFICATE_BATCH_LEASE_SECONDS)
+    return (
+        CertificateBatch.objects.filter(status="rendering")
+        .filter(Q(claimed_at__lt=expired) | Q(claimed_at__isnull=True))
+        .update(status="queued", claimed_at=None)
+    )
+
+
+def _write_archive(batch, registrations, names):
+    storage = get_storage()
+    with tempfile.TemporaryFile() as tmp:
+        # PDFs are already compressed; deflating them again only costs CPU
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as archive:
+            for registration in registrations:
+                with storage.open(names[registration.id], "rb") as pdf:
+                    archive.writestr(f"{registration.reference_number}.pdf", pdf.read())
+        tmp.seek(0)
+        return storage.save(f"batches/{batch.id}.zip", File(tmp))
+
+
+def open_archive(batch):
+    return get_storage().open(batch.archive, "rb")
@@ -0,0 +1,341 @@
+# ngao_core/apps/civil_registration/services/intake.py
+"""
+Bulk intake of birth and death records captured offline.
+
+A batch of N records is processed with a fixed number of queries: one
+lookup each for idempotency keys, referenced citizens (by id and by ID
+number), areas and existing registrations, followed by bulk inserts of the
+new citizens, the registrations and the intake receipts.
+
+Every record carries a client-generated `key`. A record whose key has
+already been ingested is not inserted again; the original outcome is
+returned with "replayed": true, so a sync that is retried after a dropped
+connection is safe.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.apps.citizen_repo.serializers import CitizenSerializer
+from ngao_core.apps.common.cache import invalidate_tags
+from ngao_core.apps.common.metrics import IMPORTED_ROWS
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.sync.services import record_changes
+
+from ..models import BirthRegistration, DeathRegistration, IntakeRecord
+from ..serializers import BirthRegistrationSerializer, DeathRegistrationSerializer
+from .references import allocate_references
+
+BULK_BATCH_SIZE = 500
+
+# Citizen roles per record type: (role, default gender, alive)
+ROLES = {
+    "birth": [("child", None, True), ("mother", "F", True), ("father", "M", True)],
+    "death": [("citizen", "M", False)],
+}
+REQUIRED_ROLES = {"child", "mother", "citizen"}
+
+# Client fields checked against the API serializers (types, lengths, choices).
+# Anything else, status included, is set here.
+REGISTRATION_FIELDS = {
+    "birth": (BirthRegistrationSerializer, ("place_of_birth", "date_of_birth", "gender")),
+    "death": (DeathRegistrationSerializer, ("place_of_death", "date_of_death", "cause_of_death", "age", "comments")),
+}
+CITIZEN_FIELDS = ("id_number", "first_name", "middle_name", "last_name", "gender", "date_of_birth", "place_of_birth")
+
+
+def ingest_records(records, user=None):
+    """Ingest a list of record dicts; returns one outcome dict per record, in order."""
+    try:
+        outcomes = _ingest(records, user)
+    except IntegrityError:
+        # A concurrent retry of the same sync inserted some of our keys first;
+        # run again so those records come back as replays.
+        outcomes = _ingest(records, user)
+    for outcome in outcomes:
+        IMPORTED_ROWS.labels("intake", "replayed" if outcome.get("replayed") else outcome["result"]).inc()
+    return outcomes
+
+
+def _ingest(records, user):
+    outcomes = [None] * len(records)
+    pending = []  # (index, record) still to be inserted
+
+    # ---------- Idempotency ----------
+    keys = [r["key"] for r in records if isinstance(r, dict) and isinstance(r.get("key"), str)]
+    seen = {
+        rec.key: rec.outcome
+        for rec in IntakeRecord.objects.filter(key__in=keys)
+    }
+    batch_keys = set()
+    for index, record in enumerate(records):
+        errors = _validate(record)
+        key = record.get("key") if isinstance(record, dict) else None
+        if errors:
+            outcomes[index] = _outcome(index, record, "invalid", errors=errors)
+        elif key and key in seen:
+            outcomes[index] = {**seen[key], "index": index, "replayed": True}
+        elif key and key in batch_keys:
+            outcomes[index] = _outcome(index, record, "invalid", errors={"key": "Repeated in this batch"})
+        else:
+            if key:
+                batch_keys.add(key)
+            pending.append((index, record))
+
+    # ---------- Citizens, areas, duplicates ----------
+    citizen_ids, id_numbers, area_ids = set(), set(), set()
+    for _, record in pending:
+        for role, _, _ in ROLES[record["type"]]:
+            if record.get(role):
+                citizen_ids.add(record[role])
+            elif (record.get(f"{role}_manual") or {}).get("id_number"):
+                id_numbers.add(record[f"{role}_manual"]["id_number"])
+        if record.get("area"):
+            area_ids.add(record["area"])
+
+    by_id = Citizen.objects.in_bulk(citizen_ids) if citizen_ids else {}
+    by_id = {str(pk): citizen for pk, citizen in by_id.items()}
+    by_id_number = {}
+    if id_numbers:
+        for citizen in Citizen.objects.filter(id_number__in=id_numbers).order_by("created_at"):
+            by_id_number.setdefault(citizen.id_number, citizen)
+    known_areas = (
+        {str(pk) for pk in Area.objects.filter(id__in=area_ids).values_list("id", flat=True)}
+        if area_ids else set()
+    )
+
+    resolved = []
+    for index, record in pending:
+        errors, citizens = {}, {}
+        for role, _, _ in ROLES[record["type"]]:
+            if record.get(role):
+                citizens[role] = by_id.get(str(record[role]))
+                if citizens[role] is None:
+                    errors[role] = f"Citizen with ID {record[role]} not found"
+            elif record.get(f"{role}_manual"):
+                citizens[role] = by_id_number.get(record[f"{role}_manual"].get("id_number"))
+        if record.get("area") and str(record["area"]) not in known_areas:
+            errors["area"] = "Area not found"
+
+        if errors:
+            outcomes[index] = _outcome(index, record, "invalid", errors=errors)
+        else:
+            resolved.append((index, record, citizens))
+
+    subject_role = {"birth": "child", "death": "citizen"}
+    existing = {"birth": {}, "death": {}}
+    for kind, model, field in (("birth", BirthRegistration, "child_id"), ("death", DeathRegistration, "citizen_id")):
+        subjects = [
+            c[subject_role[kind]].id for _, r, c in resolved
+            if r["type"] == kind and c.get(subject_role[kind])
+        ]
+        if subjects:
+            existing[kind] = dict(
+                model.objects.filter(**{f"{field}__in": subjects})
+                .exclude(status="rejected")
+                .values_list(field, "reference_number")
+            )
+
+    to_insert = []
+    for index, record, citizens in resolved:
+        kind = record["type"]
+        subject = citizens.get(subject_role[kind])
+        if subject is not None:
+            if subject.id in existing[kind]:
+                outcomes[index] = _outcome(
+                    index, record, "duplicate_registration",
+                    reference_number=existing[kind][subject.id],
+                )
+                continue
+            # A second record for the same citizen in this batch is a duplicate
+            existing[kind][subject.id] = None
+        to_insert.append((index, record, citizens))
+
+    # ---------- New citizens ----------
+    new_citizens, created_by_id_number, accepted = [], {}, []
+    for index, record, citizens in to_insert:
+        kind = record["type"]
+        # Two records in this batch describing the same new person
+        subject_manual = record.get(f"{subject_role[kind]}_manual") or {}
+        if (
+            citizens.get(subject_role[kind]) is None
+            and subject_manual.get("id_number") in created_by_id_number
+        ):
+            outcomes[index] = _outcome(index, record, "duplicate_registration", reference_number=None)
+            continue
+        accepted.append((index, record, citizens))
+
+        for role, default_gender, alive in ROLES[kind]:
+            manual = record.get(f"{role}_manual")
+            if citizens.get(role) is not None or not manual:
+                continue
+            id_number = manual.get("id_number") or None
+            if id_number and id_number in created_by_id_number:
+                citizens[role] = created_by_id_number[id_number]
+                continue
+            citizen = Citizen(
+                id=uuid.uuid4(),
+                first_name=manual["first_name"],
+                middle_name=manual.get("middle_name", ""),
+                last_name=manual["last_name"],
+                id_number=id_number,
+                date_of_birth=manual.get("date_of_birth") or record.get("date_of_birth"),
+                gender=manual.get("gender") or default_gender or record.get("gender", "M"),
+                place_of_birth=manual.get("place_of_birth", ""),
+                is_alive=alive,
+            )
+            citizen._created_in_batch = True
+            citizens[role] = citizen
+            new_citizens.append(citizen)
+            if id_number:
+                created_by_id_number[id_number] = citizen
+
+    # ---------- Insert ----------
+    births = [(i, r, c) for i, r, c in accepted if r["type"] == "birth"]
+    deaths = [(i, r, c) for i, r, c in accepted if r["type"] == "death"]
+
+    with transaction.atomic():
+        Citizen.objects.bulk_create(new_citizens, batch_size=BULK_BATCH_SIZE)
+
+        registrations = []
+        for (index, record, citizens), reference in zip(births, allocate_references("birth", len(births))):
+            registrations.append((index, record, citizens, BirthRegistration(
+                child=citizens["child"],
+                mother=citizens["mother"],
+                father=citizens.get("father"),
+                place_of_birth=record["place_of_birth"],
+                date_of_birth=record["date_of_birth"],
+                gender=record.get("gender", "M"),
+                area_id=record.get("area"),
+                initiated_by=user,
+                reference_number=reference,
+            )))
+        for (index, record, citizens), reference in zip(deaths, allocate_references("death", len(deaths))):
+            registrations.append((index, record, citizens, DeathRegistration(
+                citizen=citizens["citizen"],
+                date_of_death=record["date_of_death"],
+                place_of_death=record["place_of_death"],
+                cause_of_death=record.get("cause_of_death", ""),
+                age=record.get("age") or 0,
+                comments=record.get("comments", ""),
+                area_id=record.get("area"),
+                initiated_by=user,
+                reference_number=reference,
+            )))
+
+        BirthRegistration.objects.bulk_create(
+            [reg for *_, reg in registrations if isinstance(reg, BirthRegistration)],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        DeathRegistration.objects.bulk_create(
+            [reg for *_, reg in registrations if isinstance(reg, DeathRegistration)],
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        receipts = []
+        for index, record, citizens, registration in registrations:
+            outcome = _outcome(
+                index, record, "created",
+                id=str(registration.id),
+                reference_number=registration.reference_number,
+                citizens_created=sorted(
+                    role for role, citizen in citizens.items()
+                    if citizen is not None and getattr(citizen, "_created_in_batch", False)
+                ),
+            )
+            outcomes[index] = outcome
+            if record.get("key"):
+                receipts.append(IntakeRecord(
+                    key=record["key"],
+                    kind=record["type"],
+                    registration_id=registration.id,
+                    outcome={k: v for k, v in outcome.items() if k != "index"},
+                    submitted_by=user,
+                ))
+        IntakeRecord.objects.bulk_create(receipts, batch_size=BULK_BATCH_SIZE)
+        record_changes("birth", [reg.id for *_, reg in registrations if isinstance(reg, BirthRegistration)])
+        record_changes("death", [reg.id for *_, reg in registrations if isinstance(reg, DeathRegistration)])
+        if registrations:
+            invalidate_tags("registrations")
+
+    return outcomes
+
+
+def _outcome(index, record, result, **extra):
+    record = record if isinstance(record, dict) else {}
+    return {"index": index, "key": record.get("key"), "type": record.get("type"), "result": result, **extra}
+
+
+def _validate(record):
+    """Shape checks that need no database access. Returns {field: message}."""
+    if not isinstance(record, dict):
+        return {"record": "Expected an object"}
+
+    kind = record.get("type")
+    if kind not in ROLES:
+        return {"type": "Must be 'birth' or 'death'"}
+
+    errors = {}
+    if record.get("key") is not None and (not isinstance(record["key"], str) or len(record["key"]) > 100):
+        errors["key"] = "Must be a string of at most 100 characters"
+
+    required = ["place_of_birth", "date_of_birth"] if kind == "birth" else ["place_of_death", "date_of_death"]
+    for field in required:
+        if not record.get(field):
+            errors[field] = "This field is required"
+    for field in ("date_of_birth", "date_of_death"):
+        if record.get(field) and not _is_date(record[field]):
+            errors[field] = "Invalid date"
+    if record.get("area") and not _is_uuid(record["area"]):
+        errors["area"] = "Invalid area ID"
+    serializer_class, fields = REGISTRATION_FIELDS[kind]
+    errors.update(_field_errors(serializer_class, record, fields))
+
+    for role, _, _ in ROLES[kind]:
+        citizen_id, manual = record.get(role), record.get(f"{role}_manual")
+        if citizen_id:
+            if not _is_uuid(citizen_id):
+                errors[role] = "Invalid citizen ID"
+        elif manual and not isinstance(manual, dict):
+            errors[f"{role}_manual"] = "Expected an object"
+        elif manual:
+            missing = [f for f in ("first_name", "last_name") if not manual.get(f)]
+            if not manual.get("date_of_birth") and role != "child":
+                missing.append("date_of_birth")
+            if missing:
+                errors[f"{role}_manual"] = f"Missing required fields: {', '.join(missing)}"
+            elif manual.get("date_of_birth") and not _is_date(manual["date_of_birth"]):
+                errors[f"{role}_manual"] = "Invalid date_of_birth"
+            else:
+                errors.update({
+                    f"{role}_manual.{field}": message
+                    for field, message in _field_errors(CitizenSerializer, manual, CITIZEN_FIELDS).items()
+                })
+        elif role in REQUIRED_ROLES:
+            errors[role] = f"Either {role} ID or {role} manual data is required"
+    return errors
+
+
+def _field_errors(serializer_class, data, fields):
+    """The serializer's errors for those of `fields` present in `data`, as {field: message}."""
+    serializer = serializer_class(data={f: data[f] for f in fields if data.get(f) is not None}, partial=True)
+    if serializer.is_valid():
+        return {}
+    return {field: " ".join(map(str, messages)) for field, messages in serializer.errors.items()}
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def _is_date(value):
+    try:
+        return parse_date(str(value)) is not None
+    except ValueError:
+        return False
@@ -1,17 +1,297 @@
+# ngao_core/apps/civil_registration/services/iprs.py
+"""
+IPRS (Integrated Population Registration System) client.
+
+All lookups go through a single process-wide `IPRSClient` which keeps:
+- a pooled `requests.Session` (keep-alive connections to IPRS),
+- a TTL cache of verified identities (Django cache, shared across workers
+  once a shared backend is configured),
+- request coalescing so concurrent identical lookups hit IPRS once,
+- a circuit breaker so an IPRS outage fails fast instead of tying up workers.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-IPRS_API_URL = "https://iprs.example.com/api/citizens"
+logger = logging.getLogger(__name__)
 
-def fetch_citizen_details(id_number: str, last_name: str = None):
-    payload = {"id_number": id_number}
-    if last_name:
-        payload["last_name"] = last_name
+_MISSING = object()
+_NOT_FOUND = "__iprs_not_found__"
+
+
+class IPRSError(Exception):
+    """IPRS could not be reached or returned an unexpected response."""
+
+
+class CircuitOpenError(IPRSError):
+    """Raised without calling IPRS while the circuit breaker is open."""
+
+
+# ---------- Circuit Breaker ----------
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures. While open every call
+    fails immediately; after `reset_timeout` seconds one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._reset_due():
+                return self.HALF_OPEN
+            return self._state
+
+    def _reset_due(self):
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._reset_due():
+                # Let exactly one trial request through
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("IPRS circuit opened after %s failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+# ---------- Client ----------
+class IPRSClient:
+    def __init__(
+        self,
+        base_url=None,
+        timeout=None,
+        pool_size=None,
+        cache_ttl=None,
+        negative_cache_ttl=None,
+        max_workers=None,
+        breaker=None,
+    ):
+        self.base_url = base_url or settings.IPRS_API_URL
+        self.timeout = timeout if timeout is not None else settings.IPRS_TIMEOUT
+        self.cache_ttl = cache_ttl if cache_ttl is not None else settings.IPRS_CACHE_TTL
+        self.negative_cache_ttl = (
+            negative_cache_ttl
+            if negative_cache_ttl is not None
+            else settings.IPRS_NEGATIVE_CACHE_TTL
+        )
+        self.max_workers = max_workers or settings.IPRS_MAX_WORKERS
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=settings.IPRS_BREAKER_THRESHOLD,
+            reset_timeout=settings.IPRS_BREAKER_RESET_SECONDS,
+        )
+
+        pool_size = pool_size or settings.IPRS_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=1,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    # -------------------------
+    # Single lookup
+    # -------------------------
+    def lookup(self, id_number, last_name=None):
+        """
+        Return the IPRS record for `id_number` (optionally matched on last name),
+        or None when IPRS has no such citizen. Raises IPRSError when IPRS is
+        unavailable so callers can tell "not found" from "could not check".
+        """
+        key = self._cache_key(id_number, last_name)
+        cached = cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return None if cached == _NOT_FOUND else cached
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            # Another thread is already asking IPRS the same question
+            try:
+                return future.result(timeout=self.timeout * 2)
+            except FuturesTimeoutError as exc:
+                raise IPRSError("Timed out waiting for a concurrent IPRS lookup") from exc
+
+        try:
+            result = self._fetch(id_number, last_name)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            if result is None:
+                cache.set(key, _NOT_FOUND, self.negative_cache_ttl)
+            else:
+                cache.set(key, result, self.cache_ttl)
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
 
+    def _fetch(self, id_number, last_name=None):
+        if not self.breaker.allow():
+            raise CircuitOpenError("IPRS circuit is open")
+
+        params = {"id_number": id_number}
+        if last_name:
+            params["last_name"] = last_name
+
+        # Every call the breaker let through reports back, so a half-open
+        # trial always closes or re-opens the circuit
+        healthy = False
+        try:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            if response.status_code == 200:
+                record = response.json()
+                healthy = True
+                return record
+            if response.status_code == 404:
+                healthy = True
+                return None
+            # Any other answer below 500 means IPRS is up but refused this request
+            healthy = response.status_code < 500
+            raise IPRSError(f"IPRS returned HTTP {response.status_code}")
+        except (requests.RequestException, ValueError) as exc:
+            raise IPRSError(f"IPRS request failed: {exc}") from exc
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+
+    @staticmethod
+    def _cache_key(id_number, last_name=None):
+        surname = (last_name or "").strip().lower()
+        return f"iprs:citizen:{id_number}:{surname}"
+
+    # -------------------------
+    # Batch verification
+    # -------------------------
+    def verify_many(self, id_numbers):
+        """
+        Verify many ID numbers concurrently.
+
+        Returns {id_number: {"found": bool, "citizen": dict|None, "error": str|None}}.
+        Duplicates and blanks in `id_numbers` are ignored.
+        """
+        unique_ids = list(dict.fromkeys(i for i in id_numbers if i))
+        if not unique_ids:
+            return {}
+
+        executor = self._get_executor()
+        futures = {id_number: executor.submit(self.lookup, id_number) for id_number in unique_ids}
+
+        results = {}
+        for id_number, future in futures.items():
+            try:
+                citizen = future.result()
+                results[id_number] = {"found": citizen is not None, "citizen": citizen, "error": None}
+            except IPRSError as exc:
+                results[id_number] = {"found": False, "citizen": None, "error": str(exc)}
+        return results
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="iprs"
+                )
+            return self._executor
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.session.close()
+
+
+# ---------- Shared instance ----------
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = IPRSClient()
+        return _client
+
+
+def _reset_client_after_fork():
+    # Pooled sockets and executor threads must not be shared with forked workers
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def fetch_citizen_details(id_number: str, last_name: str = None):
+    """Return the IPRS record for a citizen, or None if not found / unavailable."""
     try:
-        
-        response = requests.get(IPRS_API_URL, params=payload, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except requests.RequestException:
+        return get_client().lookup(id_number, last_name)
+    except IPRSError as exc:
+        logger.warning("IPRS lookup for %s failed: %s", id_number, exc)
         return None
+
+
+def verify_id_numbers(id_numbers):
+    """Batch-verify ID numbers against IPRS. See `IPRSClient.verify_many`."""
+    return get_client().verify_many(id_numbers)
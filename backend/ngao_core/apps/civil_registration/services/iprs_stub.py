@@ -0,0 +1,116 @@
+# ngao_core/apps/civil_registration/services/iprs_stub.py
+"""
+Local stand-in for the IPRS API, used by tests and benchmarks.
+
+    with IPRSStubServer(records={"12345678": {...}}) as stub:
+        client = IPRSClient(base_url=stub.url)
+
+With `synthetic=True` every all-digit ID number resolves to a generated
+citizen, which is handy for load tests. `latency` and `fail_rate` simulate a
+slow or flaky upstream.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.request_count += 1
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if stub.fail_rate and random.random() < stub.fail_rate:
+            return self._send(503, {"detail": "Service unavailable"})
+
+        query = parse_qs(urlparse(self.path).query)
+        id_number = (query.get("id_number") or [""])[0]
+        last_name = (query.get("last_name") or [""])[0]
+
+        record = stub.get_record(id_number)
+        if record is None:
+            return self._send(404, {"detail": "Not found"})
+        if last_name and record.get("last_name", "").lower() != last_name.lower():
+            return self._send(404, {"detail": "Not found"})
+        return self._send(200, record)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            super().log_message(format, *args)
+
+
+class IPRSStubServer:
+    def __init__(
+        self,
+        records=None,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        fail_rate=0.0,
+        synthetic=False,
+        verbose=False,
+    ):
+        self.records = dict(records or {})
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.synthetic = synthetic
+        self.verbose = verbose
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/citizens"
+
+    def get_record(self, id_number):
+        if id_number in self.records:
+            return self.records[id_number]
+        if self.synthetic and id_number.isdigit():
+            return {
+                "id_number": id_number,
+                "first_name": f"Citizen{id_number[-4:]}",
+                "last_name": "Stub",
+                "gender": "M" if int(id_number) % 2 else "F",
+                "date_of_birth": "1990-01-01",
+            }
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
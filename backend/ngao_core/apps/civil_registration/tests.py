@@ -0,0 +1,296 @@
+import datetime
+import tempfile
+import threading
+import uuid
+import zipfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ngao_core.apps.accounts.models import CustomUser
+from ngao_core.apps.citizen_repo.models import Citizen
+
+from .models import BirthRegistration, CertificateBatch, DeathRegistration
+from .services import certificates
+from .services.approvals import bulk_approve_births, bulk_approve_deaths
+from .services.intake import ingest_records
+from .services.iprs import CircuitBreaker, CircuitOpenError, IPRSClient, IPRSError
+from .services.iprs_stub import IPRSStubServer
+from .services.references import ReferenceAllocator, allocate_references
+
+RECORDS = {
+    "11111111": {"id_number": "11111111", "first_name": "Jane", "last_name": "Wanjiku"},
+    "22222222": {"id_number": "22222222", "first_name": "John", "last_name": "Otieno"},
+}
+
+
+class IPRSClientTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_is_cached(self):
+        with IPRSStubServer(records=RECORDS) as stub:
+            client = IPRSClient(base_url=stub.url)
+            self.assertEqual(client.lookup("11111111")["first_name"], "Jane")
+            self.assertEqual(client.lookup("11111111")["first_name"], "Jane")
+            self.assertIsNone(client.lookup("99999999"))
+            self.assertIsNone(client.lookup("99999999"))
+            self.assertEqual(stub.request_count, 2)
+
+    def test_concurrent_lookups_are_coalesced(self):
+        with IPRSStubServer(records=RECORDS, latency=0.2) as stub:
+            client = IPRSClient(base_url=stub.url)
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(client.lookup("22222222")))
+                for _ in range(10)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(results), 10)
+            self.assertEqual(stub.request_count, 1)
+
+    def test_verify_many(self):
+        with IPRSStubServer(records=RECORDS) as stub:
+            client = IPRSClient(base_url=stub.url)
+            results = client.verify_many(["11111111", "22222222", "33333333", "11111111"])
+            self.assertTrue(results["11111111"]["found"])
+            self.assertTrue(results["22222222"]["found"])
+            self.assertFalse(results["33333333"]["found"])
+            self.assertIsNone(results["33333333"]["error"])
+            client.close()
+
+    def test_circuit_opens_after_failures(self):
+        with IPRSStubServer(fail_rate=1.0) as stub:
+            breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+            client = IPRSClient(base_url=stub.url, breaker=breaker)
+            results = client.verify_many(["1", "2", "3", "4"])
+            self.assertTrue(all(r["error"] for r in results.values()))
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpenError):
+                client.lookup("5")
+            client.close()
+
+    def test_half_open_trial_always_reports_back(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        client = IPRSClient(base_url="http://iprs.invalid", breaker=breaker)
+        # IPRS is up but rejects the trial request
+        client.session.get = lambda *args, **kwargs: SimpleNamespace(status_code=400)
+        with self.assertRaises(IPRSError):
+            client.lookup("1")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class BulkApprovalTest(TestCase):
+    def make_citizen(self, **kwargs):
+        defaults = {
+            "first_name": "Amina",
+            "last_name": "Njeri",
+            "gender": "F",
+            "date_of_birth": datetime.date(1990, 1, 1),
+            "place_of_birth": "Nyeri",
+        }
+        defaults.update(kwargs)
+        return Citizen.objects.create(**defaults)
+
+    def test_bulk_approve_births(self):
+        mother = self.make_citizen()
+        child = self.make_citizen(is_alive=False)
+        submitted = BirthRegistration.objects.create(
+            child=child, mother=mother, place_of_birth="Nyeri", gender="F",
+            date_of_birth=datetime.date(2025, 1, 1), status="submitted",
+            reference_number="BIRTH-TEST-1",
+        )
+        draft = BirthRegistration.objects.create(
+            mother=mother, place_of_birth="Nyeri", gender="M",
+            date_of_birth=datetime.date(2025, 1, 2), reference_number="BIRTH-TEST-2",
+        )
+
+        results = bulk_approve_births([submitted.id, draft.id, "not-a-uuid"])
+
+        self.assertEqual(results[str(submitted.id)], {"result": "approved"})
+        self.assertEqual(results[str(draft.id)], {"result": "invalid_status", "status": "draft"})
+        self.assertEqual(results["not-a-uuid"], {"result": "invalid_id"})
+        child.refresh_from_db()
+        self.assertTrue(child.is_alive)
+
+    def test_bulk_approve_deaths(self):
+        citizen = self.make_citizen()
+        death = DeathRegistration.objects.create(
+            citizen=citizen, date_of_death=datetime.date(2025, 3, 1),
+            place_of_death="Nyeri", reference_number="DEATH-TEST-1",
+        )
+
+        # savepoint + lock + 2 updates + change log (scopes, insert) + read-back + release
+        with self.assertNumQueries(8):
+            results = bulk_approve_deaths([death.id])
+
+        self.assertEqual(results[str(death.id)], {"result": "approved"})
+        citizen.refresh_from_db()
+        self.assertFalse(citizen.is_alive)
+        self.assertEqual(citizen.date_of_death, datetime.date(2025, 3, 1))
+
+
+class ReferenceAllocatorTest(TestCase):
+    def test_allocate_references_are_unique_and_increasing(self):
+        refs = allocate_references("birth", 120)
+        self.assertEqual(len(set(refs)), 120)
+        self.assertEqual(refs, sorted(refs))
+        self.assertTrue(all(ref.startswith("BIRTH-") for ref in refs))
+
+    def test_blocks_are_reserved_in_one_query(self):
+        allocator = ReferenceAllocator(block_size=25)
+        with self.assertNumQueries(1):
+            values = [allocator.take("death")[0] for _ in range(25)]
+        self.assertEqual(values, sorted(set(values)))
+
+    def test_same_second_saves_do_not_collide(self):
+        mother = Citizen.objects.create(
+            first_name="Amina", last_name="Njeri", gender="F",
+            date_of_birth=datetime.date(1990, 1, 1), place_of_birth="Nyeri",
+        )
+        first, second = (
+            BirthRegistration.objects.create(
+                mother=mother, place_of_birth="Nyeri", gender="F",
+                date_of_birth=datetime.date(2025, 1, 1),
+            )
+            for _ in range(2)
+        )
+        self.assertNotEqual(first.reference_number, second.reference_number)
+
+
+@override_settings(CERTIFICATE_WORKERS=1, CERTIFICATE_BACKGROUND_BATCHES=False)
+class CertificateTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        certificates._storage = FileSystemStorage(location=self.tmp.name)
+        self.addCleanup(setattr, certificates, "_storage", None)
+
+        citizen = Citizen.objects.create(
+            first_name="Amina", last_name="Njeri", gender="F",
+            date_of_birth=datetime.date(1950, 1, 1), place_of_birth="Nyeri",
+        )
+        self.death = DeathRegistration.objects.create(
+            citizen=citizen, date_of_death=datetime.date(2025, 3, 1),
+            place_of_death="Nyeri", status="approved",
+        )
+
+    def test_certificate_is_rendered_once(self):
+        name, pdf = certificates.get_certificate("death", self.death)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(certificates.get_certificate("death", self.death), (name, pdf))
+        self.assertEqual(len(certificates.get_storage().listdir(name.rsplit("/", 1)[0])[1]), 1)
+
+    def test_batch_produces_zip(self):
+        batch = certificates.queue_batch("death", [self.death.id, uuid.uuid4()])
+        self.assertTrue(certificates.process_batch(batch.id))
+        self.assertFalse(certificates.process_batch(batch.id))
+
+        batch = CertificateBatch.objects.get(id=batch.id)
+        self.assertEqual(batch.status, "completed")
+        self.assertEqual(batch.rendered, 1)
+        self.assertEqual(len(batch.skipped), 1)
+        with certificates.open_archive(batch) as f, zipfile.ZipFile(f) as archive:
+            self.assertEqual(archive.namelist(), [f"{self.death.reference_number}.pdf"])
+
+    def test_stale_rendering_batches_are_requeued(self):
+        batch = certificates.queue_batch("death", [self.death.id])
+        fresh = certificates.queue_batch("death", [self.death.id])
+        CertificateBatch.objects.filter(id=batch.id).update(
+            status="rendering", claimed_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        CertificateBatch.objects.filter(id=fresh.id).update(status="rendering", claimed_at=timezone.now())
+
+        with override_settings(CERTIFICATE_BATCH_LEASE_SECONDS=60):
+            self.assertEqual(certificates.requeue_stale_batches(), 1)
+        self.assertEqual(CertificateBatch.objects.get(id=fresh.id).status, "rendering")
+        self.assertTrue(certificates.process_batch(batch.id))
+        self.assertEqual(CertificateBatch.objects.get(id=batch.id).status, "completed")
+
+    def test_expired_worker_does_not_overwrite_a_reclaimed_batch(self):
+        batch = certificates.queue_batch("death", [self.death.id])
+        real_render = certificates.render_batch
+
+        def requeue_mid_render(*args):
+            # Another worker takes over while this one is still rendering
+            CertificateBatch.objects.filter(id=batch.id).update(status="rendering", claimed_at=timezone.now())
+            return real_render(*args)
+
+        with mock.patch.object(certificates, "render_batch", requeue_mid_render):
+            self.assertTrue(certificates.process_batch(batch.id))
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, "rendering")
+        self.assertIsNone(batch.completed_at)
+
+    def test_batch_is_limited_to_the_callers_jurisdiction(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(email="clerk@example.com", password="pw"))
+        response = client.post(
+            "/api/registrations/certificate-batches/",
+            {"kind": "death", "registration_ids": [str(self.death.id)]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["ids"], [str(self.death.id)])
+        self.assertFalse(CertificateBatch.objects.exists())
+
+
+class BatchIntakeTest(TestCase):
+    def records(self):
+        mother = {"first_name": "Amina", "last_name": "Njeri", "id_number": "30000001", "date_of_birth": "1990-01-01"}
+        return [
+            {
+                "key": "tablet-1:1", "type": "birth", "place_of_birth": "Nyeri",
+                "date_of_birth": "2025-01-01", "gender": "F",
+                "child_manual": {"first_name": "Wanjiru", "last_name": "Njeri"},
+                "mother_manual": mother,
+            },
+            {
+                "key": "tablet-1:2", "type": "birth", "place_of_birth": "Nyeri",
+                "date_of_birth": "2025-02-01", "gender": "M",
+                "child_manual": {"first_name": "Kamau", "last_name": "Njeri"},
+                "mother_manual": mother,
+            },
+            {
+                "key": "tablet-1:3", "type": "death", "place_of_death": "Nyeri",
+                "date_of_death": "2025-03-01",
+                "citizen_manual": {"first_name": "Otieno", "last_name": "Ouma", "date_of_birth": "1940-01-01"},
+            },
+            {"key": "tablet-1:4", "type": "birth", "place_of_birth": "Nyeri"},
+        ]
+
+    def test_batch_is_ingested_once(self):
+        results = ingest_records(self.records())
+
+        self.assertEqual([r["result"] for r in results], ["created", "created", "created", "invalid"])
+        self.assertEqual(BirthRegistration.objects.count(), 2)
+        self.assertEqual(DeathRegistration.objects.count(), 1)
+        # The shared mother is created once
+        self.assertEqual(Citizen.objects.filter(id_number="30000001").count(), 1)
+
+        replay = ingest_records(self.records())
+        self.assertTrue(all(r.get("replayed") for r in replay[:3]))
+        self.assertEqual(replay[0]["reference_number"], results[0]["reference_number"])
+        self.assertEqual(BirthRegistration.objects.count(), 2)
+
+    def test_bad_fields_are_reported_per_record(self):
+        records = self.records()[:3]
+        records[0]["gender"] = "X"
+        records[1]["child_manual"]["first_name"] = "W" * 200
+        records[2]["status"] = "approved"
+        results = ingest_records(records)
+
+        self.assertEqual([r["result"] for r in results], ["invalid", "invalid", "created"])
+        self.assertIn("gender", results[0]["errors"])
+        self.assertIn("child_manual.first_name", results[1]["errors"])
+        # The initial status is always the server's
+        self.assertEqual(DeathRegistration.objects.get().status, "submitted")
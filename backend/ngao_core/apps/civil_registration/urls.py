@@ -4,7 +4,9 @@ from .views import (
     RegistrationRequestViewSet,
     BirthRegistrationViewSet,
     DeathRegistrationViewSet,
-    MarriageRegistrationViewSet
+    MarriageRegistrationViewSet,
+    CertificateBatchViewSet,
+    RegistrationBatchView,
 )
 
 router = DefaultRouter()
@@ -12,7 +14,9 @@ router.register("requests", RegistrationRequestViewSet, basename="registrationre
 router.register("births", BirthRegistrationViewSet, basename="birthregistration")
 router.register("deaths", DeathRegistrationViewSet, basename="deathregistration")
 router.register("marriages", MarriageRegistrationViewSet, basename="marriageregistration")
+router.register("certificate-batches", CertificateBatchViewSet, basename="certificatebatch")
 
 urlpatterns = [
+    path("batch/", RegistrationBatchView.as_view(), name="registration-batch"),
     path("", include(router.urls)),
 ]
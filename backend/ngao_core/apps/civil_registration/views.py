@@ -1,9 +1,12 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.db import transaction
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
 from datetime import datetime
 from django.utils import timezone
 
@@ -12,15 +15,78 @@ from .models import (
     BirthRegistration,
     DeathRegistration,
     MarriageRegistration,
+    CertificateBatch,
 )
 from .serializers import (
     RegistrationRequestSerializer,
     BirthRegistrationSerializer,
     DeathRegistrationSerializer,
     MarriageRegistrationSerializer,
+    CertificateBatchSerializer,
 )
 
+from .services.approvals import bulk_approve_births, bulk_approve_deaths
+from .services.certificates import REGISTRATIONS, get_certificate, open_archive, queue_batch
+from .services.intake import ingest_records
+from .services.iprs import verify_id_numbers
+
 from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.api.scope import JurisdictionScopeMixin, scope_queryset
+from ngao_core.api.sparse import SparseQuerysetMixin
+
+
+# ---------- Certificates ----------
+def certificate_response(request, kind, registration):
+    if registration.status != "approved":
+        return Response(
+            {"error": "Only approved registrations can generate certificates"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    name, content = get_certificate(kind, registration)
+    etag = f'"{name.rsplit("/", 1)[-1][:-4]}"'
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+
+    response = HttpResponse(content, content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="{registration.reference_number}.pdf"'
+    response["ETag"] = etag
+    return response
+
+
+# ---------- Batch Intake ----------
+class RegistrationBatchView(APIView):
+    """
+    Ingest births and deaths captured offline in one request.
+
+    Body: {"records": [{"key": "<client id>", "type": "birth" | "death", ...}]}
+    Each record takes the same fields as the single-record create endpoints.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        records = request.data.get("records")
+
+        if not isinstance(records, list) or not records:
+            return Response(
+                {"error": "records must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(records) > settings.INTAKE_BATCH_LIMIT:
+            return Response(
+                {"error": f"A batch may contain at most {settings.INTAKE_BATCH_LIMIT} records"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = ingest_records(records, user=request.user)
+
+        summary = {}
+        for outcome in results:
+            result = "replayed" if outcome.get("replayed") else outcome["result"]
+            summary[result] = summary.get(result, 0) + 1
+
+        return Response({"summary": summary, "results": results})
 
 
 # ---------- Registration Request ViewSet ----------
@@ -37,9 +103,51 @@ class RegistrationRequestViewSet(viewsets.ModelViewSet):
         reg_req.verify_parents(mother_ok, father_ok, chief_user)
         return Response({"status": reg_req.status})
 
+    @action(detail=False, methods=["post"])
+    def bulk_verify_parents(self, request):
+        """Verify parents of many pending requests against IPRS concurrently"""
+        ids = request.data.get("ids", [])
+
+        if not ids:
+            return Response(
+                {"error": "No registration request IDs provided"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        reg_requests = list(
+            RegistrationRequest.objects.filter(id__in=ids, status="pending_verification")
+        )
+        id_numbers = [r.mother_id_number for r in reg_requests] + [
+            r.father_id_number for r in reg_requests if r.father_id_number
+        ]
+        verified = verify_id_numbers(id_numbers)
+
+        results = {}
+        for reg_req in reg_requests:
+            mother = verified.get(reg_req.mother_id_number, {})
+            father = verified.get(reg_req.father_id_number, {}) if reg_req.father_id_number else {}
+            errors = [e for e in (mother.get("error"), father.get("error")) if e]
+            if errors:
+                # IPRS could not answer; leave the request untouched so it can be retried
+                results[reg_req.id] = {"status": reg_req.status, "error": errors[0]}
+                continue
+
+            reg_req.verify_parents(
+                mother.get("found", False),
+                father.get("found", False) if reg_req.father_id_number else True,
+                request.user,
+            )
+            results[reg_req.id] = {
+                "status": reg_req.status,
+                "mother_verified": reg_req.mother_verified,
+                "father_verified": reg_req.father_verified,
+            }
+
+        return Response({"results": results})
+
 
 # ---------- Birth Registration ViewSet ----------
-class BirthRegistrationViewSet(viewsets.ModelViewSet):
+class BirthRegistrationViewSet(JurisdictionScopeMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = (
         BirthRegistration.objects.select_related(
             "child", "mother", "father", "initiated_by", "area"
@@ -49,10 +157,11 @@ class BirthRegistrationViewSet(viewsets.ModelViewSet):
     )
     serializer_class = BirthRegistrationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    scope_area_fields = ("area",)
+    scope_owner_fields = ("initiated_by",)
 
     def get_queryset(self):
-        """Filter based on user permissions and area"""
-        user = self.request.user
+        """Jurisdiction-scoped (see JurisdictionScopeMixin), optionally by status"""
         queryset = super().get_queryset()
 
         # Filter by status if provided
@@ -60,10 +169,6 @@ class BirthRegistrationViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        # Filter by area if user has area restrictions
-        if hasattr(user, "area") and user.area:
-            queryset = queryset.filter(area=user.area)
-
         return queryset
 
     def get_or_create_citizen(self, citizen_id=None, citizen_manual=None):
@@ -471,26 +576,8 @@ class BirthRegistrationViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["get"])
     def generate_certificate(self, request, pk=None):
-        """Generate birth certificate (only for approved registrations)"""
-        birth = self.get_object()
-
-        if birth.status != "approved":
-            return Response(
-                {"error": "Only approved registrations can generate certificates"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # TODO: Implement actual certificate generation logic
-        # This could generate a PDF, update certificate number, etc.
-
-        return Response(
-            {
-                "message": "Certificate generation initiated",
-                "reference_number": birth.reference_number,
-                "child_name": birth.child.get_full_name(),
-                "date_of_birth": birth.date_of_birth,
-            }
-        )
+        """Birth certificate PDF (only for approved registrations)"""
+        return certificate_response(request, "birth", self.get_object())
 
     @action(detail=False, methods=["get"])
     def statistics(self, request):
@@ -526,16 +613,14 @@ class BirthRegistrationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        with transaction.atomic():
-            births = BirthRegistration.objects.filter(id__in=ids, status="submitted")
-
-            for birth in births:
-                birth.approve()
+        results = bulk_approve_births(ids, queryset=self.scope(BirthRegistration.objects.all()))
+        approved_count = sum(1 for r in results.values() if r["result"] == "approved")
 
         return Response(
             {
-                "message": f"{births.count()} registrations approved successfully",
-                "approved_count": births.count(),
+                "message": f"{approved_count} registrations approved successfully",
+                "approved_count": approved_count,
+                "results": results,
             }
         )
 
@@ -552,7 +637,7 @@ class BirthRegistrationViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 # ---------- Death Registration ViewSet ----------
-class DeathRegistrationViewSet(viewsets.ModelViewSet):
+class DeathRegistrationViewSet(JurisdictionScopeMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = (
         DeathRegistration.objects.select_related(
             "citizen", "initiated_by", "area"
@@ -562,10 +647,11 @@ class DeathRegistrationViewSet(viewsets.ModelViewSet):
     )
     serializer_class = DeathRegistrationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    scope_area_fields = ("area",)
+    scope_owner_fields = ("initiated_by",)
 
     def get_queryset(self):
-        """Filter based on user permissions and area"""
-        user = self.request.user
+        """Jurisdiction-scoped (see JurisdictionScopeMixin), optionally by status"""
         queryset = super().get_queryset()
 
         # Filter by status if provided
@@ -573,10 +659,6 @@ class DeathRegistrationViewSet(viewsets.ModelViewSet):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
-        # Filter by area if user has area restrictions
-        if hasattr(user, "area") and user.area:
-            queryset = queryset.filter(area=user.area)
-
         return queryset
 
     def get_or_create_citizen(self, citizen_id=None, citizen_manual=None):
@@ -897,6 +979,11 @@ class DeathRegistrationViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=True, methods=["get"])
+    def generate_certificate(self, request, pk=None):
+        """Death certificate PDF (only for approved registrations)"""
+        return certificate_response(request, "death", self.get_object())
+
     @action(detail=False, methods=["get"])
     def statistics(self, request):
         """Get death registration statistics"""
@@ -929,18 +1016,14 @@ class DeathRegistrationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        with transaction.atomic():
-            deaths = DeathRegistration.objects.filter(id__in=ids, status="submitted")
-
-            for death in deaths:
-                death.approve()
-                death.approved_at = timezone.now()
-                death.save()
+        results = bulk_approve_deaths(ids, queryset=self.scope(DeathRegistration.objects.all()))
+        approved_count = sum(1 for r in results.values() if r["result"] == "approved")
 
         return Response(
             {
-                "message": f"{deaths.count()} registrations approved successfully",
-                "approved_count": deaths.count(),
+                "message": f"{approved_count} registrations approved successfully",
+                "approved_count": approved_count,
+                "results": results,
             }
         )
 
@@ -958,12 +1041,80 @@ class DeathRegistrationViewSet(viewsets.ModelViewSet):
 
 
 # ---------- Marriage Registration ViewSet ----------
-class MarriageRegistrationViewSet(viewsets.ModelViewSet):
+class MarriageRegistrationViewSet(JurisdictionScopeMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = MarriageRegistration.objects.all().order_by("-date_of_marriage")
     serializer_class = MarriageRegistrationSerializer
+    scope_area_fields = ("area",)
+    scope_owner_fields = ("initiated_by",)
 
     @action(detail=True, methods=["post"])
     def approve(self, request, pk=None):
         marriage = self.get_object()
         marriage.approve()
         return Response({"status": marriage.status})
+
+    @action(detail=True, methods=["get"])
+    def generate_certificate(self, request, pk=None):
+        """Marriage certificate PDF (only for approved registrations)"""
+        return certificate_response(request, "marriage", self.get_object())
+
+
+# ---------- Certificate Batch ViewSet ----------
+class CertificateBatchViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Queue certificate batches, poll their status and download the zip."""
+    serializer_class = CertificateBatchSerializer
+
+    def get_queryset(self):
+        queryset = CertificateBatch.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(requested_by=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        kind = serializer.validated_data["kind"]
+        registration_ids = serializer.validated_data["registration_ids"]
+
+        # Only registrations the caller could open one at a time may be batched
+        model = REGISTRATIONS[kind][0]
+        allowed = set(
+            scope_queryset(
+                model.objects.filter(id__in=registration_ids),
+                request.user,
+                area_fields=("area",),
+                owner_fields=("initiated_by",),
+            ).values_list("id", flat=True)
+        )
+        outside = [str(pk) for pk in registration_ids if pk not in allowed]
+        if outside:
+            return Response(
+                {"registration_ids": "Registrations not found in your jurisdiction.", "ids": outside},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        batch = queue_batch(kind, registration_ids, user=request.user)
+        return Response(self.get_serializer(batch).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        batch = self.get_object()
+
+        if batch.status != "completed":
+            return Response(
+                {"error": "Batch is not ready", "status": batch.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return FileResponse(
+            open_archive(batch),
+            as_attachment=True,
+            filename=f"certificates-{batch.id}.zip",
+            content_type="application/zip",
+        )
+
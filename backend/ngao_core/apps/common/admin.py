@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import ArchiveManifest, RequestProfile
+
+
+@admin.register(ArchiveManifest)
+class ArchiveManifestAdmin(admin.ModelAdmin):
+    list_display = ("model", "range_start", "range_end", "row_count", "size_bytes", "source", "created_at")
+    list_filter = ("model", "codec")
+    search_fields = ("source", "location")
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("view", "method", "status_code", "duration_ms", "reason", "role", "sample_count", "created_at")
+    list_filter = ("reason", "method")
+    search_fields = ("view", "path")
+    exclude = ("stacks",)
+    readonly_fields = ("user",)
@@ -0,0 +1,13 @@
+# ngao_core/apps/common/apps.py
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    name = "ngao_core.apps.common"
+    verbose_name = "Common"
+
+    def ready(self):
+        from .cache import register_default_tags
+        from .metrics import register_default_queues
+        register_default_tags()
+        register_default_queues()
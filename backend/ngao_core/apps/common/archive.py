@@ -0,0 +1,149 @@
+# ngao_core/apps/common/archive.py
+"""
+Cold-data archive.
+
+Rows moved out of the hot tables are written as compressed JSON lines
+(zstd when `zstandard` is installed, gzip otherwise) to ARCHIVE_STORAGE,
+the local filesystem or any S3-compatible bucket such as MinIO. Every file
+covers one time range of one model and has an ArchiveManifest row saying
+where it lives, so `read_archived` can stream a range back without
+touching the hot tables. The archive_cold_data command does the moving.
+"""
+import gzip
+import hashlib
+import json
+import tempfile
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# label -> timestamp field ranges are cut on
+ARCHIVED_MODELS = {
+    "incidents.Incident": "date_reported",
+    "incidents.Response": "timestamp",
+    "citizen_repo.CitizenQueryLog": "timestamp",
+    "communications.SMSLog": "created_at",
+    "communications.USSDLog": "created_at",
+}
+
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        config = settings.ARCHIVE_STORAGE
+        _storage = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+    return _storage
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, GEOSGeometry):
+            return o.ewkt
+        return super().default(o)
+
+
+# ---------- Writing ----------
+def _compressor(raw):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=settings.ARCHIVE_ZSTD_LEVEL).stream_writer(raw, closefd=False)
+    return "gzip", gzip.GzipFile(fileobj=raw, mode="wb")
+
+
+def write_archive(label, source, start, end, rows):
+    """
+    Compress `rows` (dicts) into one archive file for [start, end) and
+    return an unsaved ArchiveManifest for it, or None when there were no
+    rows. Save the manifest in the same transaction that deletes the rows.
+    """
+    from .models import ArchiveManifest
+
+    with tempfile.TemporaryFile() as raw:
+        codec, out = _compressor(raw)
+        count = 0
+        for row in rows:
+            out.write(json.dumps(row, cls=ArchiveEncoder).encode() + b"\n")
+            count += 1
+        out.close()
+        if not count:
+            return None
+
+        raw.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: raw.read(1 << 20), b""):
+            digest.update(chunk)
+        size = raw.tell()
+        raw.seek(0)
+
+        app_label, model = label.lower().split(".")
+        extension = "zst" if codec == "zstd" else "gz"
+        name = f"{app_label}/{model}/{start:%Y/%m}/{source}-{start:%Y%m%d}-{end:%Y%m%d}.jsonl.{extension}"
+        location = get_storage().save(name, File(raw))
+
+    return ArchiveManifest(
+        model=label,
+        source=source,
+        range_start=start,
+        range_end=end,
+        location=location,
+        codec=codec,
+        row_count=count,
+        size_bytes=size,
+        checksum=digest.hexdigest(),
+    )
+
+
+# ---------- Reading ----------
+def _lines(manifest):
+    with get_storage().open(manifest.location, "rb") as raw:
+        if manifest.codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError(f"{manifest.location} is zstd-compressed; install zstandard to read it")
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        buffer = b""
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            yield from lines
+        if buffer:
+            yield buffer
+
+
+def read_archived(label, start=None, end=None, manifests=None):
+    """
+    Yield the archived rows of `label` whose timestamp falls in [start, end),
+    as the dicts they were written as (dates are ISO strings; the
+    timestamp field is parsed back to a datetime). `manifests` narrows the
+    files read to that ArchiveManifest queryset.
+    """
+    from .models import ArchiveManifest
+
+    field = ARCHIVED_MODELS[label]
+    if manifests is None:
+        manifests = ArchiveManifest.objects.all()
+    manifests = manifests.filter(model=label).order_by("range_start")
+    if start is not None:
+        manifests = manifests.filter(range_end__gt=start)
+    if end is not None:
+        manifests = manifests.filter(range_start__lt=end)
+
+    for manifest in manifests:
+        for line in _lines(manifest):
+            row = json.loads(line)
+            stamp = parse_datetime(row[field]) if row.get(field) else None
+            if stamp is None or (start is not None and stamp < start) or (end is not None and stamp >= end):
+                continue
+            row[field] = stamp
+            yield row
@@ -0,0 +1,225 @@
+# ngao_core/apps/common/cache.py
+"""
+Cache-aside helpers with tag invalidation and stampede protection.
+
+Two tiers: the "default" cache (Redis when REDIS_URL is set) is shared by
+every worker, and the "local" cache is a per-process LocMem tier in front
+of it that absorbs hot keys for CACHE_LOCAL_TTL seconds. A local hit may
+therefore be up to that long out of date after another process
+invalidates it.
+
+Entries are stamped with the current version of each of their tags.
+Invalidating a tag replaces its version in the shared cache, so every
+entry stamped with the old one becomes a miss without enumerating keys.
+Versions are bumped when the surrounding transaction commits; models are
+wired to tags with `invalidate_on`.
+
+Stampedes: a miss takes a short lock so one caller recomputes while the
+others wait for its result, and a hit is recomputed early with a
+probability that grows as it nears expiry (XFetch), in which case callers
+that lose the lock keep getting the current value.
+"""
+import functools
+import hashlib
+import math
+import random
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpRequest
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .metrics import CACHE_REQUESTS
+
+LOCK_TIMEOUT = 30  # seconds a recompute may hold its lock
+LOCK_WAIT = 2.0  # seconds a caller waits for another's recompute
+EARLY_REFRESH_BETA = 1.0  # > 1 refreshes earlier, < 1 later
+
+DEFAULT_TAGS = {
+    "geography": ["geography.Area"],
+    "admin_units": ["admin_structure.AdminUnit"],
+    "incidents": ["incidents.Incident", "incidents.Response"],
+    "routing": ["accounts.OfficerProfile", "accounts.Role", "geography.Area"],
+    "registrations": [
+        "civil_registration.BirthRegistration",
+        "civil_registration.DeathRegistration",
+        "civil_registration.MarriageRegistration",
+    ],
+}
+
+
+def _shared():
+    return caches["default"]
+
+
+def _local():
+    return caches["local"]
+
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+# ---------- Tags ----------
+def _versions(tags, found):
+    """Current version of each tag, creating versions that do not exist yet."""
+    versions = {}
+    for tag in tags:
+        key = _tag_key(tag)
+        version = found.get(key)
+        if version is None:
+            version = time.time_ns()
+            if not _shared().add(key, version, None):
+                version = _shared().get(key)
+        versions[tag] = version
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Expire every entry stamped with any of `tags` once the current transaction commits."""
+    def bump():
+        _shared().set_many({_tag_key(tag): time.time_ns() for tag in tags}, None)
+        _local().clear()
+
+    transaction.on_commit(bump)
+
+
+def invalidate_on(tag, *models):
+    """Invalidate `tag` whenever an instance of one of `models` (or "app.Model" labels) is saved or deleted."""
+    for model in models:
+        if isinstance(model, str):
+            model = apps.get_model(model)
+        receiver = functools.partial(_invalidate_receiver, tag)
+        uid = f"cache-tag:{tag}:{model._meta.label}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+
+
+def _invalidate_receiver(tag, sender, **kwargs):
+    invalidate_tags(tag)
+
+
+def register_default_tags():
+    for tag, models in DEFAULT_TAGS.items():
+        invalidate_on(tag, *models)
+
+
+# ---------- Cache-aside ----------
+def cached(key, compute, ttl=None, tags=()):
+    """Return the value cached under `key`, calling `compute()` to fill it on a miss."""
+    ttl = settings.CACHE_DEFAULT_TTL if ttl is None else ttl
+    key = f"cache:{key}"
+
+    entry = _local().get(key)
+    if entry is not None:
+        CACHE_REQUESTS.labels("local", "hit").inc()
+        return entry[0]
+
+    found = _shared().get_many([key, *map(_tag_key, tags)])
+    versions = _versions(tags, found)
+    entry = found.get(key)
+    if entry is not None and entry[1] == versions:
+        CACHE_REQUESTS.labels("shared", "hit").inc()
+        value, _, expires_at, delta = entry
+        if not _refresh_early(expires_at, delta):
+            _local().set(key, entry, min(ttl, settings.CACHE_LOCAL_TTL))
+            return value
+        return _recompute(key, compute, ttl, versions, stale=(value,))
+    CACHE_REQUESTS.labels("shared", "miss").inc()
+    return _recompute(key, compute, ttl, versions)
+
+
+def _refresh_early(expires_at, delta):
+    # XFetch: the longer the recompute took, the earlier it starts
+    return time.time() - delta * EARLY_REFRESH_BETA * math.log(1 - random.random()) >= expires_at
+
+
+def _recompute(key, compute, ttl, versions, stale=None):
+    lock = f"lock:{key}"
+    if _shared().add(lock, 1, LOCK_TIMEOUT):
+        try:
+            start = time.monotonic()
+            value = compute()
+            # Stamped with the versions read before computing: an invalidation
+            # that lands meanwhile leaves this entry already stale
+            entry = (value, versions, time.time() + ttl, time.monotonic() - start)
+            _shared().set(key, entry, ttl)
+            _local().set(key, entry, min(ttl, settings.CACHE_LOCAL_TTL))
+            return value
+        finally:
+            _shared().delete(lock)
+
+    if stale is not None:
+        return stale[0]
+
+    # Wait for the lock holder; stop early if the lock is gone (holder
+    # failed, or the shared cache is unreachable)
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline and _shared().get(lock) is not None:
+        time.sleep(0.05)
+        entry = _shared().get(key)
+        if entry is not None and entry[1] == versions:
+            return entry[0]
+    return compute()
+
+
+def _digest(*parts):
+    return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+
+# ---------- Decorators ----------
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cached_view(ttl=None, tags=(), vary_on_user=False):
+    """
+    Cache the data of successful GET responses from a function view, APIView
+    method or viewset action. The key is the view and its full path, query
+    string included; with `vary_on_user` also the requesting user.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = next(a for a in args[:2] if isinstance(a, (Request, HttpRequest)))
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            parts = [view.__module__, view.__qualname__, request.get_full_path()]
+            if vary_on_user:
+                parts.append(request.user.pk)
+
+            def compute():
+                response = view(*args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            try:
+                data = cached(f"view:{_digest(*parts)}", compute, ttl, tags)
+            except _Uncacheable as exc:
+                return exc.response
+            return Response(data)
+
+        return wrapper
+
+    return decorator
+
+
+def cached_queryset(ttl=None, tags=()):
+    """Cache the rows of a function returning a queryset, keyed by its arguments."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = f"qs:{_digest(fn.__module__, fn.__qualname__, args, sorted(kwargs.items()))}"
+            return cached(key, lambda: list(fn(*args, **kwargs)), ttl, tags)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,30 @@
+# ngao_core/apps/common/db.py
+"""
+Connection pool introspection.
+
+With DB_POOL=psycopg every worker process keeps its own psycopg 3 pool per
+database alias; the numbers here describe the pool of the process that
+serves the request.
+"""
+import time
+
+from django.db import connections
+
+
+def pool_stats(alias="default"):
+    """Counters of the alias' connection pool, or {"pooled": False} without one."""
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return {"pooled": False}
+    # get_stats() reports cumulative counters plus the current pool_size,
+    # pool_available and requests_waiting
+    return {"pooled": True, "name": pool.name, **pool.get_stats()}
+
+
+def ping(alias="default"):
+    """Round-trip time of SELECT 1 in milliseconds, including any connection setup."""
+    start = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,161 @@
+# ngao_core/apps/common/management/commands/archive_cold_data.py
+import datetime
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from ngao_core.apps.common.archive import write_archive
+from ngao_core.apps.common.cache import invalidate_tags
+from ngao_core.apps.common.partitions import PARTITIONED_MODELS, add_months, list_detached, month_range, month_start
+from ngao_core.apps.incidents.models import ArchivedIncidentCount, Incident, Response, Witness
+
+ARCHIVED_STATUSES = ("resolved", "closed")
+CHUNK = 1000
+# Incident columns archived incidents are counted by (see ArchivedIncidentCount)
+COUNTED = ("status", "incident_type", "area_id", "location_id", "reported_by_id", "current_handler_id")
+
+
+def as_datetime(month):
+    return datetime.datetime.combine(month, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Move cold data to ARCHIVE_STORAGE: every detached partition of the "
+        "partitioned log tables (see manage_partitions), then resolved and "
+        "closed incidents older than --months with their responses, "
+        "witnesses and handlers. Each month becomes one compressed JSON lines "
+        "file with an ArchiveManifest row (plus ArchivedIncidentCount rows for "
+        "incidents); the rows are then dropped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=settings.ARCHIVE_INCIDENT_MONTHS)
+        parser.add_argument("--only", choices=("partitions", "incidents"))
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be archived")
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        # Partitions first: a detached response partition still holds
+        # foreign keys to the incidents archived below
+        if options["only"] != "incidents":
+            self.archive_partitions()
+        if options["only"] != "partitions":
+            self.archive_incidents(options["months"])
+        if not self.dry_run:
+            invalidate_tags("archive", "incidents")
+
+    # ---------- Detached partitions ----------
+    def archive_partitions(self):
+        quote = connection.ops.quote_name
+        for label in PARTITIONED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            with connection.cursor() as cursor:
+                detached = list_detached(cursor, table)
+
+            for name, month in sorted(detached.items(), key=lambda item: item[1]):
+                if self.dry_run:
+                    self.stdout.write(f"would archive {name}")
+                    continue
+                start, end = as_datetime(month), as_datetime(add_months(month, 1))
+                manifest = write_archive(label, name, start, end, self.table_rows(name))
+                with transaction.atomic():
+                    if manifest:
+                        manifest.save()
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {quote(name)}")
+                self.report(name, manifest)
+
+    @staticmethod
+    def table_rows(name):
+        # Server-side cursor: a month of logs does not fit in memory
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(f"SELECT * FROM {connection.ops.quote_name(name)}")
+            columns = [column.name for column in cursor.description]
+            while rows := cursor.fetchmany(CHUNK):
+                for row in rows:
+                    yield dict(zip(columns, row))
+
+    # ---------- Incidents ----------
+    def archive_incidents(self, months):
+        cutoff = add_months(month_start(timezone.now()), -months)
+        cold = Incident.objects.filter(status__in=ARCHIVED_STATUSES, date_reported__lt=as_datetime(cutoff))
+        oldest = cold.aggregate(oldest=Min("date_reported"))["oldest"]
+        if oldest is None:
+            return
+
+        for month in month_range(oldest.date(), add_months(cutoff, -1)):
+            start, end = as_datetime(month), as_datetime(add_months(month, 1))
+            incidents = cold.filter(date_reported__gte=start, date_reported__lt=end).order_by("date_reported")
+            source = f"{Incident._meta.db_table}_{month:%Y%m}"
+            if self.dry_run:
+                self.stdout.write(f"would archive {incidents.count()} incidents from {month:%Y-%m}")
+                continue
+
+            archived, counts = [], Counter()
+            with transaction.atomic():
+                # Rows are locked as they are read, so an incident cannot be
+                # reopened between being archived and being deleted
+                manifest = write_archive(
+                    "incidents.Incident", source, start, end,
+                    self.incident_rows(incidents.select_for_update(), archived, counts),
+                )
+                if manifest is None:
+                    continue
+                manifest.save()
+                ArchivedIncidentCount.objects.bulk_create(
+                    [
+                        ArchivedIncidentCount(manifest=manifest, month=month, count=count, **dict(zip(COUNTED, key)))
+                        for key, count in counts.items()
+                    ],
+                    batch_size=CHUNK,
+                )
+                # Only what was written: an incident closed meanwhile waits for the next run
+                deleted = 0
+                for ids in chunked(archived, CHUNK):
+                    _, counts = Incident.objects.filter(pk__in=ids, status__in=ARCHIVED_STATUSES).delete()
+                    deleted += counts.get(Incident._meta.label, 0)
+                if deleted != len(archived):
+                    raise CommandError(
+                        f"{source}: archived {len(archived)} incidents but deleted {deleted}; rolled back"
+                    )
+            self.report(source, manifest)
+
+    @staticmethod
+    def incident_rows(incidents, archived, counts):
+        handlers_through = Incident.handlers.through
+        for chunk in chunked(incidents.values().iterator(chunk_size=CHUNK), CHUNK):
+            ids = [row["id"] for row in chunk]
+            related = defaultdict(lambda: {"responses": [], "witnesses": [], "handlers": []})
+            for response in Response.objects.filter(incident_id__in=ids).order_by("timestamp").values():
+                related[response["incident_id"]]["responses"].append(response)
+            for witness in Witness.objects.filter(incident_id__in=ids).values():
+                related[witness["incident_id"]]["witnesses"].append(witness)
+            for incident_id, user_id in handlers_through.objects.filter(incident_id__in=ids).values_list(
+                "incident_id", "customuser_id"
+            ):
+                related[incident_id]["handlers"].append(user_id)
+
+            for row in chunk:
+                row.update(related[row["id"]])
+                archived.append(row["id"])
+                counts[tuple(row[field] for field in COUNTED)] += 1
+                yield row
+
+    def report(self, source, manifest):
+        if manifest is None:
+            self.stdout.write(f"{source}: empty, dropped")
+        else:
+            self.stdout.write(f"{source}: {manifest.row_count} rows, {manifest.size_bytes} bytes -> {manifest.location}")
@@ -0,0 +1,67 @@
+# ngao_core/apps/common/management/commands/bench_api.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ngao_core.benchmark import dataset, load, report as reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the key API endpoints against the bench_seed dataset and report "
+        "p50/p95/p99 latency, throughput and queries per request. In process "
+        "by default, or against a running server with --url. --output appends "
+        "one JSON line per run, for tracking results across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario", choices=sorted(load.SCENARIOS), action="append", help="Repeatable; default: all"
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=16, help="Unmeasured requests per scenario")
+        parser.add_argument("--seed", type=int, default=1, help="Seeds the request sequence")
+        parser.add_argument("--staff", action="store_true", help="Request as the bench admin instead of officers")
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8200")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+        parser.add_argument("--output", help="Append the report as one JSON line to this file")
+
+    def handle(self, *args, **options):
+        if not dataset.exists():
+            raise CommandError("No benchmark dataset; run bench_seed first")
+        ctx = load.context(staff=options["staff"])
+        names = options["scenario"] or list(load.SCENARIOS)
+
+        report = reports.new_report(
+            target=options["url"] or "in-process",
+            concurrency=options["concurrency"],
+            seed=options["seed"],
+            staff=options["staff"],
+            dataset=dataset.summary(),
+            scenarios={},
+        )
+        if not options["json"]:
+            self.stdout.write(
+                f"{'scenario':<18}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'errors':>8}"
+            )
+        for name in names:
+            report["scenarios"][name] = load.run_scenario(
+                name, ctx, options["requests"], options["concurrency"],
+                warmup=options["warmup"], seed=options["seed"], base_url=options["url"],
+            )
+            if not options["json"]:
+                self.write_row(name, report["scenarios"][name])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        if options["output"]:
+            reports.append(options["output"], report)
+
+    def write_row(self, name, result):
+        latency = result["latency_ms"] or {}
+        queries = result["queries"]["mean"] if result["queries"] else "-"
+        self.stdout.write(
+            f"{name:<18}{result['throughput_rps'] or 0:>9.1f}{latency.get('p50', 0):>10.2f}"
+            f"{latency.get('p95', 0):>10.2f}{latency.get('p99', 0):>10.2f}{queries:>9}{result['errors']:>8}"
+        )
@@ -0,0 +1,95 @@
+# ngao_core/apps/common/management/commands/bench_db_connections.py
+import copy
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.utils import load_backend
+
+MODES = ("direct", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test connection handling: every simulated request checks out a "
+        "connection, runs a query and releases it, the way Django does around "
+        "each request. Compares a new connection per request (direct), "
+        "CONN_MAX_AGE persistent connections and the psycopg pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alias", default="default")
+        parser.add_argument("--concurrency", type=int, default=8, help="Threads issuing requests")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per thread")
+        parser.add_argument("--pool-size", type=int, default=settings.DB_POOL_MAX_SIZE)
+        parser.add_argument("--mode", choices=MODES, action="append", help="Repeatable; default: all")
+        parser.add_argument("--query", default="SELECT 1")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['concurrency']} threads x {options['requests']} requests against '{options['alias']}'"
+        )
+        self.stdout.write(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for mode in options["mode"] or MODES:
+            latencies, elapsed = self.run(mode, **options)
+            latencies.sort()
+            self.stdout.write(
+                f"{mode:<12}{len(latencies) / elapsed:>10.0f}"
+                f"{statistics.median(latencies):>10.2f}"
+                f"{self.percentile(latencies, 95):>10.2f}"
+                f"{self.percentile(latencies, 99):>10.2f}"
+            )
+
+    def run(self, mode, alias, concurrency, requests, pool_size, query, **_):
+        settings_dict = copy.deepcopy(connections.settings[alias])
+        options = settings_dict["OPTIONS"]
+        options.pop("pool", None)
+        settings_dict["CONN_MAX_AGE"] = 0
+        if mode == "persistent":
+            settings_dict["CONN_MAX_AGE"] = None
+        elif mode == "pool":
+            options["pool"] = {"min_size": pool_size, "max_size": pool_size}
+
+        backend = load_backend(settings_dict["ENGINE"])
+        bench_alias = f"bench-{mode}"
+        latencies, lock = [], threading.Lock()
+
+        def worker():
+            connection = backend.DatabaseWrapper(settings_dict, bench_alias)
+            mine = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(query)
+                    cursor.fetchall()
+                # What request_finished does: close, or keep if CONN_MAX_AGE allows
+                connection.close_if_unusable_or_obsolete()
+                mine.append((time.perf_counter() - start) * 1000)
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+
+        if mode == "pool":
+            # Open the pool before timing, as a warm worker would have it
+            warm = backend.DatabaseWrapper(settings_dict, bench_alias)
+            warm.pool.open()
+            warm.pool.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if mode == "pool":
+            warm.close_pool()
+        return latencies, elapsed
+
+    @staticmethod
+    def percentile(values, pct):
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
@@ -0,0 +1,83 @@
+# ngao_core/apps/common/management/commands/bench_sms.py
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from ngao_core.apps.communications.models import SMSMessage, SMSRecipient
+from ngao_core.apps.communications.sms import dispatch, get_gateway, queue_sms
+from ngao_core.benchmark import report as reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue SMS to generated numbers on the fake provider (FAKE_SMS_* "
+        "settings) and time how fast the dispatcher drains them, as the "
+        "send_sms worker would. The bench messages are deleted afterwards "
+        "unless --keep; --output appends one JSON line per run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=20000, help="Recipients to queue in total")
+        parser.add_argument("--per-message", type=int, default=1000, help="Recipients per message")
+        parser.add_argument("--keep", action="store_true", help="Keep the bench messages")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+        parser.add_argument("--output", help="Append the report as one JSON line to this file")
+
+    def handle(self, *args, **options):
+        gateway = get_gateway("fake")
+        total, per_message = options["recipients"], options["per_message"]
+
+        start = time.perf_counter()
+        messages = [
+            queue_sms(
+                f"NGAO bench message {n}",
+                [f"+2547{i:08d}" for i in range(n * per_message, min(total, (n + 1) * per_message))],
+                provider="fake",
+            ).id
+            for n in range(-(-total // per_message))
+        ]
+        queue_seconds = time.perf_counter() - start
+
+        counts, rounds, calls = {"sent": 0, "retry": 0, "failed": 0}, 0, len(gateway.provider.sent)
+        start = time.perf_counter()
+        while True:
+            result = dispatch()
+            if not any(result.values()):
+                break
+            rounds += 1
+            for status, count in result.items():
+                counts[status] += count
+        send_seconds = time.perf_counter() - start
+        pending = SMSRecipient.objects.filter(sms_id__in=messages, status="queued").count()
+
+        report = reports.new_report(
+            recipients=total,
+            per_message=per_message,
+            rate_limit=gateway.bucket.rate,
+            batch_size=gateway.batch_size,
+            provider_latency=gateway.provider.latency,
+            queue_per_second=round(total / queue_seconds, 2) if queue_seconds else None,
+            send_per_second=round(counts["sent"] / send_seconds, 2) if send_seconds else None,
+            send_seconds=round(send_seconds, 2),
+            rounds=rounds,
+            provider_calls=len(gateway.provider.sent) - calls,
+            pending_retries=pending,
+            **counts,
+        )
+        if not options["keep"]:
+            SMSMessage.objects.filter(id__in=messages).delete()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"queued {total} recipients at {report['queue_per_second']}/s; sent {counts['sent']} at "
+                f"{report['send_per_second']}/s in {report['provider_calls']} provider calls "
+                f"(limit {gateway.bucket.rate:g}/s, batches of {gateway.batch_size})"
+            )
+            if counts["failed"] or pending:
+                self.stdout.write(self.style.WARNING(f"failed {counts['failed']}, awaiting retry {pending}"))
+
+        if options["output"]:
+            reports.append(options["output"], report)
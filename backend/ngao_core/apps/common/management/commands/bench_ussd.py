@@ -0,0 +1,70 @@
+# ngao_core/apps/common/management/commands/bench_ussd.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from ngao_core.benchmark import report as reports, ussd
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent USSD sessions against a running instance: each "
+        "session walks the incident reporting menu hop by hop, with think time "
+        "between hops, as the telco aggregator would drive it. Reports hop and "
+        "session latency percentiles and error rates; --output appends one "
+        "JSON line per run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8200", help="Base URL of the instance")
+        parser.add_argument("--path", default="/api/communications/ussd/")
+        parser.add_argument("--sessions", type=int, default=2000, help="Sessions to run in total")
+        parser.add_argument("--concurrency", type=int, default=1000, help="Sessions open at once")
+        parser.add_argument("--think-ms", type=float, default=2000, help="Mean pause between hops; 0 for none")
+        parser.add_argument("--workers", type=int, default=64, help="HTTP connections")
+        parser.add_argument("--timeout", type=float, default=10, help="Seconds per hop")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+        parser.add_argument("--output", help="Append the report as one JSON line to this file")
+
+    def handle(self, *args, **options):
+        url = options["url"].rstrip("/") + options["path"]
+        self.stdout.write(
+            f"{options['sessions']} sessions, {options['concurrency']} at once, "
+            f"{options['think_ms']:.0f} ms think time -> {url}"
+        )
+        result = ussd.run(
+            url,
+            sessions=options["sessions"],
+            concurrency=options["concurrency"],
+            think_ms=options["think_ms"],
+            workers=options["workers"],
+            timeout=options["timeout"],
+            seed=options["seed"],
+        )
+        report = reports.new_report(
+            target=url,
+            concurrency=options["concurrency"],
+            think_ms=options["think_ms"],
+            seed=options["seed"],
+            **result,
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"completed {result['completed']}/{result['sessions']} "
+                f"(error rate {result['error_rate']:.2%}), {result['hops_per_second']} hops/s"
+            )
+            for name in ("hop_latency_ms", "session_service_ms", "session_wall_ms"):
+                latency = result[name]
+                if latency:
+                    self.stdout.write(
+                        f"{name:<20} p50 {latency['p50']:>9.1f}  p95 {latency['p95']:>9.1f}  p99 {latency['p99']:>9.1f}"
+                    )
+            for error, count in sorted(result["errors"].items()):
+                self.stdout.write(self.style.WARNING(f"{error}: {count}"))
+
+        if options["output"]:
+            reports.append(options["output"], report)
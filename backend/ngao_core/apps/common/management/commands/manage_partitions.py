@@ -0,0 +1,54 @@
+# ngao_core/apps/common/management/commands/manage_partitions.py
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ngao_core.apps.common.partitions import (
+    PARTITIONED_MODELS,
+    add_months,
+    detach_partitions,
+    ensure_partitions,
+    list_partitions,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly partitions of the partitioned log tables ahead of "
+        "time and detach those past retention (detached partitions are left as "
+        "plain tables for archiving)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD, help="Months to create ahead")
+        parser.add_argument(
+            "--retain", type=int, default=settings.PARTITION_RETENTION_MONTHS, help="Months to keep attached; 0 keeps all"
+        )
+        parser.add_argument("--model", action="append", choices=sorted(PARTITIONED_MODELS), help="Repeatable; default: all")
+        parser.add_argument("--dry-run", action="store_true", help="Only list existing partitions")
+
+    def handle(self, *args, **options):
+        this_month = month_start(timezone.now())
+        for label in options["model"] or PARTITIONED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            column = PARTITIONED_MODELS[label]
+
+            if options["dry_run"]:
+                with connection.cursor() as cursor:
+                    months = sorted(list_partitions(cursor, table).values())
+                span = f"{months[0]:%Y-%m} .. {months[-1]:%Y-%m}" if months else "none"
+                self.stdout.write(f"{table}: {len(months)} partitions ({span})")
+                continue
+
+            # One table at a time: ATTACH and DETACH lock the parent table
+            with transaction.atomic(), connection.cursor() as cursor:
+                created = ensure_partitions(cursor, table, column, this_month, add_months(this_month, options["ahead"]))
+                detached = []
+                if options["retain"]:
+                    detached = detach_partitions(cursor, table, add_months(this_month, -options["retain"]))
+            self.stdout.write(f"{table}: created {len(created)}, detached {len(detached)}")
+            for name in detached:
+                self.stdout.write(f"  detached {name}")
@@ -0,0 +1,131 @@
+# ngao_core/apps/common/metrics.py
+"""
+Prometheus metrics.
+
+Every gunicorn worker is a separate process, so with PROMETHEUS_MULTIPROC_DIR
+set (gunicorn.conf.py does it) each process writes its samples to files in
+that directory and /metrics aggregates them across workers at scrape time.
+Without it, as under runserver, the default in-process registry is used.
+
+Queue depths are read from the database at scrape time; register a queue
+with `register_queue(name, count)`, where `count()` returns its backlog.
+"""
+import hmac
+import os
+import time
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# ---------- Metrics ----------
+REQUESTS = Counter("ngao_http_requests_total", "HTTP requests", ["view", "method", "status"])
+LATENCY = Histogram(
+    "ngao_http_request_duration_seconds",
+    "HTTP request latency",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+IN_FLIGHT = Gauge("ngao_http_requests_in_flight", "Requests being served", multiprocess_mode="livesum")
+DB_QUERIES = Counter("ngao_db_queries_total", "SQL queries run by requests", ["view"])
+DB_SECONDS = Counter("ngao_db_query_seconds_total", "Time requests spent in SQL", ["view"])
+CACHE_REQUESTS = Counter("ngao_cache_requests_total", "Cache-aside lookups", ["tier", "result"])
+# Only importers that run inside the web workers (the intake API); a management
+# command's process is never scraped
+IMPORTED_ROWS = Counter("ngao_import_rows_total", "Rows processed by importers", ["importer", "result"])
+SMS_RECIPIENTS = Counter("ngao_sms_recipients_total", "SMS recipients handled by the dispatcher", ["provider", "result"])
+
+
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """Outermost middleware: times the whole request, including other middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            view = _view_label(request)
+            status = str(response.status_code) if response is not None else "500"
+            REQUESTS.labels(view, request.method, status).inc()
+            LATENCY.labels(view, request.method).observe(elapsed)
+            # Set by QueryCountMiddleware further in
+            stats = getattr(response, "query_stats", None)
+            if stats:
+                DB_QUERIES.labels(view).inc(stats["queries"])
+                DB_SECONDS.labels(view).inc(stats["db_ms"] / 1000)
+
+
+# ---------- Queues ----------
+_queues = {}
+
+
+def register_queue(name, count):
+    _queues[name] = count
+
+
+class QueueCollector:
+    def collect(self):
+        family = GaugeMetricFamily("ngao_queue_depth", "Items waiting in a work queue", labels=["queue"])
+        for name, count in _queues.items():
+            try:
+                family.add_metric([name], count())
+            except Exception:  # a failing queue must not break the scrape
+                continue
+        yield family
+
+
+def register_default_queues():
+    from ngao_core.apps.civil_registration.models import CertificateBatch
+    from ngao_core.apps.communications.models import SMSRecipient
+
+    register_queue("certificate_batches", CertificateBatch.objects.filter(status="queued").count)
+    register_queue("sms", SMSRecipient.objects.filter(status="queued").count)
+
+
+# ---------- Exposition ----------
+def render():
+    """(body, content type) for a scrape."""
+    registry = CollectorRegistry()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(_DefaultRegistry())
+    registry.register(QueueCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class _DefaultRegistry:
+    def collect(self):
+        return REGISTRY.collect()
+
+
+def authorized(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Only a development server exposes metrics without a token
+        return settings.DEBUG
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=60)),
+                ('source', models.CharField(max_length=100)),
+                ('range_start', models.DateTimeField()),
+                ('range_end', models.DateTimeField()),
+                ('location', models.CharField(max_length=500)),
+                ('codec', models.CharField(max_length=10)),
+                ('row_count', models.PositiveIntegerField()),
+                ('size_bytes', models.BigIntegerField()),
+                ('checksum', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['model', 'range_start'],
+                'indexes': [models.Index(fields=['model', 'range_start', 'range_end'], name='common_arch_model_887514_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
 # ngao_core/apps/common/mixins.py
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import connection, models
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 
 
@@ -29,3 +32,80 @@ class AuditModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class TreePathModel(models.Model):
+    """
+    Self-referencing tree with a materialized path.
+
+    `path` holds the id of every ancestor followed by the row's own id
+    ("<root>/<child>/.../<self>/"), so a whole subtree is a single prefix
+    match on an indexed column. Subclasses declare the `parent` foreign key.
+    """
+
+    path = models.CharField(max_length=512, default="", editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def path_segment(self):
+        return str(self.pk).replace("-", "") + "/"
+
+    def is_within(self, ancestor):
+        """True when this node is `ancestor` or one of its descendants."""
+        return bool(ancestor and ancestor.path and self.path.startswith(ancestor.path))
+
+    def save(self, *args, **kwargs):
+        manager = type(self)._default_manager
+        stored = dict(
+            manager.filter(pk__in=[pk for pk in (self.pk, self.parent_id) if pk])
+            .values_list("pk", "path")
+        )
+        old_path = "" if self._state.adding else stored.get(self.pk, "")
+        parent_path = stored.get(self.parent_id, "") if self.parent_id else ""
+        if old_path and parent_path.startswith(old_path):
+            raise ValidationError("A node cannot be moved under its own descendant.")
+
+        self.path = parent_path + self.path_segment
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "path"}
+        super().save(*args, **kwargs)
+
+        if old_path and old_path != self.path:
+            # Re-root the moved subtree in one statement
+            manager.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr("path", len(old_path) + 1), output_field=models.CharField())
+            )
+
+    def delete(self, *args, **kwargs):
+        orphaned = bool(self.path) and (
+            type(self)._default_manager.filter(path__startswith=self.path).exclude(pk=self.pk).exists()
+        )
+        result = super().delete(*args, **kwargs)
+        if orphaned:
+            # on_delete=SET_NULL turned the children into roots
+            type(self).rebuild_paths()
+        return result
+
+    @classmethod
+    def rebuild_paths(cls):
+        """Recompute every path from the parent pointers; returns the number of rows changed."""
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_PATHS_SQL.format(table=table))
+            return cursor.rowcount
+
+
+REBUILD_PATHS_SQL = """
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT id, replace(id::text, '-', '') || '/' FROM {table} WHERE parent_id IS NULL
+        UNION ALL
+        SELECT child.id, tree.path || replace(child.id::text, '-', '') || '/'
+        FROM {table} child JOIN tree ON child.parent_id = tree.id
+    )
+    UPDATE {table} SET path = tree.path
+    FROM tree
+    WHERE {table}.id = tree.id AND {table}.path IS DISTINCT FROM tree.path
+"""
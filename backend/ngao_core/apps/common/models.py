@@ -0,0 +1,55 @@
+# ngao_core/apps/common/models.py
+from django.conf import settings
+from django.db import models
+
+
+class ArchiveManifest(models.Model):
+    """
+    One archived file: the rows of `model` whose timestamp falls in
+    [range_start, range_end), taken from `source` (a table or detached
+    partition) and stored at `location` in ARCHIVE_STORAGE.
+    """
+    model = models.CharField(max_length=60)
+    source = models.CharField(max_length=100)
+    range_start = models.DateTimeField()
+    range_end = models.DateTimeField()
+    location = models.CharField(max_length=500)
+    codec = models.CharField(max_length=10)
+    row_count = models.PositiveIntegerField()
+    size_bytes = models.BigIntegerField()
+    checksum = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["model", "range_start"]
+        indexes = [
+            models.Index(fields=["model", "range_start", "range_end"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.range_start:%Y-%m-%d}..{self.range_end:%Y-%m-%d} ({self.row_count} rows)"
+
+
+class RequestProfile(models.Model):
+    """
+    Stack samples of one slow or randomly picked request, in collapsed
+    format (see common.profiling).
+    """
+    view = models.CharField(max_length=200, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    reason = models.CharField(max_length=10, choices=[("slow", "Slow"), ("sampled", "Sampled")])
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    role = models.CharField(max_length=255, blank=True)
+    queries = models.JSONField(default=dict, blank=True)
+    sample_count = models.PositiveIntegerField()
+    stacks = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.view} {self.duration_ms:.0f}ms"
@@ -0,0 +1,250 @@
+# ngao_core/apps/common/partitions.py
+"""
+Monthly range partitioning for append-only log tables.
+
+`ConvertToPartitioned` is a migration operation that rebuilds a table as a
+Postgres table partitioned by month on a timestamp column, copying the
+existing rows. The primary key becomes (id, <column>), as Postgres
+requires for a partitioned table; the model keeps `id` as its primary key,
+so the ORM is unchanged. Tables that other tables reference by foreign key
+cannot be converted.
+
+Each table gets a partition per month, named <table>_pYYYYMM, plus a
+<table>_default partition that catches rows outside them. The
+`manage_partitions` command keeps PARTITION_MONTHS_AHEAD months created
+ahead and detaches partitions older than PARTITION_RETENTION_MONTHS.
+Queries that filter the timestamp column on a range only scan the
+matching partitions.
+"""
+import datetime
+
+from django.db.migrations.operations.base import Operation
+
+# label -> partition column
+PARTITIONED_MODELS = {
+    "incidents.Response": "timestamp",
+    "citizen_repo.CitizenQueryLog": "timestamp",
+    "communications.SMSLog": "created_at",
+    "communications.USSDLog": "created_at",
+}
+
+
+# ---------- Months ----------
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first, last):
+    """Every month from `first` to `last`, both included."""
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table, name):
+    """The month a <table>_pYYYYMM partition holds, or None for other names."""
+    suffix = name[len(table) + 2:]
+    if name.startswith(f"{table}_p") and len(suffix) == 6 and suffix.isdigit():
+        return datetime.date(int(suffix[:4]), int(suffix[4:]), 1)
+    return None
+
+
+# ---------- Partitions ----------
+def list_partitions(cursor, table):
+    """{name: month} for the monthly partitions of `table` (the default partition is left out)."""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        """,
+        [table],
+    )
+    months = {name: partition_month(table, name) for (name,) in cursor.fetchall()}
+    return {name: month for name, month in months.items() if month}
+
+
+def list_detached(cursor, table):
+    """{name: month} for monthly partitions of `table` that were detached and not yet dropped."""
+    cursor.execute(
+        """
+        SELECT relname FROM pg_class
+        WHERE relkind = 'r' AND relname ~ %s
+          AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = pg_class.oid)
+        """,
+        [f"^{table}_p[0-9]{{6}}$"],
+    )
+    return {name: partition_month(table, name) for (name,) in cursor.fetchall()}
+
+
+def create_partition(cursor, table, column, month):
+    """
+    Create the partition for `month`. Rows already in the default partition
+    for that month are moved into it, since Postgres refuses to create a
+    partition whose rows sit in the default one.
+    """
+    quote = cursor.db.ops.quote_name
+    name = partition_name(table, month)
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    default = f"{table}_default"
+
+    cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS)")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {quote(default)}
+            WHERE {quote(column)} >= %s AND {quote(column)} < %s
+            RETURNING *
+        )
+        INSERT INTO {quote(name)} SELECT * FROM moved
+        """,
+        bounds,
+    )
+    cursor.execute(
+        f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+        bounds,
+    )
+    return name
+
+
+def ensure_partitions(cursor, table, column, first, last):
+    """Create the missing partitions from `first` to `last`; returns their names."""
+    existing = set(list_partitions(cursor, table).values())
+    return [
+        create_partition(cursor, table, column, month)
+        for month in month_range(first, last)
+        if month not in existing
+    ]
+
+
+def detach_partitions(cursor, table, before):
+    """Detach the partitions for months before `before`; they stay as plain tables."""
+    quote = cursor.db.ops.quote_name
+    detached = []
+    for name, month in sorted(list_partitions(cursor, table).items()):
+        if month < before:
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+            detached.append(name)
+    return detached
+
+
+# ---------- Migration operation ----------
+class ConvertToPartitioned(Operation):
+    """
+    Rebuild a model's table as a monthly range-partitioned table on `column`.
+
+    Rows are copied inside the migration's transaction, with the table
+    locked, so run it in a maintenance window on large tables. Only the
+    database changes; the model state is untouched.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, column, months_ahead=3):
+        self.model_name = model_name
+        self.column = column
+        self.months_ahead = months_ahead
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = model._meta.db_table
+        quote = schema_editor.quote_name
+
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN({quote(self.column)})::date FROM {quote(table)}")
+            oldest = cursor.fetchone()[0]
+
+        today = datetime.date.today()
+
+        def create_partitions():
+            # Before the copy, so rows go straight to their month
+            schema_editor.execute(
+                f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT"
+            )
+            with schema_editor.connection.cursor() as cursor:
+                ensure_partitions(
+                    cursor, table, self.column, oldest or today, add_months(month_start(today), self.months_ahead)
+                )
+
+        self._rebuild(
+            schema_editor,
+            model,
+            f"CREATE TABLE {quote(table)} (LIKE {quote(table + '_old')} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({quote(self.column)})",
+            primary_key=(model._meta.pk.column, self.column),
+            before_copy=create_partitions,
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = model._meta.db_table
+        quote = schema_editor.quote_name
+        self._rebuild(
+            schema_editor,
+            model,
+            f"CREATE TABLE {quote(table)} (LIKE {quote(table + '_old')} INCLUDING DEFAULTS)",
+            primary_key=(model._meta.pk.column,),
+        )
+
+    def _rebuild(self, schema_editor, model, create_sql, primary_key, before_copy=None):
+        """Recreate the table with `create_sql`, copy its rows over and restore keys and indexes."""
+        table = model._meta.db_table
+        quote = schema_editor.quote_name
+        old = table + "_old"
+
+        schema_editor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+        schema_editor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+        schema_editor.execute(create_sql)
+        if before_copy:
+            before_copy()
+        schema_editor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)}")
+        # Partitions of the old table go with it; constraint and index
+        # names are free again once it is gone
+        schema_editor.execute(f"DROP TABLE {quote(old)}")
+
+        schema_editor.execute(
+            f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} "
+            f"PRIMARY KEY ({', '.join(map(quote, primary_key))})"
+        )
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                schema_editor.execute(schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+            if field.db_index and not field.primary_key:
+                schema_editor.execute(schema_editor._create_index_sql(model, fields=[field]))
+        for index in model._meta.indexes:
+            schema_editor.add_index(model, index)
+        schema_editor.execute(
+            f"CREATE INDEX {quote(table + '_' + self.column + '_idx')} ON {quote(table)} ({quote(self.column)})"
+        )
+
+    def describe(self):
+        return f"Partition {self.model_name} by month on {self.column}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"partition_{self.model_name.lower()}"
+
+    def deconstruct(self):
+        kwargs = {"model_name": self.model_name, "column": self.column}
+        if self.months_ahead != 3:
+            kwargs["months_ahead"] = self.months_ahead
+        return self.__class__.__qualname__, [], kwargs
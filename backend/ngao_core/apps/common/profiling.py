@@ -0,0 +1,148 @@
+# ngao_core/apps/common/profiling.py
+"""
+Sampling profiler for slow requests.
+
+With PROFILE_REQUESTS on, one daemon thread per process wakes every
+PROFILE_INTERVAL_MS while requests are in flight and records the Python
+stack of each request's thread (sys._current_frames). When a request
+finishes, its samples are kept as a RequestProfile if it took longer than
+its threshold (PROFILE_SLOW_MS, or `profile_slow_ms` on the view, read
+like db_route) or was picked by PROFILE_SAMPLE_RATE; otherwise they are
+thrown away. The sampler sleeps while no request is in flight, and with
+PROFILE_REQUESTS off the middleware does nothing at all.
+
+Stacks are stored in the collapsed format ("root;...;leaf count" per
+line) that flamegraph.pl, speedscope and inferno read directly.
+"""
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from ngao_core.api.handlers import view_option
+
+logger = logging.getLogger(__name__)
+
+
+class _Active:
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        self.samples = Counter()
+
+
+class Sampler:
+    def __init__(self):
+        self.active = {}  # thread id -> _Active
+        self.lock = threading.Lock()
+        self.busy = threading.Event()
+        self.thread = None
+
+    def start(self, thread_id):
+        active = _Active()
+        with self.lock:
+            self.active[thread_id] = active
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="request-sampler", daemon=True)
+                self.thread.start()
+            self.busy.set()
+        return active
+
+    def stop(self, thread_id):
+        with self.lock:
+            active = self.active.pop(thread_id, None)
+            if not self.active:
+                self.busy.clear()
+        return active
+
+    def run(self):
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+        while True:
+            self.busy.wait()
+            time.sleep(interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, active in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        active.samples[collapse(frame)] += 1
+
+
+def collapse(frame):
+    """The stack below the profiling middleware, root first, as "module:function;..."."""
+    names = []
+    while frame is not None and frame.f_code is not _ENTRY:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+sampler = Sampler()
+
+
+class ProfilingMiddleware:
+    """Goes outside QueryCountMiddleware, so the query summary is on the response."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILE_REQUESTS:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        request._profile_slow_ms = settings.PROFILE_SLOW_MS
+        sampler.start(thread_id)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            active = sampler.stop(thread_id)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if duration_ms >= request._profile_slow_ms:
+            reason = "slow"
+        elif random.random() < settings.PROFILE_SAMPLE_RATE:
+            reason = "sampled"
+        else:
+            return response
+        if active.samples:
+            try:
+                save_profile(request, response, duration_ms, reason, active.samples)
+            except Exception:  # profiling must never fail the request
+                logger.exception("Could not store request profile")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, "_profile_slow_ms"):
+            request._profile_slow_ms = view_option(request, view_func, "profile_slow_ms", request._profile_slow_ms)
+
+
+_ENTRY = ProfilingMiddleware.__call__.__code__
+
+
+def save_profile(request, response, duration_ms, reason, samples):
+    from .models import RequestProfile
+
+    match = getattr(request, "resolver_match", None)
+    user = getattr(request, "user", None)
+    if user is not None and not user.is_authenticated:
+        user = None
+    return RequestProfile.objects.create(
+        view=(match.view_name or match.route) if match else "",
+        method=request.method,
+        path=request.path[:500],
+        status_code=response.status_code,
+        duration_ms=round(duration_ms, 2),
+        reason=reason,
+        user=user,
+        role=str(user.role or "") if user is not None else "",
+        queries=getattr(response, "query_stats", None) or {},
+        sample_count=sum(samples.values()),
+        stacks="\n".join(f"{stack} {count}" for stack, count in samples.most_common()),
+    )
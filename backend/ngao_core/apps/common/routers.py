@@ -0,0 +1,223 @@
+# ngao_core/apps/common/routers.py
+"""
+Read-replica routing.
+
+Replicas are the DATABASES aliases named "replica_*" (see
+DATABASE_REPLICA_URLS). Writes always go to "default". Reads go to a
+replica only while the current request (or a `read_from(REPLICA)` block)
+is routed there:
+
+- ReplicaRoutingMiddleware routes GET/HEAD/OPTIONS requests to the
+  replicas and everything else to the primary. Views override that with
+  `db_route = PRIMARY | REPLICA` on the class, or with the `use_primary` /
+  `use_replica` decorators on a handler, viewset action or (outermost)
+  function view.
+- Read-your-writes: after a request that wrote succeeds, that user's
+  reads stay on the primary for REPLICA_STICKY_SECONDS, across workers;
+  within a request, reads after a write or inside a transaction do too.
+  Writes the user never reads back (audit logs) can opt out with
+  `without_stickiness()`.
+- A replica whose replay lag exceeds REPLICA_MAX_LAG, or that cannot be
+  reached, is skipped until its next check; with none left, reads fall
+  back to the primary.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from ngao_core.api.handlers import view_option
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Auth state must never be read stale: a revoked token or ended session
+# has to take effect on the next request
+PRIMARY_APPS = {"sessions", "token_blacklist"}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class _Route:
+    __slots__ = ("target", "request", "sticky", "resolving", "wrote", "quiet")
+
+    def __init__(self, target, request=None):
+        self.target = target
+        self.request = request
+        self.sticky = False
+        self.resolving = False
+        self.wrote = False
+        self.quiet = False
+
+
+_route = contextvars.ContextVar("db_route", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+# ---------- Replica health ----------
+_health = {}  # alias -> (checked_at, healthy)
+_health_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary (0 when caught up)."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < settings.REPLICA_CHECK_INTERVAL:
+        return healthy
+
+    with _health_lock:
+        try:
+            lag = replica_lag(alias)
+            healthy = lag <= settings.REPLICA_MAX_LAG
+            if not healthy:
+                logger.warning("Replica %s is %.1fs behind; reading from the primary", alias, lag)
+        except DatabaseError:
+            logger.warning("Replica %s is unreachable; reading from the primary", alias, exc_info=True)
+            connections[alias].close()
+            healthy = False
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+def _pick_replica():
+    healthy = [alias for alias in replica_aliases() if is_healthy(alias)]
+    return random.choice(healthy) if healthy else "default"
+
+
+# ---------- Stickiness ----------
+def _sticky_key(user_pk):
+    return f"db:sticky:{user_pk}"
+
+
+def mark_recent_write(user):
+    if user is not None and user.is_authenticated:
+        cache.set(_sticky_key(user.pk), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def _is_sticky(route):
+    if route.sticky:
+        return True
+    if route.request is None or route.resolving:
+        return False
+    # Resolving a lazy request.user reads the database itself
+    route.resolving = True
+    try:
+        user = getattr(route.request, "user", None)
+    finally:
+        route.resolving = False
+    if user is None or not user.is_authenticated:
+        # DRF may still authenticate the request; decide on a later read
+        return False
+    route.sticky = bool(cache.get(_sticky_key(user.pk)))
+    route.request = None
+    return route.sticky
+
+
+# ---------- Router ----------
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if route is None or route.target != REPLICA or not replica_aliases():
+            return "default"
+        if model._meta.app_label in PRIMARY_APPS:
+            return "default"
+        if connections["default"].in_atomic_block or _is_sticky(route):
+            return "default"
+        return _pick_replica()
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None and not route.quiet:
+            route.wrote = route.sticky = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+@contextmanager
+def read_from(target):
+    """Route reads in this block (e.g. a report or export outside a request)."""
+    token = _route.set(_Route(target))
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def without_stickiness():
+    """Writes in this block do not move the request's or the user's reads to the primary."""
+    route = _route.get()
+    if route is None:
+        yield
+        return
+    quiet, route.quiet = route.quiet, True
+    try:
+        yield
+    finally:
+        route.quiet = quiet
+
+
+# ---------- Per-view overrides ----------
+def use_primary(view):
+    view.db_route = PRIMARY
+    return view
+
+
+def use_replica(view):
+    view.db_route = REPLICA
+    return view
+
+
+def _view_route(request, view_func):
+    default = REPLICA if request.method in SAFE_METHODS else PRIMARY
+    return view_option(request, view_func, "db_route", default)
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = _Route(PRIMARY, request)
+        token = _route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+
+        if route.wrote and response.status_code < 400:
+            # request.user is set by DRF authentication by now
+            mark_recent_write(getattr(request, "user", None))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = _route.get()
+        if route is not None:
+            route.target = _view_route(request, view_func)
@@ -0,0 +1,404 @@
+import datetime
+import shutil
+import tempfile
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from rest_framework.test import APIClient
+
+from ngao_core.api.queries import QueryBudgetExceeded, QueryBudgetTestMixin, fingerprint, query_budget
+from ngao_core.apps.accounts.models import OfficerProfile, Role
+from ngao_core.apps.admin_structure.models import AdminUnit
+from ngao_core.apps.citizen_repo.models import CitizenQueryLog
+from ngao_core.apps.communications.models import Announcement
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.incidents.models import Incident
+from ngao_core.benchmark import dataset, load
+
+from . import archive, metrics, routers
+from .cache import cached, cached_queryset, invalidate_tags
+from .partitions import add_months, ensure_partitions, month_range
+from .routers import PRIMARY, REPLICA, mark_recent_write, read_from, replica_aliases, without_stickiness
+from .models import RequestProfile
+from .views import RequestProfileFlamegraphView, metrics_view
+
+User = get_user_model()
+
+
+class CacheTest(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_cache_aside_and_tag_invalidation(self):
+        self.assertEqual(cached("k", self.compute, tags=("areas",)), 1)
+        self.assertEqual(cached("k", self.compute, tags=("areas",)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_tags("areas")
+        self.assertEqual(cached("k", self.compute, tags=("areas",)), 2)
+        # Other tags are untouched
+        self.assertEqual(cached("other", self.compute, tags=("units",)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_tags("areas")
+        self.assertEqual(cached("other", self.compute, tags=("units",)), 3)
+
+    def test_cached_queryset_keys_on_arguments(self):
+        @cached_queryset()
+        def numbers(limit):
+            self.calls += 1
+            return range(limit)
+
+        self.assertEqual(numbers(2), [0, 1])
+        self.assertEqual(numbers(2), [0, 1])
+        self.assertEqual(numbers(3), [0, 1, 2])
+        self.assertEqual(self.calls, 2)
+
+
+@skipUnless(replica_aliases(), "set DATABASE_REPLICA_URLS (docker compose --profile replica up)")
+class ReplicaRouterTest(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        routers._health.clear()
+        caches["default"].clear()
+        self.user = User.objects.create_user(email="reader@example.com", password="pw")
+        self.replica = replica_aliases()[0]
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        with read_from(REPLICA):
+            self.assertIn(User.objects.all().db, replica_aliases())
+        with read_from(PRIMARY):
+            self.assertEqual(User.objects.all().db, "default")
+        self.assertEqual(User.objects.all().db, "default")
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        with read_from(REPLICA):
+            self.user.save()
+            self.assertEqual(User.objects.all().db, "default")
+        with read_from(REPLICA), transaction.atomic():
+            self.assertEqual(User.objects.all().db, "default")
+
+    def test_writes_without_stickiness_leave_reads_on_replica(self):
+        with read_from(REPLICA):
+            with without_stickiness():
+                self.user.save()
+            self.assertIn(User.objects.all().db, replica_aliases())
+
+    def test_recent_writer_is_sticky_across_requests(self):
+        mark_recent_write(self.user)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        route = routers._Route(REPLICA, request)
+        token = routers._route.set(route)
+        try:
+            self.assertEqual(User.objects.all().db, "default")
+        finally:
+            routers._route.reset(token)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with patch.object(routers, "replica_lag", return_value=settings.REPLICA_MAX_LAG + 1):
+            with read_from(REPLICA):
+                self.assertEqual(User.objects.all().db, "default")
+
+    def test_replica_sees_committed_writes(self):
+        deadline = time.monotonic() + settings.REPLICA_MAX_LAG
+        while not User.objects.using(self.replica).filter(pk=self.user.pk).exists():
+            self.assertLess(time.monotonic(), deadline, "replica did not catch up")
+            time.sleep(0.1)
+        self.assertLessEqual(routers.replica_lag(self.replica), settings.REPLICA_MAX_LAG)
+
+
+class PartitionTest(TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(datetime.date(2026, 11, 1), 3), datetime.date(2027, 2, 1))
+        self.assertEqual(add_months(datetime.date(2026, 1, 1), -1), datetime.date(2025, 12, 1))
+        self.assertEqual(
+            list(month_range(datetime.date(2026, 11, 20), datetime.date(2027, 1, 1))),
+            [datetime.date(2026, 11, 1), datetime.date(2026, 12, 1), datetime.date(2027, 1, 1)],
+        )
+
+    def test_range_queries_prune_to_their_partition(self):
+        table = CitizenQueryLog._meta.db_table
+        # An old month lands in the default partition until its partition exists
+        log = CitizenQueryLog.objects.create(module="general")
+        CitizenQueryLog.objects.filter(pk=log.pk).update(timestamp=datetime.datetime(2020, 1, 15, tzinfo=datetime.timezone.utc))
+        with connection.cursor() as cursor:
+            created = ensure_partitions(cursor, table, "timestamp", datetime.date(2020, 1, 1), datetime.date(2020, 2, 1))
+        self.assertEqual(created, [f"{table}_p202001", f"{table}_p202002"])
+
+        january = CitizenQueryLog.objects.filter(
+            timestamp__gte=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+            timestamp__lt=datetime.datetime(2020, 2, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(list(january.values_list("pk", flat=True)), [log.pk])
+        plan = january.explain()
+        self.assertIn(f"{table}_p202001", plan)
+        self.assertNotIn(f"{table}_p202002", plan)
+        self.assertNotIn(f"{table}_default", plan)
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage)
+        archive._storage = None
+        self.addCleanup(setattr, archive, "_storage", None)
+
+    def test_archived_ranges_read_back(self):
+        utc = datetime.timezone.utc
+        rows = [
+            {"id": n, "created_at": datetime.datetime(2024, 1, 1 + n, tzinfo=utc), "message": f"sms {n}"}
+            for n in range(10)
+        ]
+        config = {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": self.storage}}
+        with override_settings(ARCHIVE_STORAGE=config):
+            manifest = archive.write_archive(
+                "communications.SMSLog",
+                "communications_smslog_p202401",
+                datetime.datetime(2024, 1, 1, tzinfo=utc),
+                datetime.datetime(2024, 2, 1, tzinfo=utc),
+                iter(rows),
+            )
+            manifest.save()
+            self.assertEqual(manifest.row_count, 10)
+
+            got = list(
+                archive.read_archived(
+                    "communications.SMSLog",
+                    datetime.datetime(2024, 1, 3, tzinfo=utc),
+                    datetime.datetime(2024, 1, 5, tzinfo=utc),
+                )
+            )
+        self.assertEqual([row["id"] for row in got], [2, 3])
+        self.assertEqual(got[0]["created_at"], datetime.datetime(2024, 1, 3, tzinfo=utc))
+
+
+@query_budget(2)
+def repeated_lookups(request):
+    for _ in range(3):
+        User.objects.filter(pk=0).exists()
+    return HttpResponse("ok")
+
+
+@query_budget(5)
+def within_budget(request):
+    User.objects.filter(pk=0).exists()
+    return HttpResponse("ok")
+
+
+def slow_view(request):
+    time.sleep(0.05)
+    return HttpResponse("ok")
+
+
+urlpatterns = [
+    path("slow/", slow_view),
+    path("profiles/<int:pk>/flamegraph/", RequestProfileFlamegraphView.as_view()),
+    path("repeated/", repeated_lookups),
+    path("within/", within_budget),
+    path("metrics", metrics_view),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def test_view_over_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            self.client.get("/repeated/")
+        self.assertIn("most repeated (3x)", str(raised.exception))
+
+    def test_stats_and_debug_headers(self):
+        with self.settings(DEBUG=True):
+            response = self.client.get("/within/")
+        self.assertWithinBudget(response)
+        self.assertEqual(response.query_stats["queries"], 1)
+        self.assertEqual(response["X-DB-Queries"], "1")
+        self.assertEqual(response["X-DB-Budget"], "5")
+
+    def test_repeats_are_logged_when_not_strict(self):
+        with self.settings(QUERY_BUDGET_STRICT=False), self.assertLogs("ngao_core.queries", "WARNING") as logs:
+            response = self.client.get("/repeated/")
+        self.assertEqual(response.query_stats["duplicates"], 2)
+        self.assertIn('"event": "query_budget"', logs.output[0])
+
+    def test_fingerprint_collapses_parameters(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM a WHERE id IN (%s, %s, %s) AND name = 'x'"),
+            fingerprint("SELECT * FROM a WHERE id IN (7) AND name = 'y'"),
+        )
+
+
+class EndpointQueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()
+        caches["local"].clear()
+        self.user = User.objects.create_user(email="budget@example.com", password="pw")
+        self.client.force_authenticate(self.user)
+
+    def officer(self, n, **fields):
+        user = User.objects.create_user(email=f"budget{n}@example.com", password="pw")
+        return OfficerProfile.objects.create(
+            user=user, phone=f"+2547300000{n:02d}", badge_number=f"QB{n}", id_number=f"QBID{n}",
+            office_email=f"budget{n}@example.com", **fields,
+        )
+
+    def area_tree(self, prefix, width):
+        for i in range(width):
+            county = Area.objects.create(name=f"{prefix}{i}", code=f"{prefix}C{i}", area_type="county")
+            for j in range(width):
+                sub = Area.objects.create(name=f"{prefix}{i}.{j}", code=f"{prefix}S{i}{j}", area_type="sub_county", parent=county)
+                for k in range(width):
+                    Area.objects.create(name=f"{prefix}{i}.{j}.{k}", code=f"{prefix}W{i}{j}{k}", area_type="location", parent=sub)
+
+    def test_area_tree_is_not_one_query_per_node(self):
+        self.area_tree("A", 2)
+        response = self.client.get("/api/geography/areas/?parent=root")
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+        self.assertEqual(len(response.data[0]["children"][0]["children"]), 2)
+
+        self.area_tree("B", 3)
+        larger = self.client.get("/api/geography/areas/?parent=root")
+        self.assertEqual(larger.query_stats["queries"], response.query_stats["queries"])
+
+    def test_officer_stats(self):
+        county = AdminUnit.objects.create(name="Nyeri", level="CC")
+        location = AdminUnit.objects.create(name="Karatina", level="LOCATION", parent=county)
+        for n in range(4):
+            self.officer(n, admin_unit=location if n % 2 else county)
+        response = self.client.get("/api/officers/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinBudget(response)
+
+    def test_announcement_list(self):
+        others = [User.objects.create_user(email=f"reader{n}@example.com", password="pw") for n in range(3)]
+        for n in range(5):
+            announcement = Announcement.objects.create(title=f"Notice {n}", body=".", creator=others[0])
+            announcement.recipients.add(self.user, *others)
+        Announcement.objects.create(title="Nationwide", body=".", creator=others[0], audience="broadcast")
+        response = self.client.get("/api/communications/announcements/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        self.assertWithinBudget(response)
+
+    def test_alert_next_handler(self):
+        county = Area.objects.create(name="Nyeri", code="C-NY", area_type="county")
+        village = Area.objects.create(name="Gitunduti", code="V-GI", area_type="village", parent=county)
+        for n, (area, role) in enumerate([(village, "Village Elder"), (county, "Chief"), (county, "DCC")]):
+            self.officer(n, area=area, role=Role.objects.create(name=role))
+        incident = Incident.objects.create(title="Fire", description=".", reporter_phone="0", area=village)
+
+        # Chain built on the first routing, cached for the second
+        with self.assertMaxQueries(10):
+            incident.alert_next_handler()
+        with self.assertMaxQueries(8):
+            incident.alert_next_handler()
+        self.assertEqual(incident.handlers.count(), 2)
+
+
+@override_settings(ROOT_URLCONF=__name__, METRICS_TOKEN="secret")
+class MetricsTest(TestCase):
+    view = f"{__name__}.within_budget"
+
+    def sample(self, name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_and_queries_are_counted(self):
+        requests = self.sample("ngao_http_requests_total", view=self.view, method="GET", status="200")
+        queries = self.sample("ngao_db_queries_total", view=self.view)
+        self.client.get("/within/")
+        self.assertEqual(self.sample("ngao_http_requests_total", view=self.view, method="GET", status="200"), requests + 1)
+        self.assertEqual(self.sample("ngao_db_queries_total", view=self.view), queries + 1)
+
+    def test_scrape_includes_queues(self):
+        metrics.register_queue("test", lambda: 3)
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ngao_queue_depth{queue="test"} 3.0', response.content.decode())
+
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code, 403)
+
+    def test_no_token_is_closed_outside_debug(self):
+        with self.settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            with self.settings(DEBUG=True):
+                self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__, PROFILE_REQUESTS=True, PROFILE_SLOW_MS=20, PROFILE_SAMPLE_RATE=0, PROFILE_INTERVAL_MS=2
+)
+class ProfilingTest(TestCase):
+    client_class = APIClient
+
+    def test_slow_requests_are_profiled(self):
+        self.client.get("/within/")
+        self.assertFalse(RequestProfile.objects.exists())
+
+        self.client.get("/slow/")
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.view, f"{__name__}.slow_view")
+        self.assertEqual(profile.reason, "slow")
+        self.assertGreater(profile.sample_count, 0)
+        self.assertIn(f"{__name__}:slow_view", profile.stacks)
+
+    def test_flamegraph_download_is_staff_only(self):
+        profile = RequestProfile.objects.create(
+            view="v", method="GET", path="/v/", status_code=200, duration_ms=1,
+            reason="slow", sample_count=3, stacks="a;b 2\na;c 1",
+        )
+        url = f"/profiles/{profile.pk}/flamegraph/"
+        officer = User.objects.create_user(email="officer@example.com", password="x")
+        self.client.force_authenticate(officer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        officer.is_staff = True
+        officer.save()
+        response = self.client.get(url)
+        self.assertEqual(response.content.decode(), "a;b 2\na;c 1")
+
+
+class BenchmarkDatasetTest(TestCase):
+    def test_seeded_dataset_is_reproducible(self):
+        generator = dataset.Generator(7, datetime.date(2026, 1, 1), log=lambda line: None)
+        generator.run(
+            fanout=(1, 1, 2, 1, 1, 1, 2), citizens=40, births=5, deaths=3, incidents=30, days=60
+        )
+        counts = dataset.summary()
+        self.assertEqual(counts["areas"], 1 + 1 + 1 + 2 + 2 + 2 + 2 + 4)
+        self.assertEqual(counts["officers"], 1 + 2)
+        self.assertEqual((counts["citizens"], counts["births"], counts["deaths"]), (40, 5, 3))
+        self.assertEqual(counts["incidents"], 30)
+        oldest = Incident.objects.order_by("date_reported").first().date_reported
+        self.assertGreaterEqual(oldest, datetime.datetime(2025, 11, 2, tzinfo=datetime.timezone.utc))
+
+        first, second = (dataset.Generator(7, datetime.date(2026, 1, 1)) for _ in range(2))
+        self.assertEqual([first.uuid() for _ in range(3)], [second.uuid() for _ in range(3)])
+        self.assertTrue(dataset.exists())
+
+    def test_summary_percentiles(self):
+        samples = [(float(ms), 200 if ms < 99 else 500, 3, 1.0) for ms in range(1, 101)]
+        result = load.summarize(samples, elapsed=2.0)
+        self.assertEqual(result["throughput_rps"], 50.0)
+        self.assertEqual(result["latency_ms"]["p95"], 96.0)
+        self.assertEqual(result["errors"], 2)
+        self.assertEqual(result["queries"]["mean"], 3)
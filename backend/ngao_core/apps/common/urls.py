@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import DatabaseHealthView, RequestProfileFlamegraphView, RequestProfileListView
+
+urlpatterns = [
+    path("db/", DatabaseHealthView.as_view(), name="health-db"),
+    path("profiles/", RequestProfileListView.as_view(), name="health-profiles"),
+    path("profiles/flamegraph/", RequestProfileFlamegraphView.as_view(), name="health-profiles-flamegraph"),
+    path("profiles/<int:pk>/flamegraph/", RequestProfileFlamegraphView.as_view(), name="health-profile-flamegraph"),
+]
@@ -0,0 +1,101 @@
+# ngao_core/apps/common/views.py
+from collections import Counter
+
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics
+from .db import ping, pool_stats
+from .models import RequestProfile
+
+PROFILE_LIST_LIMIT = 100
+PROFILE_MERGE_LIMIT = 50
+
+
+class DatabaseHealthView(APIView):
+    """
+    Staff-only view of this worker's database connections.
+    /api/health/db/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            alias: {"ping_ms": round(ping(alias), 2), "pool": pool_stats(alias)}
+            for alias in connections
+        })
+
+
+class RequestProfileListView(APIView):
+    """
+    Staff-only list of stored request profiles, newest first, without the
+    stacks. Filter with ?view=<view name> and ?reason=slow|sampled.
+    /api/health/profiles/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = RequestProfile.objects.defer("stacks")
+        for field in ("view", "reason"):
+            if request.query_params.get(field):
+                profiles = profiles.filter(**{field: request.query_params[field]})
+        return Response([
+            {
+                "id": profile.id,
+                "view": profile.view,
+                "method": profile.method,
+                "path": profile.path,
+                "status_code": profile.status_code,
+                "duration_ms": profile.duration_ms,
+                "reason": profile.reason,
+                "role": profile.role,
+                "queries": profile.queries,
+                "sample_count": profile.sample_count,
+                "created_at": profile.created_at,
+            }
+            for profile in profiles[:PROFILE_LIST_LIMIT]
+        ])
+
+
+class RequestProfileFlamegraphView(APIView):
+    """
+    Staff-only download of collapsed stacks for flamegraph.pl / speedscope:
+    one profile, /api/health/profiles/<id>/flamegraph/, or the latest
+    profiles of a view merged, /api/health/profiles/flamegraph/?view=<name>.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk=None):
+        if pk is not None:
+            stacks = get_object_or_404(RequestProfile, pk=pk).stacks
+            filename = f"profile-{pk}.folded"
+        else:
+            view = request.query_params.get("view")
+            if not view:
+                return Response({"detail": "view is required"}, status=400)
+            merged = Counter()
+            for text in RequestProfile.objects.filter(view=view).values_list("stacks", flat=True)[:PROFILE_MERGE_LIMIT]:
+                for line in text.splitlines():
+                    stack, _, count = line.rpartition(" ")
+                    merged[stack] += int(count)
+            stacks = "\n".join(f"{stack} {count}" for stack, count in merged.most_common())
+            filename = f"{view.replace(':', '-')}.folded"
+
+        response = HttpResponse(stacks, content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, /metrics. The scraper sends METRICS_TOKEN as
+    a Bearer token; without one configured it is only served under DEBUG.
+    """
+    if not metrics.authorized(request):
+        return HttpResponseForbidden()
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
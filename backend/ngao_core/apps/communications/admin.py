@@ -9,8 +9,9 @@ class MessageAdmin(admin.ModelAdmin):
 
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
-    list_display = ('title', 'creator', 'body', 'created_at', 'active')  # use correct fields from model
-    list_filter = ('created_at', 'active')
+    list_display = ('title', 'creator', 'audience', 'area', 'role', 'created_at', 'active')
+    list_filter = ('created_at', 'active', 'audience')
+    raw_id_fields = ('area',)
     search_fields = ('title', 'body', 'creator__first_name')
     filter_horizontal = ('recipients',)
 @admin.register(Baraza)
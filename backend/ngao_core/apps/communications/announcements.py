@@ -0,0 +1,99 @@
+# ngao_core/apps/communications/announcements.py
+"""
+Announcement audiences and read state.
+
+A broadcast targets an Area subtree and/or a role and is never expanded
+into per-user rows. Each officer's feed asks the question the other way
+round: an Area's path holds the id of every ancestor (see
+common.mixins.TreePathModel), so "my area is inside the target" is
+`area_id IN (<my area and its ancestors>)`, read off the officer's own
+path without a join. Together with the role that is one indexed query
+however large the audience.
+
+Officers may only broadcast inside their own jurisdiction (api/scope.py);
+nationwide broadcasts, with no area, are left to admins and the top rank.
+
+Read state is a per-user watermark (everything created up to it counts as
+read) plus one AnnouncementRead row per announcement opened after it;
+marking everything read moves the watermark and drops those rows.
+"""
+import uuid
+
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.utils import timezone
+
+from ngao_core.api.scope import get_jurisdiction
+from ngao_core.apps.accounts.models import OfficerProfile
+from ngao_core.apps.incidents.routing import role_rank
+from ngao_core.apps.incidents.utils import ROLE_ORDER
+
+from .models import Announcement, AnnouncementRead, AnnouncementReadMarker
+
+
+def audience(user):
+    """(ids of the user's area and its ancestors, role id), from their officer profile."""
+    if not hasattr(user, "_announcement_audience"):
+        row = OfficerProfile.objects.filter(user=user).values_list("area__path", "role_id").first()
+        path, role_id = row or ("", None)
+        area_ids = [uuid.UUID(segment) for segment in (path or "").split("/") if segment]
+        user._announcement_audience = (area_ids, role_id)
+    return user._announcement_audience
+
+
+def visible_to(user, queryset=None):
+    """Active announcements addressed to `user`, directly or by broadcast."""
+    if queryset is None:
+        queryset = Announcement.objects.all()
+    area_ids, role_id = audience(user)
+    roles = Q(role__isnull=True)
+    if role_id:
+        roles |= Q(role_id=role_id)
+    broadcast = Q(audience="broadcast") & (Q(area__isnull=True) | Q(area_id__in=area_ids)) & roles
+    direct = Q(audience="users", pk__in=user.announcement_recipients.values("pk"))
+    return queryset.filter(broadcast | direct, active=True)
+
+
+def may_broadcast(user, area):
+    """Whether `user` may broadcast to `area`'s subtree, or nationwide when `area` is None."""
+    if get_jurisdiction(user) is None or (user.role_id and user.role.name == "Admin"):
+        return True
+    if area is None:
+        name = OfficerProfile.objects.filter(user=user).values_list("role__name", flat=True).first()
+        return role_rank(name) == max(ROLE_ORDER.values())
+    area_path = get_jurisdiction(user)[0]
+    return bool(area_path) and area.path.startswith(area_path)
+
+
+# ---------- Read state ----------
+def read_through(user):
+    return AnnouncementReadMarker.objects.filter(user=user).values_list("read_through", flat=True).first()
+
+
+def _read_q(user, marker):
+    opened = Exists(AnnouncementRead.objects.filter(user=user, announcement=OuterRef("pk")))
+    return Q(opened) | Q(created_at__lte=marker) if marker else Q(opened)
+
+
+def with_read_state(queryset, user):
+    """Annotate `is_read` for `user`."""
+    return queryset.annotate(
+        is_read=ExpressionWrapper(_read_q(user, read_through(user)), output_field=BooleanField())
+    )
+
+
+def unread(user, queryset=None):
+    return visible_to(user, queryset).exclude(_read_q(user, read_through(user)))
+
+
+def mark_read(user, announcement):
+    marker = read_through(user)
+    if marker is None or announcement.created_at > marker:
+        AnnouncementRead.objects.bulk_create(
+            [AnnouncementRead(user=user, announcement=announcement)], ignore_conflicts=True
+        )
+
+
+def mark_all_read(user):
+    now = timezone.now()
+    AnnouncementReadMarker.objects.update_or_create(user=user, defaults={"read_through": now})
+    AnnouncementRead.objects.filter(user=user, announcement__created_at__lte=now).delete()
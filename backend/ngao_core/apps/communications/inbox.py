@@ -0,0 +1,154 @@
+# ngao_core/apps/communications/inbox.py
+"""
+Per-user inbox.
+
+Messages, announcements and communications are copied into InboxEntry
+rows for each addressee when they are sent (see signals.py), together
+with what the list shows (title, preview, sender name). The officer home
+screen is then one range scan on the (user, -id) index:
+
+    WHERE user_id = %s AND id < %s ORDER BY id DESC LIMIT n
+
+Pages are keyset-paginated on the entry id (?before=<id>), so the
+hundredth page costs the same as the first. Unread counts are kept in
+one InboxCounter row per user, adjusted as entries are added, read and
+removed.
+
+Broadcast announcements are not fanned out when posted (see
+announcements.py). Instead, opening the inbox first copies in any newer
+broadcasts addressed to the user; the counter row records how far that
+has got. created_at is set before the posting transaction commits, so a
+broadcast can become visible after a newer one was already pulled; each
+pull therefore looks INBOX_BROADCAST_OVERLAP_SECONDS behind the watermark
+too, skipping what the inbox already holds. Inbox read state is the inbox's own and does not change the
+sources' read flags.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import announcements
+from .models import InboxCounter, InboxEntry
+
+PREVIEW_CHARS = 140
+
+
+def _preview(text):
+    text = " ".join(text.split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS - 1] + "…"
+
+
+def _new_counter(user_id):
+    backfill = timedelta(days=settings.INBOX_BROADCAST_BACKFILL_DAYS)
+    return InboxCounter(user_id=user_id, broadcasts_through=timezone.now() - backfill)
+
+
+# ---------- Delivery ----------
+def _entry(user_id, kind, obj, created_at, title, body, sender):
+    return InboxEntry(
+        user_id=user_id, kind=kind, object_id=obj.pk, title=title[:255], preview=_preview(body),
+        sender_name=sender.get_full_name() if sender else "", created_at=created_at,
+    )
+
+
+def deliver(kind, obj, created_at, user_ids, title, body, sender=None):
+    """Add `obj` to the inboxes of `user_ids` that do not have it yet; returns how many did not."""
+    user_ids = set(user_ids)
+    user_ids -= set(
+        InboxEntry.objects.filter(kind=kind, object_id=obj.pk, user_id__in=user_ids).values_list("user_id", flat=True)
+    )
+    if not user_ids:
+        return 0
+    InboxEntry.objects.bulk_create(
+        [_entry(user_id, kind, obj, created_at, title, body, sender) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    InboxCounter.objects.bulk_create([_new_counter(user_id) for user_id in user_ids], ignore_conflicts=True)
+    InboxCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + 1)
+    return len(user_ids)
+
+
+def deliver_message(message):
+    sender = message.sender
+    deliver("message", message, message.timestamp, [message.recipient_id],
+            f"Message from {sender.get_full_name() or sender}", message.content, sender)
+
+
+def deliver_announcement(announcement, user_ids):
+    deliver("announcement", announcement, announcement.created_at, user_ids,
+            announcement.title, announcement.body, announcement.creator)
+
+
+def deliver_communication(communication, user_ids):
+    deliver("communication", communication, communication.created_at, user_ids,
+            communication.title, communication.body, communication.sender)
+
+
+def retract(kind, object_id):
+    """Remove an item from every inbox, e.g. when its source is deleted."""
+    entries = InboxEntry.objects.filter(kind=kind, object_id=object_id)
+    # A user holds at most one entry per item
+    InboxCounter.objects.filter(user_id__in=entries.filter(read=False).values("user_id")).update(
+        unread=Greatest(F("unread") - 1, 0)
+    )
+    entries.delete()
+
+
+def pull_broadcasts(user):
+    """Copy in the broadcasts addressed to `user` since the last pull; returns their counter row."""
+    with transaction.atomic():
+        # Locked so concurrent requests from one user do not count a broadcast twice
+        counter = InboxCounter.objects.select_for_update().filter(user=user).first()
+        if counter is None:
+            InboxCounter.objects.bulk_create([_new_counter(user.pk)], ignore_conflicts=True)
+            counter = InboxCounter.objects.select_for_update().get(user=user)
+        overlap = timedelta(seconds=settings.INBOX_BROADCAST_OVERLAP_SECONDS)
+        new = list(
+            announcements.visible_to(user)
+            .filter(audience="broadcast", created_at__gt=counter.broadcasts_through - overlap)
+            .exclude(pk__in=InboxEntry.objects.filter(user=user, kind="announcement").values("object_id"))
+            .select_related("creator")
+            .order_by("created_at")
+        )
+        if not new:
+            return counter
+
+        InboxEntry.objects.bulk_create(
+            [_entry(user.pk, "announcement", a, a.created_at, a.title, a.body, a.creator) for a in new]
+        )
+        counter.unread += len(new)
+        counter.broadcasts_through = max(counter.broadcasts_through, new[-1].created_at)
+        counter.save(update_fields=["unread", "broadcasts_through"])
+    return counter
+
+
+# ---------- Reading ----------
+def timeline(user, before=None, limit=None):
+    """(entries, newest arrival first; cursor for the next page or None; unread count)."""
+    limit = min(limit or settings.INBOX_PAGE_SIZE, settings.INBOX_MAX_PAGE_SIZE)
+    counter = pull_broadcasts(user)
+    entries = InboxEntry.objects.filter(user=user)
+    if before:
+        entries = entries.filter(id__lt=before)
+    page = list(entries.order_by("-id")[:limit + 1])
+    cursor = page[limit - 1].id if len(page) > limit else None
+    return page[:limit], cursor, counter.unread
+
+
+def mark_read(user, entry_ids):
+    with transaction.atomic():
+        count = InboxEntry.objects.filter(user=user, id__in=entry_ids, read=False).update(read=True)
+        if count:
+            InboxCounter.objects.filter(user=user).update(unread=Greatest(F("unread") - count, 0))
+    return count
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        count = InboxEntry.objects.filter(user=user, read=False).update(read=True)
+        InboxCounter.objects.filter(user=user).update(unread=0)
+    return count
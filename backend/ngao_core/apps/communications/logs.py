@@ -0,0 +1,100 @@
+# ngao_core/apps/communications/logs.py
+"""
+Batched USSDLog writes.
+
+A USSD hop must be answered well inside the aggregator's timeout, so the
+log row is not inserted on the request path. Rows go into a bounded
+in-process queue; a daemon thread inserts them with one bulk_create per
+USSD_LOG_BATCH_SIZE rows or USSD_LOG_FLUSH_SECONDS, whichever comes first.
+Rows still queued when the process exits normally are flushed; rows queued
+when it is killed, or that arrive while the queue is full, are lost.
+
+With USSD_LOG_ASYNC off (as in tests) every row is inserted immediately.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class USSDLogWriter:
+    def __init__(self):
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    @property
+    def model(self):
+        return apps.get_model("communications", "USSDLog")
+
+    def write(self, **fields):
+        row = self.model(**fields)
+        if not settings.USSD_LOG_ASYNC:
+            self.model.objects.bulk_create([row])
+            return
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("USSD log queue full, row dropped")
+
+    def _ensure_thread(self):
+        # Started lazily so each forked worker gets its own queue and thread
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue(settings.USSD_LOG_QUEUE_SIZE)
+                self.thread = threading.Thread(target=self.run, name="ussd-log-writer", daemon=True)
+                self.thread.start()
+                if self.pid is None:
+                    atexit.register(self.flush)
+                self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            rows = [self.queue.get()]
+            deadline = time.monotonic() + settings.USSD_LOG_FLUSH_SECONDS
+            while len(rows) < settings.USSD_LOG_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.save(rows)
+
+    def save(self, rows):
+        try:
+            self.model.objects.bulk_create(rows)
+        except Exception:
+            logger.exception("Could not save %d USSD log rows", len(rows))
+        finally:
+            # What request_finished does for request threads
+            close_old_connections()
+
+    def flush(self):
+        """Insert whatever is queued, from the calling thread."""
+        if self.queue is None or self.pid != os.getpid():
+            return
+        rows = []
+        while True:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self.save(rows)
+
+
+ussd_log = USSDLogWriter()
@@ -0,0 +1,26 @@
+# ngao_core/apps/communications/management/commands/send_sms.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from ngao_core.apps.communications.sms import dispatch
+
+
+class Command(BaseCommand):
+    help = "Send queued SMS through the configured providers, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for queued messages")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls when idle")
+        parser.add_argument("--limit", type=int, help="Recipients claimed per round (default SMS_DISPATCH_LIMIT)")
+
+    def handle(self, *args, **options):
+        # Without --loop, stop once a round finds nothing due
+        while True:
+            counts = dispatch(options["limit"])
+            if any(counts.values()):
+                self.stdout.write(f"sent {counts['sent']}, retrying {counts['retry']}, failed {counts['failed']}")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
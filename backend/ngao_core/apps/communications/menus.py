@@ -0,0 +1,47 @@
+# ngao_core/apps/communications/menus.py
+"""USSD menu tree for citizen incident reporting, served by ussd_callback."""
+from ngao_core.apps.incidents.models import Incident
+
+from .ussd import End, Engine, Menu, Option, Prompt
+
+
+def report_incident(phone_number, data):
+    Incident.objects.create(
+        reporter_phone=phone_number,
+        title=f"USSD report: {dict(Incident.TYPE_CHOICES)[data['incident_type']]}",
+        description=data["description"],
+        incident_type=data["incident_type"],
+    )
+    return "Thank you! Your incident has been recorded."
+
+
+def incident_status(phone_number, data):
+    latest = (
+        Incident.objects.filter(reporter_phone=phone_number)
+        .order_by("-date_reported")
+        .values_list("title", "status")
+        .first()
+    )
+    if latest is None:
+        return "No incidents reported from this number."
+    title, status = latest
+    return f"{title}: {dict(Incident.STATUS_CHOICES)[status]}"
+
+
+incident_reporting = Engine(
+    {
+        "main": Menu("Welcome:", (
+            Option("Report Incident", "type"),
+            Option("Check Status", End(incident_status)),
+        )),
+        "type": Menu("Select Incident Type:", (
+            Option("Security", "describe", value="crime"),
+            Option("Health", "describe", value="medical"),
+            Option("Accident", "describe", value="accident"),
+            Option("Fire", "describe", value="fire"),
+            Option("Infrastructure", "describe", value="other"),
+        ), store="incident_type"),
+        "describe": Prompt("Describe your incident:", store="description", next=End(report_incident)),
+    },
+    start="main",
+)
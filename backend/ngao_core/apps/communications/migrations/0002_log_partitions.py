@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+from django.db import migrations
+
+import ngao_core.apps.common.partitions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0001_initial'),
+    ]
+
+    operations = [
+        ngao_core.apps.common.partitions.ConvertToPartitioned(
+            model_name='SMSLog',
+            column='created_at',
+        ),
+        ngao_core.apps.common.partitions.ConvertToPartitioned(
+            model_name='USSDLog',
+            column='created_at',
+        ),
+    ]
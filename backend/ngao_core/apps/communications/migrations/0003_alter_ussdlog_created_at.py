@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_log_partitions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ussdlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
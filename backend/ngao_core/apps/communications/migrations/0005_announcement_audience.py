@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-19 20:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_officerprofile_search'),
+        ('communications', '0004_smsmessage_smsrecipient'),
+        ('geography', '0002_area_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='announcement',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='audience',
+            field=models.CharField(choices=[('users', 'Selected users'), ('broadcast', 'Area and role')], default='users', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='area',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='announcements', to='geography.area'),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='role',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='announcements', to='accounts.role'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['audience', 'active', '-created_at'], name='communicati_audienc_53c67a_idx'),
+        ),
+        migrations.CreateModel(
+            name='AnnouncementReadMarker',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='announcement_marker', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('read_through', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnnouncementRead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reads', to='communications.announcement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcement_reads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'announcement')},
+            },
+        ),
+    ]
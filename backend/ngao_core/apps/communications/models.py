@@ -1,8 +1,11 @@
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from ngao_core.apps.accounts.models import Role
 from ngao_core.apps.admin_structure.models import AdminUnit, Location
+from ngao_core.apps.geography.models import Area
 from django.conf import settings
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -51,6 +54,18 @@ class Message(models.Model):
 
 
 class Announcement(models.Model):
+    """
+    Sent either to the listed `recipients`, or as a broadcast to every
+    officer whose area is inside `area`'s subtree (anywhere when empty)
+    and, when set, who holds `role`. Broadcast audiences are resolved when
+    an officer reads their announcements (see announcements.py), so a
+    national announcement is a single row.
+    """
+    AUDIENCE_CHOICES = (
+        ("users", "Selected users"),
+        ("broadcast", "Area and role"),
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     body = models.TextField()
@@ -59,13 +74,47 @@ class Announcement(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     active = models.BooleanField(default=True)
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default="users")
+    area = models.ForeignKey(
+        Area, on_delete=models.PROTECT, null=True, blank=True, related_name="announcements"
+    )
+    role = models.ForeignKey(
+        Role, on_delete=models.PROTECT, null=True, blank=True, related_name="announcements"
+    )
     recipients = models.ManyToManyField(
         settings.AUTH_USER_MODEL, blank=True, related_name="announcement_recipients"
     )
 
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["audience", "active", "-created_at"]),
+        ]
+
     def __str__(self):
         return self.title
 
+
+class AnnouncementRead(models.Model):
+    """An announcement the user has opened since their read marker."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="announcement_reads"
+    )
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name="reads")
+    read_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("user", "announcement")
+
+
+class AnnouncementReadMarker(models.Model):
+    """Announcements created up to `read_through` count as read for the user."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="announcement_marker"
+    )
+    read_through = models.DateTimeField()
+
+
 class Baraza(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
@@ -86,13 +135,53 @@ class Baraza(models.Model):
     def __str__(self):
         return self.title
     
+class InboxEntry(models.Model):
+    """
+    One item in a user's inbox timeline, with what the list shows copied
+    in so the feed never joins its sources (see inbox.py).
+    """
+    KIND_CHOICES = (
+        ("message", "Message"),
+        ("announcement", "Announcement"),
+        ("communication", "Communication"),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="inbox_entries")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=255)
+    preview = models.CharField(max_length=255, blank=True)
+    sender_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    read = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ("kind", "object_id", "user")
+        indexes = [
+            models.Index(fields=["user", "-id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user_id}: {self.title}"
+
+
+class InboxCounter(models.Model):
+    """A user's unread inbox count, and how far broadcasts have been pulled into the inbox."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="inbox_counter"
+    )
+    unread = models.PositiveIntegerField(default=0)
+    broadcasts_through = models.DateTimeField()
+
+
 class USSDLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     session_id = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=20)
     request_text = models.TextField()
     response_text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the hop is handled; rows are inserted later, in batches
+    created_at = models.DateTimeField(default=timezone.now)
 
 class SMSLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -102,3 +191,50 @@ class SMSLog(models.Model):
     status = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
 
+
+class SMSMessage(models.Model):
+    """An outbound SMS; one SMSRecipient per number tracks its delivery (see sms.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    message = models.TextField()
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="sms_messages"
+    )
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.message[:50]
+
+
+class SMSRecipient(models.Model):
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("sent", "Sent"),
+        ("delivered", "Delivered"),
+        ("failed", "Failed"),
+    )
+
+    sms = models.ForeignKey(SMSMessage, on_delete=models.CASCADE, related_name="recipients")
+    phone_number = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # While queued: when the dispatcher may (re)try it, or when a worker's claim on it lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("sms", "phone_number")
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["provider_message_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.phone_number} ({self.status})"
@@ -1,7 +1,8 @@
 # ngao_core/apps/communications/serializers.py
 
 from rest_framework import serializers
-from .models import Message, Announcement 
+from . import announcements
+from .models import Announcement, InboxEntry, Message
 from ngao_core.apps.accounts.models import CustomUser
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -16,25 +17,25 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
         fields = [
             "id",
-            "subject",
-            "body",
+            "content",
             "sender",
             "sender_name",
             "recipient",
             "recipient_name",
-            "sent_at",
-            "acknowledged",
+            "timestamp",
+            "read",
         ]
-        read_only_fields = ["id", "sent_at", "acknowledged"]
+        read_only_fields = ["id", "sender", "timestamp", "read"]
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     """
-    Serializer for public or internal announcements.
-    Supports multiple recipients via a ManyToMany relationship.
+    Announcements go to the listed recipients (audience "users") or to
+    every officer in `area`'s subtree and/or with `role` (audience
+    "broadcast"; no area means nationwide).
     """
-    posted_by_name = serializers.ReadOnlyField(source="posted_by.get_full_name")
-    recipients_names = serializers.SerializerMethodField()
+    creator_name = serializers.ReadOnlyField(source="creator.get_full_name")
+    is_read = serializers.BooleanField(read_only=True, default=False)
 
     class Meta:
         model = Announcement
@@ -42,14 +43,34 @@ class AnnouncementSerializer(serializers.ModelSerializer):
             "id",
             "title",
             "body",
-            "posted_by",
-            "posted_by_name",
-            "posted_at",
+            "creator",
+            "creator_name",
+            "created_at",
             "active",
+            "audience",
+            "area",
+            "role",
             "recipients",
-            "recipients_names",
+            "is_read",
         ]
-        read_only_fields = ["id", "posted_at"]
+        read_only_fields = ["id", "creator", "created_at"]
+
+    def validate(self, data):
+        audience = data.get("audience", getattr(self.instance, "audience", "users"))
+        if audience == "broadcast" and data.get("recipients"):
+            raise serializers.ValidationError({"recipients": "Broadcasts are addressed by area and role."})
+        if audience == "users" and (data.get("area") or data.get("role")):
+            raise serializers.ValidationError({"audience": "Use the broadcast audience to target an area or role."})
+        request = self.context.get("request")
+        area = data.get("area", getattr(self.instance, "area", None))
+        if audience == "broadcast" and request and not announcements.may_broadcast(request.user, area):
+            if area is None:
+                raise serializers.ValidationError({"area": "Only administrators may broadcast nationwide."})
+            raise serializers.ValidationError({"area": "Choose an area inside your jurisdiction."})
+        return data
 
-    def get_recipients_names(self, obj):
-        return [user.get_full_name() for user in obj.recipients.all()]
+
+class InboxEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InboxEntry
+        fields = ["id", "kind", "object_id", "title", "preview", "sender_name", "created_at", "read"]
@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import Message, Announcement
+from . import inbox
+from .models import Announcement, Communication, Message
 
 def notify_user(user, message):
     """Send a notification to the user (SMS, email, or system alert)."""
@@ -22,9 +24,44 @@ def message_notification(sender, instance, created, **kwargs):
 # ------------------------------
 # Announcement notifications
 # ------------------------------
-@receiver(post_save, sender=Announcement)
-def announcement_notification(sender, instance, created, **kwargs):
-    if created:
+@receiver(m2m_changed, sender=Announcement.recipients.through)
+def announcement_notification(sender, instance, action, pk_set, **kwargs):
+    # Only directly addressed users are notified; broadcasts are never
+    # expanded to their audience and show up in each officer's feed
+    if action == "post_add" and isinstance(instance, Announcement) and pk_set:
         msg = f"New announcement: {instance.title}"
-        for user in instance.recipients.all():
-            notify_user(user, msg)  # Using the helper function instead of print
+        for user in get_user_model().objects.filter(pk__in=pk_set):
+            notify_user(user, msg)
+
+# ------------------------------
+# Inbox
+# ------------------------------
+@receiver(post_save, sender=Message)
+def message_inbox(sender, instance, created, **kwargs):
+    if created:
+        inbox.deliver_message(instance)
+
+
+@receiver(m2m_changed, sender=Announcement.recipients.through)
+def announcement_inbox(sender, instance, action, pk_set, **kwargs):
+    if action == "post_add" and isinstance(instance, Announcement) and pk_set:
+        inbox.deliver_announcement(instance, pk_set)
+
+
+@receiver(m2m_changed, sender=Communication.recipients.through)
+def communication_inbox(sender, instance, action, pk_set, **kwargs):
+    if action == "post_add" and isinstance(instance, Communication) and pk_set:
+        inbox.deliver_communication(instance, pk_set)
+
+
+@receiver(post_save, sender=Announcement)
+def announcement_withdrawn(sender, instance, created, **kwargs):
+    if not created and not instance.active:
+        inbox.retract("announcement", instance.pk)
+
+
+@receiver(post_delete, sender=Message)
+@receiver(post_delete, sender=Announcement)
+@receiver(post_delete, sender=Communication)
+def inbox_source_deleted(sender, instance, **kwargs):
+    inbox.retract(sender.__name__.lower(), instance.pk)
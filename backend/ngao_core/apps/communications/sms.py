@@ -0,0 +1,310 @@
+# ngao_core/apps/communications/sms.py
+"""
+Outbound SMS.
+
+`queue_sms` stores a message with one SMSRecipient row per phone number and
+returns at once; nothing talks to a provider on the request path. The
+`send_sms` worker calls `dispatch`, which claims due recipients, groups
+them by message into provider batch calls of up to BATCH_SIZE numbers,
+and waits on a per-provider token bucket (RATE recipients per second,
+bursts of BURST) before each call.
+
+Each recipient ends up "sent" (then "delivered" or "failed" once the
+provider's delivery report arrives), or is retried with exponential
+backoff after a transient failure, up to SMS_MAX_ATTEMPTS. A claim is a
+lease: the recipient's next attempt is pushed SMS_CLAIM_SECONDS ahead, so
+rows held by a worker that dies are picked up again after that.
+
+Providers are configured in SMS_PROVIDERS like storage backends: a dotted
+BACKEND path plus OPTIONS for its constructor. The token bucket lives in
+the worker process, so with several workers on one provider account
+divide its RATE between them.
+"""
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ngao_core.apps.common.metrics import SMS_RECIPIENTS
+
+from .models import SMSMessage, SMSRecipient
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """The provider call failed as a whole; every recipient in it is retried."""
+
+
+@dataclass(frozen=True)
+class Result:
+    phone_number: str
+    status: str  # "sent", "retry" or "failed"
+    message_id: str = ""
+    error: str = ""
+
+
+# ---------- Rate limiting ----------
+class TokenBucket:
+    """
+    `rate` tokens per second, up to `burst` saved up. `acquire(n)` takes n
+    tokens, sleeping until the bucket has refilled when it runs into debt,
+    so a batch larger than the burst is still let through at the average
+    rate.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, count=1):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+# ---------- Providers ----------
+class AfricasTalkingProvider:
+    """Africa's Talking bulk SMS API; one call sends a message to many numbers."""
+
+    # statusCode values that will not succeed on a retry
+    PERMANENT = {403, 404, 406, 407, 409}
+
+    def __init__(self, username, api_key, sender_id="", sandbox=False, timeout=10):
+        host = "api.sandbox.africastalking.com" if sandbox else "api.africastalking.com"
+        self.url = f"https://{host}/version1/messaging"
+        self.username = username
+        self.sender_id = sender_id
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"apiKey": api_key, "Accept": "application/json"})
+
+    def send(self, message, phone_numbers):
+        data = {"username": self.username, "to": ",".join(phone_numbers), "message": message}
+        if self.sender_id:
+            data["from"] = self.sender_id
+        try:
+            response = self.session.post(self.url, data=data, timeout=self.timeout)
+            response.raise_for_status()
+            recipients = response.json()["SMSMessageData"]["Recipients"]
+        except (requests.RequestException, ValueError, KeyError) as exc:
+            raise ProviderError(str(exc)) from exc
+
+        by_number = {recipient["number"]: recipient for recipient in recipients}
+        results = []
+        for phone_number in phone_numbers:
+            recipient = by_number.get(phone_number)
+            if recipient is None:
+                results.append(Result(phone_number, "retry", error="missing from response"))
+            elif recipient["statusCode"] in (100, 101, 102):
+                results.append(Result(phone_number, "sent", message_id=recipient.get("messageId", "")))
+            else:
+                status = "failed" if recipient["statusCode"] in self.PERMANENT else "retry"
+                results.append(Result(phone_number, status, error=recipient.get("status", "")))
+        return results
+
+
+class FakeProvider:
+    """
+    Sends nothing. Every call takes `latency` seconds and fails as a whole
+    with probability `fail_rate`; numbers that are not +<digits> are
+    rejected. Sent batches are kept in `sent`, for tests and load tests.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, message, phone_numbers):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            if self.fail_rate and self.random.random() < self.fail_rate:
+                raise ProviderError("fake provider failure")
+            self.sent.append((message, list(phone_numbers)))
+        return [
+            Result(number, "sent", message_id=f"fake-{uuid.uuid4().hex}")
+            if number.startswith("+") and number[1:].isdigit()
+            else Result(number, "failed", error="InvalidPhoneNumber")
+            for number in phone_numbers
+        ]
+
+
+@dataclass
+class Gateway:
+    name: str
+    provider: object
+    bucket: TokenBucket
+    batch_size: int
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(name=None):
+    """The configured provider `name` with its rate limiter, built once per process."""
+    name = name or settings.SMS_DEFAULT_PROVIDER
+    config = settings.SMS_PROVIDERS[name]
+    with _gateways_lock:
+        cached = _gateways.get(name)
+        # Rebuilt when the settings change (override_settings in tests)
+        if cached is None or cached[0] is not config:
+            provider = import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+            rate = config.get("RATE", 10)
+            bucket = TokenBucket(rate, config.get("BURST", rate))
+            gateway = Gateway(name, provider, bucket, config.get("BATCH_SIZE", 100))
+            cached = _gateways[name] = (config, gateway)
+    return cached[1]
+
+
+# ---------- Queue ----------
+def queue_sms(message, phone_numbers, sender=None, provider=None):
+    """Queue `message` for each distinct number; returns the SMSMessage."""
+    numbers = list(dict.fromkeys(number.strip() for number in phone_numbers if number and number.strip()))
+    with transaction.atomic():
+        sms = SMSMessage.objects.create(
+            message=message, sender=sender, provider=provider or settings.SMS_DEFAULT_PROVIDER
+        )
+        SMSRecipient.objects.bulk_create([SMSRecipient(sms=sms, phone_number=number) for number in numbers])
+    return sms
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at SMS_RETRY_MAX_SECONDS."""
+    ceiling = min(settings.SMS_RETRY_MAX_SECONDS, settings.SMS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def claim(limit):
+    """Lease up to `limit` due recipients to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        recipients = list(
+            SMSRecipient.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .only("sms_id", "phone_number", "attempts")[:limit]
+        )
+        SMSRecipient.objects.filter(pk__in=[recipient.pk for recipient in recipients]).update(
+            attempts=F("attempts") + 1, next_attempt_at=now + timedelta(seconds=settings.SMS_CLAIM_SECONDS)
+        )
+    for recipient in recipients:
+        recipient.attempts += 1
+    return recipients
+
+
+def dispatch(limit=None):
+    """Send one round of due recipients; returns {"sent": n, "retry": n, "failed": n}."""
+    recipients = claim(limit or settings.SMS_DISPATCH_LIMIT)
+    batches = {}
+    for recipient in recipients:
+        batches.setdefault(recipient.sms_id, []).append(recipient)
+    messages = SMSMessage.objects.only("message", "provider").in_bulk(batches)
+
+    counts = {"sent": 0, "retry": 0, "failed": 0}
+    for sms_id, rows in batches.items():
+        sms = messages[sms_id]
+        gateway = get_gateway(sms.provider)
+        for start in range(0, len(rows), gateway.batch_size):
+            for status, count in send_batch(gateway, sms.message, rows[start:start + gateway.batch_size]).items():
+                counts[status] += count
+    return counts
+
+
+def send_batch(gateway, message, rows):
+    gateway.bucket.acquire(len(rows))
+    try:
+        results = gateway.provider.send(message, [row.phone_number for row in rows])
+    except ProviderError as exc:
+        logger.warning("SMS provider %s failed for %d recipients: %s", gateway.name, len(rows), exc)
+        results = [Result(row.phone_number, "retry", error=str(exc)) for row in rows]
+
+    # Rows with the same outcome are updated together; only message ids differ per row
+    by_number = {result.phone_number: result for result in results}
+    groups, message_ids = {}, []
+    for row in rows:
+        result = by_number.get(row.phone_number) or Result(row.phone_number, "retry", error="no result")
+        status = result.status
+        if status == "retry" and row.attempts >= settings.SMS_MAX_ATTEMPTS:
+            status = "failed"
+        if status == "sent":
+            message_ids.append((row.pk, result.message_id))
+        # Retries are grouped by attempt, which sets their backoff
+        key = (status, result.error[:255], row.attempts if status == "retry" else None)
+        groups.setdefault(key, []).append(row.pk)
+
+    now = timezone.now()
+    counts = {"sent": 0, "retry": 0, "failed": 0}
+    for (status, error, attempts), pks in groups.items():
+        fields = {"error": error, "updated_at": now}
+        if status == "sent":
+            fields.update(status="sent", sent_at=now)
+        elif status == "failed":
+            fields.update(status="failed")
+        else:
+            fields.update(next_attempt_at=now + retry_delay(attempts))
+        SMSRecipient.objects.filter(pk__in=pks).update(**fields)
+        counts[status] += len(pks)
+        SMS_RECIPIENTS.labels(gateway.name, status).inc(len(pks))
+    set_message_ids(message_ids)
+    return counts
+
+
+def set_message_ids(pairs):
+    """Store provider message ids for [(recipient pk, message id)] in one statement."""
+    if not pairs:
+        return
+    connection = connections[SMSRecipient.objects.db]
+    if connection.vendor != "postgresql":
+        objects = [SMSRecipient(pk=pk, provider_message_id=message_id) for pk, message_id in pairs]
+        SMSRecipient.objects.bulk_update(objects, ["provider_message_id"])
+        return
+    table = connection.ops.quote_name(SMSRecipient._meta.db_table)
+    values = ", ".join(["(%s::bigint, %s)"] * len(pairs))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET provider_message_id = v.message_id "
+            f"FROM (VALUES {values}) AS v(id, message_id) WHERE {table}.id = v.id",
+            [value for pair in pairs for value in pair],
+        )
+
+
+# ---------- Delivery reports ----------
+DELIVERED = {"Success"}
+UNDELIVERED = {"Failed", "Rejected", "AbsentSubscriber", "Expired"}
+
+
+def record_delivery(message_id, status, reason=""):
+    """Apply a provider delivery report; returns False for an unknown message id."""
+    if status in DELIVERED:
+        fields = {"status": "delivered", "delivered_at": timezone.now()}
+    elif status in UNDELIVERED:
+        fields = {"status": "failed", "error": (reason or status)[:255]}
+    else:  # Sent, Submitted, Buffered: still on its way
+        return SMSRecipient.objects.filter(provider_message_id=message_id).exists()
+    return bool(SMSRecipient.objects.filter(provider_message_id=message_id).update(updated_at=timezone.now(), **fields))
@@ -0,0 +1,278 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ngao_core.apps.accounts.models import CustomUser, OfficerProfile, Role
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.incidents.models import Incident
+
+from .models import Announcement, Communication, Message, SMSRecipient, USSDLog
+from .sms import TokenBucket, dispatch, get_gateway, queue_sms
+from .ussd import End, Engine, Menu, Option, Prompt
+
+URL = "/api/communications/ussd/"
+
+
+@override_settings(USSD_LOG_ASYNC=False)
+class USSDCallbackTest(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def hop(self, text, session="s1", phone="+254700000001"):
+        response = self.client.post(URL, {"sessionId": session, "phoneNumber": phone, "text": text})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_report_flow_keeps_state_between_hops(self):
+        self.assertTrue(self.hop("").startswith("CON Welcome"))
+        self.assertIn("Select Incident Type", self.hop("1"))
+        # An aggregator retry of the same hop gets the same screen
+        self.assertIn("Select Incident Type", self.hop("1"))
+        self.assertEqual(self.hop("1*2"), "CON Describe your incident:")
+        self.assertTrue(self.hop("1*2*Sick child at the market").startswith("END Thank you"))
+
+        incident = Incident.objects.get()
+        self.assertEqual((incident.incident_type, incident.description), ("medical", "Sick child at the market"))
+        self.assertIn("Reported", self.hop("2", session="s2"))
+        self.assertEqual(USSDLog.objects.filter(session_id="s1").count(), 5)
+
+    def test_history_is_replayed_when_state_is_lost(self):
+        self.hop("")
+        self.hop("1")
+        caches["default"].clear()
+        self.assertTrue(self.hop("1*1*Stolen goats").startswith("END Thank you"))
+        self.assertEqual(Incident.objects.get().incident_type, "crime")
+
+    def test_invalid_choice_ends_the_session(self):
+        self.assertEqual(self.hop("9"), "END Invalid choice.")
+
+    def test_retried_final_hop_does_not_report_twice(self):
+        for text in ("", "1", "1*3"):
+            self.hop(text)
+        reply = self.hop("1*3*Bridge washed away")
+        self.assertTrue(reply.startswith("END Thank you"))
+        self.assertEqual(self.hop("1*3*Bridge washed away"), reply)
+        self.assertEqual(Incident.objects.count(), 1)
+
+
+class USSDEngineTest(SimpleTestCase):
+    def test_prompt_asks_again_on_empty_input(self):
+        engine = Engine({
+            "main": Menu("Pick:", (Option("Name", "name"),)),
+            "name": Prompt("Your name?", store="name", next=End(lambda phone, data: f"Hi {data['name']}")),
+        }, start="main")
+        state = engine.new_state()
+        self.assertEqual(engine.step(state, "1", "+254"), ("Your name?", False))
+        self.assertEqual(engine.step(state, " ", "+254"), ("Your name?", False))
+        self.assertEqual(engine.step(state, "Wanjiru", "+254"), ("Hi Wanjiru", True))
+
+    def test_unknown_screens_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Engine({"main": Menu("Pick:", (Option("Next", "missing"),))}, start="main")
+
+
+FAKE_SMS = {"BACKEND": "ngao_core.apps.communications.sms.FakeProvider", "RATE": 1000, "BATCH_SIZE": 2}
+
+
+@override_settings(
+    SMS_DEFAULT_PROVIDER="fake", SMS_PROVIDERS={"fake": FAKE_SMS}, SMS_MAX_ATTEMPTS=2, SMS_DELIVERY_TOKEN="secret"
+)
+class SMSDispatchTest(TestCase):
+    def test_recipients_are_batched_and_tracked(self):
+        sms = queue_sms("Baraza at 10am", ["+254700000001", "+254700000002", "+254700000001", "0700", "+254700000003"])
+        self.assertEqual(sms.recipients.count(), 4)
+
+        self.assertEqual(dispatch(), {"sent": 3, "retry": 0, "failed": 1})
+        self.assertEqual([len(numbers) for _, numbers in get_gateway().provider.sent], [2, 2])
+        self.assertEqual(SMSRecipient.objects.get(phone_number="0700").error, "InvalidPhoneNumber")
+
+        recipient = SMSRecipient.objects.get(phone_number="+254700000002")
+        report = {"id": recipient.provider_message_id, "status": "Success"}
+        self.assertEqual(self.client.post("/api/communications/sms/delivery/", report).status_code, 403)
+        with self.settings(SMS_DELIVERY_TOKEN=""):
+            self.assertEqual(self.client.post("/api/communications/sms/delivery/?token=", report).status_code, 403)
+        response = self.client.post("/api/communications/sms/delivery/?token=secret", report)
+        self.assertEqual(response.status_code, 200)
+        recipient.refresh_from_db()
+        self.assertEqual(recipient.status, "delivered")
+
+    @override_settings(SMS_PROVIDERS={"fake": {**FAKE_SMS, "OPTIONS": {"fail_rate": 1}}})
+    def test_failed_calls_are_retried_with_backoff(self):
+        queue_sms("Road closed", ["+254700000001"])
+        self.assertEqual(dispatch(), {"sent": 0, "retry": 1, "failed": 0})
+        # Not due again until the backoff has passed
+        self.assertEqual(dispatch(), {"sent": 0, "retry": 0, "failed": 0})
+
+        SMSRecipient.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch(), {"sent": 0, "retry": 0, "failed": 1})
+        self.assertEqual(SMSRecipient.objects.get().attempts, 2)
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_waits_once_the_burst_is_spent(self):
+        now, slept = [0.0], []
+        bucket = TokenBucket(rate=10, burst=5, clock=lambda: now[0], sleep=slept.append)
+        bucket.acquire(5)
+        bucket.acquire(10)
+        self.assertEqual(slept, [1.0])
+        now[0] = 1.0
+        bucket.acquire(5)
+        self.assertEqual(slept, [1.0, 0.5])
+
+
+class AnnouncementAudienceTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.county = county = Area.objects.create(name="Nyeri", code="C-NY", area_type="county")
+        self.ward = ward = Area.objects.create(name="Mathira", code="SC-MA", area_type="sub_county", parent=county)
+        other = Area.objects.create(name="Kisumu", code="C-KS", area_type="county")
+        chief, clerk = Role.objects.create(name="Chief"), Role.objects.create(name="Clerk")
+        self.users = {}
+        for n, (name, area, role) in enumerate([("mathira_chief", ward, chief), ("kisumu_chief", other, chief),
+                                                ("mathira_clerk", ward, clerk)], 1):
+            user = self.users[name] = CustomUser.objects.create_user(email=f"{name}@example.com", password="pw")
+            OfficerProfile.objects.create(
+                user=user, phone=f"+2547300000{n:02d}", badge_number=f"A{n}", id_number=f"AID{n}",
+                office_email=f"{name}@example.com", area=area, role=role,
+            )
+        author = self.users["kisumu_chief"]
+        Announcement.objects.create(title="National", body=".", creator=author, audience="broadcast")
+        Announcement.objects.create(title="Nyeri chiefs", body=".", creator=author, audience="broadcast",
+                                    area=county, role=chief)
+        Announcement.objects.create(title="Kisumu", body=".", creator=author, audience="broadcast", area=other)
+        direct = Announcement.objects.create(title="Direct", body=".", creator=author)
+        direct.recipients.add(self.users["mathira_clerk"])
+
+    def titles(self, name, **params):
+        self.client.force_authenticate(self.users[name])
+        response = self.client.get("/api/communications/announcements/", params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"] if isinstance(response.data, dict) else response.data
+        return sorted(a["title"] for a in results)
+
+    def test_audience_is_resolved_from_area_subtree_and_role(self):
+        self.assertEqual(self.titles("mathira_chief"), ["National", "Nyeri chiefs"])
+        self.assertEqual(self.titles("mathira_clerk"), ["Direct", "National"])
+        self.assertEqual(self.titles("kisumu_chief"), ["Kisumu", "National"])
+
+    def test_broadcasts_stay_inside_the_creators_jurisdiction(self):
+        def post(name, area=None):
+            self.client.force_authenticate(self.users[name])
+            data = {"title": "Baraza", "body": ".", "audience": "broadcast", "area": area and area.pk}
+            return self.client.post("/api/communications/announcements/", data, format="json")
+
+        self.assertEqual(post("mathira_chief", self.ward).status_code, 201)
+        self.assertEqual(post("mathira_chief", self.county).status_code, 400)
+        self.assertEqual(post("mathira_chief").status_code, 400)
+        self.users["mathira_chief"].is_staff = True
+        self.users["mathira_chief"].save()
+        self.assertEqual(post("mathira_chief").status_code, 201)
+
+    def test_read_markers(self):
+        self.titles("mathira_chief")
+        national = Announcement.objects.get(title="National")
+        self.assertEqual(self.client.post(f"/api/communications/announcements/{national.pk}/read/").status_code, 204)
+        self.assertEqual(self.titles("mathira_chief", unread="true"), ["Nyeri chiefs"])
+
+        self.client.post("/api/communications/announcements/read-all/")
+        self.assertEqual(self.client.get("/api/communications/announcements/unread-count/").data, {"unread": 0})
+        Announcement.objects.create(title="Later", body=".", creator=self.users["kisumu_chief"], audience="broadcast")
+        self.assertEqual(self.titles("mathira_chief", unread="true"), ["Later"])
+
+
+class CommunicationsScopeTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.alice, self.bob, self.eve = (
+            CustomUser.objects.create_user(email=f"{name}@example.com", password="pw") for name in ("alice", "bob", "eve")
+        )
+        self.message = Message.objects.create(sender=self.alice, recipient=self.bob, content="Meet at the chief's camp")
+        self.announcement = Announcement.objects.create(title="Direct", body=".", creator=self.alice)
+        self.announcement.recipients.add(self.bob)
+
+    def test_api_routes_require_authentication(self):
+        for url in ("messages/", "announcements/", "inbox/"):
+            self.assertEqual(self.client.get(f"/api/communications/{url}").status_code, 401, url)
+
+    def test_other_users_rows_are_hidden(self):
+        self.client.force_authenticate(self.eve)
+        self.assertEqual(self.client.get("/api/communications/messages/").data, [])
+        self.assertEqual(self.client.get(f"/api/communications/messages/{self.message.pk}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/communications/announcements/").data, [])
+        self.assertEqual(self.client.get(f"/api/communications/announcements/{self.announcement.pk}/").status_code, 404)
+
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(len(self.client.get("/api/communications/messages/").data), 1)
+        self.assertEqual(self.client.get(f"/api/communications/announcements/{self.announcement.pk}/").status_code, 200)
+
+    def test_only_the_sender_edits_and_the_recipient_marks_read(self):
+        url = f"/api/communications/messages/{self.message.pk}/"
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.patch(url, {"content": "Changed"}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.client.post(f"{url}read/").status_code, 204)
+
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.post(f"{url}read/").status_code, 404)
+        self.assertEqual(self.client.patch(url, {"content": "Changed", "read": False}, format="json").status_code, 200)
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.content, self.message.read), ("Changed", True))
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_only_the_creator_edits_an_announcement(self):
+        url = f"/api/communications/announcements/{self.announcement.pk}/"
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.patch(url, {"title": "Changed"}, format="json").status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.patch(url, {"title": "Changed"}, format="json").status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+
+@override_settings(INBOX_PAGE_SIZE=2)
+class InboxTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.officer = CustomUser.objects.create_user(email="officer@example.com", password="pw")
+        self.sender = CustomUser.objects.create_user(email="sender@example.com", password="pw", first_name="Amina")
+        self.client.force_authenticate(self.officer)
+
+    def inbox(self, **params):
+        response = self.client.get("/api/communications/inbox/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_sources_are_merged_into_one_keyset_paginated_feed(self):
+        Message.objects.create(sender=self.sender, recipient=self.officer, content="Report to the office")
+        communication = Communication.objects.create(title="Circular", body="New forms", type="NOT", sender=self.sender)
+        communication.recipients.add(self.officer)
+        Announcement.objects.create(title="National", body="Holiday", creator=self.sender, audience="broadcast")
+
+        first = self.inbox()
+        self.assertEqual([e["kind"] for e in first["results"]], ["announcement", "communication"])
+        self.assertEqual(first["unread"], 3)
+        second = self.inbox(before=first["next"])
+        self.assertEqual([e["title"] for e in second["results"]], ["Message from Amina"])
+        self.assertIsNone(second["next"])
+
+        response = self.client.post("/api/communications/inbox/read/", {"ids": [first["results"][0]["id"]]}, format="json")
+        self.assertEqual(response.data, {"unread": 2})
+        communication.delete()
+        self.assertEqual(self.inbox()["unread"], 1)
+
+    def test_broadcast_committed_after_a_newer_one_is_still_pulled(self):
+        newer = Announcement.objects.create(title="Newer", body=".", creator=self.sender, audience="broadcast")
+        self.assertEqual(self.inbox()["unread"], 1)
+        # Posted first but committed after the inbox pulled `newer`
+        late = Announcement.objects.create(title="Late", body=".", creator=self.sender, audience="broadcast")
+        Announcement.objects.filter(pk=late.pk).update(created_at=newer.created_at - timedelta(seconds=5))
+
+        self.assertEqual(self.inbox()["unread"], 2)
+        self.assertEqual(self.inbox()["unread"], 2)
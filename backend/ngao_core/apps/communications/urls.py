@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import (MessageViewSet, AnnouncementViewSet)    
+from .views import (
+    AnnouncementViewSet, InboxReadView, InboxView, MessageViewSet, sms_delivery_report, ussd_callback,
+)
 
 router = DefaultRouter()
 router.register(r"messages", MessageViewSet, basename="message")
@@ -9,4 +11,8 @@ router.register(r"announcements", AnnouncementViewSet, basename="announcement")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("inbox/", InboxView.as_view(), name="inbox"),
+    path("inbox/read/", InboxReadView.as_view(), name="inbox-read"),
+    path("ussd/", ussd_callback, name="ussd-callback"),
+    path("sms/delivery/", sms_delivery_report, name="sms-delivery-report"),
 ]
@@ -0,0 +1,168 @@
+# ngao_core/apps/communications/ussd.py
+"""
+USSD session engine.
+
+Menus are declared as data (see menus.py): a dict of named screens, each a
+Menu of numbered options or a free-text Prompt, leading to another screen
+or to an End whose action produces the closing message.
+
+The aggregator posts every hop of a session with the whole input history
+in `text` ("1*2*Fire at the market"). Rather than re-parsing that history
+on every hop, the session's state (current screen, answers so far and the
+part of `text` already consumed) is kept in the shared cache (Redis in
+production) for USSD_SESSION_TTL seconds, so each hop applies only its
+newest input. When the state is missing (first hop, expired, or the cache
+is down) the whole history is replayed from the start screen, which gives
+the same result. Replies start with "CON" when the session continues and
+"END" when it ends, as the aggregator expects. A finished session keeps its
+END reply until the TTL runs out, so a retried final hop gets that reply
+back instead of running the flow (and its action) a second time.
+
+Every hop is recorded as a USSDLog row through the batched writer in
+logs.py, off the request path.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .logs import ussd_log
+
+STAY = object()  # a Prompt asks again after empty input
+
+
+@dataclass(frozen=True)
+class End:
+    """Ends the session with the text returned by action(phone_number, data)."""
+    action: object
+
+
+@dataclass(frozen=True)
+class Option:
+    label: str
+    next: object  # screen name or End
+    value: str = None  # saved under the menu's `store`; defaults to the label
+
+
+@dataclass(frozen=True)
+class Menu:
+    title: str
+    options: tuple
+    store: str = None
+
+    def render(self, data):
+        return "\n".join([self.title, *(f"{n}. {option.label}" for n, option in enumerate(self.options, 1))])
+
+    def accept(self, value, data):
+        if not value.isdigit() or not 1 <= int(value) <= len(self.options):
+            return None
+        option = self.options[int(value) - 1]
+        if self.store:
+            data[self.store] = option.label if option.value is None else option.value
+        return option.next
+
+
+@dataclass(frozen=True)
+class Prompt:
+    text: str
+    store: str
+    next: object
+
+    def render(self, data):
+        return self.text
+
+    def accept(self, value, data):
+        value = value.strip()
+        if not value:
+            return STAY
+        data[self.store] = value
+        return self.next
+
+
+# ---------- Session store ----------
+def _key(session_id):
+    return f"ussd:session:{session_id}"
+
+
+def load_session(session_id):
+    return caches["default"].get(_key(session_id))
+
+
+def save_session(session_id, state):
+    caches["default"].set(_key(session_id), state, settings.USSD_SESSION_TTL)
+
+
+def end_session(session_id, reply):
+    save_session(session_id, {"finished": True, "reply": reply})
+
+
+def pending_inputs(consumed, text):
+    """Inputs in `text` after the `consumed` prefix, or None when `text` does not continue it."""
+    if not consumed:
+        return text.split("*") if text else []
+    if text == consumed:
+        return []
+    if text.startswith(consumed + "*"):
+        return text[len(consumed) + 1:].split("*")
+    return None
+
+
+# ---------- Engine ----------
+class Engine:
+    def __init__(self, screens, start, invalid="Invalid choice."):
+        targets = [
+            target
+            for screen in screens.values()
+            for target in ([o.next for o in screen.options] if isinstance(screen, Menu) else [screen.next])
+        ]
+        missing = {t for t in [start, *targets] if not isinstance(t, End) and t not in screens}
+        if missing:
+            raise ValueError(f"Unknown USSD screens: {', '.join(sorted(missing))}")
+        self.screens = screens
+        self.start = start
+        self.invalid = invalid
+
+    def new_state(self):
+        return {"text": "", "screen": self.start, "data": {}, "reply": self.screens[self.start].render({})}
+
+    def step(self, state, value, phone_number):
+        """Apply one input to `state`; returns (reply, finished)."""
+        screen = self.screens[state["screen"]]
+        target = screen.accept(value, state["data"])
+        if target is None:
+            return self.invalid, True
+        if isinstance(target, End):
+            return target.action(phone_number, state["data"]), True
+        if target is not STAY:
+            state["screen"] = target
+        return self.screens[state["screen"]].render(state["data"]), False
+
+    def handle(self, session_id, phone_number, text):
+        """Process one hop; returns the reply with its CON / END prefix."""
+        state = load_session(session_id)
+        if state is not None and state.get("finished"):
+            # A retried final hop: the session is over, answer as before
+            reply = state["reply"]
+            ussd_log.write(session_id=session_id, phone_number=phone_number, request_text=text, response_text=reply)
+            return reply
+        inputs = pending_inputs(state["text"], text) if state is not None else None
+        if inputs is None:
+            state = self.new_state()
+            inputs = pending_inputs("", text)
+
+        # A repeated hop (aggregator retry) gets the same reply again
+        reply, finished = state["reply"], False
+        for value in inputs:
+            reply, finished = self.step(state, value, phone_number)
+            if finished:
+                break
+
+        if finished:
+            reply = f"END {reply}"
+            end_session(session_id, reply)
+        else:
+            state["text"], state["reply"] = text, reply
+            save_session(session_id, state)
+            reply = f"CON {reply}"
+        ussd_log.write(session_id=session_id, phone_number=phone_number, request_text=text, response_text=reply)
+        return reply
@@ -1,16 +1,15 @@
-# apps/communication/utils.py
-from africastalking import initialize, SMS
-from django.conf import settings
+# ngao_core/apps/communications/utils.py
+from .sms import queue_sms
 
-initialize(username=settings.AT_USERNAME, api_key=settings.AT_API_KEY)
-sms = SMS
 
-def broadcast_sms(message, phone_numbers):
-    response = sms.send(message, phone_numbers)
-    return response
+def broadcast_sms(message, phone_numbers, sender=None):
+    """Queue `message` for every number; the send_sms worker delivers it."""
+    return queue_sms(message, phone_numbers, sender=sender)
+
 
 def notify_chief(incident):
-    area_chief = incident.area.chief
-    if area_chief and area_chief.phone_number:
+    area_chief = incident.area.chief if incident.area_id else None
+    profile = getattr(area_chief, "officer_profile", None)
+    if profile and profile.phone:
         message = f"New incident reported in your area: {incident.description}"
-        broadcast_sms(message, [area_chief.phone_number])
\ No newline at end of file
+        broadcast_sms(message, [profile.phone])
@@ -1,49 +1,150 @@
+import hmac
+
+from django.conf import settings
+from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse 
-from rest_framework import viewsets, permissions
+from django.views.decorators.http import require_POST
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ngao_core.api.queries import query_budget
+
+from . import announcements, inbox
+from .menus import incident_reporting
 from .models import Message, Announcement
-from .serializers import MessageSerializer, AnnouncementSerializer
-from apps.incidents.models import Incident 
+from .serializers import AnnouncementSerializer, InboxEntrySerializer, MessageSerializer
+from .sms import record_delivery
 
 class MessageViewSet(viewsets.ModelViewSet):
-    queryset = Message.objects.all().order_by("-sent_at")
+    """
+    Messages the current user sent or received. Only the sender may edit or
+    delete a message; the recipient marks it read with POST .../read/.
+    """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        user = self.request.user
+        if self.action in ("update", "partial_update", "destroy"):
+            queryset = Message.objects.filter(sender=user)
+        elif self.action == "read":
+            queryset = Message.objects.filter(recipient=user)
+        else:
+            queryset = Message.objects.filter(Q(sender=user) | Q(recipient=user))
+        return queryset.select_related("sender", "recipient").order_by("-timestamp")
+
     def perform_create(self, serializer):
         serializer.save(sender=self.request.user)
 
+    @action(detail=True, methods=["post"])
+    def read(self, request, pk=None):
+        Message.objects.filter(pk=self.get_object().pk, read=False).update(read=True)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class AnnouncementViewSet(viewsets.ModelViewSet):
-    queryset = Announcement.objects.all().order_by("-posted_at")
+    """
+    Lists the announcements addressed to the current user, newest first,
+    with `is_read`; ?unread=true for unread only, ?sent=true for the ones
+    they created. Only the creator (or staff) may change an announcement.
+    """
     serializer_class = AnnouncementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Audience and read marker, the page, its recipients
+    query_budget = 6
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Announcement.objects.select_related("creator").prefetch_related("recipients")
+        if self.action in ("update", "partial_update", "destroy"):
+            return queryset if user.is_staff else queryset.filter(creator=user)
+        if self.request.query_params.get("sent") == "true":
+            queryset = queryset.filter(creator=user)
+        elif self.request.query_params.get("unread") == "true":
+            queryset = announcements.unread(user, queryset)
+        else:
+            queryset = announcements.visible_to(user, queryset)
+        return announcements.with_read_state(queryset, user)
 
     def perform_create(self, serializer):
-        serializer.save(posted_by=self.request.user)
+        serializer.save(creator=self.request.user)
+
+    @action(detail=True, methods=["post"])
+    def read(self, request, pk=None):
+        announcements.mark_read(request.user, self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], url_path="read-all")
+    def read_all(self, request):
+        announcements.mark_all_read(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": announcements.unread(request.user).count()})
+
+class InboxView(APIView):
+    """
+    GET /api/communications/inbox/?before=<id>&limit=<n>
+
+    The user's messages, announcements and communications, newest first:
+    {"results": [...], "next": <id to pass as `before`, or null>, "unread": n}.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # Pulling in new broadcasts, then one range scan for the page
+    query_budget = 10
+
+    def get(self, request):
+        try:
+            before = int(request.query_params.get("before") or 0) or None
+            limit = int(request.query_params.get("limit") or 0) or None
+        except ValueError:
+            return Response({"error": "before and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        entries, cursor, unread = inbox.timeline(request.user, before, limit)
+        return Response({"results": InboxEntrySerializer(entries, many=True).data, "next": cursor, "unread": unread})
+
+
+class InboxReadView(APIView):
+    """POST {"ids": [...]} marks those entries read, {"all": true} everything."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.data.get("all"):
+            inbox.mark_all_read(request.user)
+        else:
+            ids = request.data.get("ids")
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                return Response({"error": "ids must be a list of entry ids"}, status=status.HTTP_400_BAD_REQUEST)
+            inbox.mark_read(request.user, ids)
+        return Response({"unread": inbox.pull_broadcasts(request.user).unread})
+
 
 @csrf_exempt
+@require_POST
+@query_budget(2)
 def ussd_callback(request):
     session_id = request.POST.get("sessionId")
     phone_number = request.POST.get("phoneNumber")
-    text = request.POST.get("text")  # e.g., "1*2*3"
-
-    menu_level = text.split('*')
-
-    if menu_level == ['']:
-        response = "Welcome:\n1. Report Incident\n2. Check Status"
-    elif menu_level[0] == '1' and len(menu_level) == 1:
-        response = "Select Incident Type:\n1. Security\n2. Health\n3. Infrastructure"
-    elif menu_level[0] == '1' and len(menu_level) == 2:
-        response = "Describe your incident:"
-    elif menu_level[0] == '1' and len(menu_level) == 3:
-        # Save incident
-        Incident.objects.create(
-            reporter_phone=phone_number,
-            type=menu_level[1],
-            description=text.split('*')[2]
-        )
-        response = "Thank you! Your incident has been recorded."
-    else:
-        response = "Invalid choice."
-
-    return HttpResponse(response, content_type='text/plain')
\ No newline at end of file
+    if not session_id or not phone_number:
+        return HttpResponseBadRequest("sessionId and phoneNumber are required", content_type="text/plain")
+
+    reply = incident_reporting.handle(session_id, phone_number, request.POST.get("text", ""))
+    return HttpResponse(reply, content_type="text/plain")
+
+
+@csrf_exempt
+@require_POST
+def sms_delivery_report(request):
+    """Delivery report callback from the SMS provider (id, status, failureReason)."""
+    token = settings.SMS_DELIVERY_TOKEN
+    # Without a configured token anyone could mark messages delivered
+    if not token or not hmac.compare_digest(request.GET.get("token", ""), token):
+        return HttpResponseForbidden()
+    message_id = request.POST.get("id")
+    if not message_id or not request.POST.get("status"):
+        return HttpResponseBadRequest("id and status are required", content_type="text/plain")
+
+    record_delivery(message_id, request.POST["status"], request.POST.get("failureReason", ""))
+    # Unknown ids are acknowledged too, or the provider keeps re-posting them
+    return HttpResponse(status=200)
@@ -0,0 +1,115 @@
+# ngao_core/apps/geography/management/commands/bench_jurisdiction.py
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.incidents.models import Incident
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark jurisdiction scoping on a synthetic area hierarchy: the path "
+        "prefix predicate against a level-by-level subtree walk and the per-object "
+        "parent walk. Everything is created in a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--depth", type=int, default=8, help="Levels below the root")
+        parser.add_argument("--fanout", type=int, default=3, help="Children per area")
+        parser.add_argument("--incidents", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--explain", action="store_true", help="Print the plan for the root scope")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, depth, fanout, incidents, repeat, explain, **_):
+        levels = self.build_tree(depth, fanout)
+        leaves = levels[-1]
+        Incident.objects.bulk_create(
+            [
+                Incident(title="bench", description="bench", reporter_phone="0", area=random.choice(leaves))
+                for _ in range(incidents)
+            ],
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Area._meta.db_table}, {Incident._meta.db_table}")
+        self.stdout.write(
+            f"{sum(len(level) for level in levels)} areas over {depth + 1} levels, {incidents} incidents"
+        )
+
+        self.stdout.write(f"{'level':>5} {'rows':>8} {'path ms':>9} {'walk ms':>9} {'parents ms/obj':>15}")
+        for index, level in enumerate(levels):
+            node = level[0]
+            rows = self.scoped(node).count()
+            path_ms = self.time(lambda: self.scoped(node).count(), repeat)
+            walk_ms = self.time(lambda: self.walked(node).count(), repeat)
+            parents_ms = self.time(lambda: self.parent_walk(node, leaves[0]), repeat)
+            self.stdout.write(f"{index:>5} {rows:>8} {path_ms:>9.2f} {walk_ms:>9.2f} {parents_ms:>15.2f}")
+
+        if explain:
+            self.stdout.write(self.scoped(levels[0][0]).explain(analyze=True))
+
+    def build_tree(self, depth, fanout):
+        root = Area(name="Bench", code="BENCH", area_type="country")
+        root.path = root.path_segment
+        levels = [[root]]
+        for level in range(depth):
+            children = []
+            for parent in levels[-1]:
+                for n in range(fanout):
+                    child = Area(
+                        name=f"{parent.name}-{n}",
+                        code=f"B{level}-{len(children)}",
+                        area_type="village",
+                        parent=parent,
+                    )
+                    child.path = parent.path + child.path_segment
+                    children.append(child)
+            levels.append(children)
+        # Paths are set above; bulk_create bypasses save()
+        Area.objects.bulk_create([area for level in levels for area in level], batch_size=2000)
+        return levels
+
+    @staticmethod
+    def scoped(node):
+        return Incident.objects.filter(area__in=Area.objects.filter(path__startswith=node.path).values("pk"))
+
+    @staticmethod
+    def walked(node):
+        # One query per level to collect the subtree, then IN (...)
+        ids, frontier = [node.pk], [node.pk]
+        while frontier:
+            frontier = list(Area.objects.filter(parent__in=frontier).values_list("pk", flat=True))
+            ids.extend(frontier)
+        return Incident.objects.filter(area__in=ids)
+
+    @staticmethod
+    def parent_walk(node, leaf):
+        # The old HierarchicalAccess check: follow parent pointers from the object up
+        current = Area.objects.get(pk=leaf.pk)
+        while current is not None and current.pk != node.pk:
+            current = current.parent
+
+    @staticmethod
+    def time(fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
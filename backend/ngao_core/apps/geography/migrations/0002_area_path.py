@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+BACKFILL_PATHS = """
+    WITH RECURSIVE tree (id, path) AS (
+        SELECT id, replace(id::text, '-', '') || '/' FROM geography_area WHERE parent_id IS NULL
+        UNION ALL
+        SELECT child.id, tree.path || replace(child.id::text, '-', '') || '/'
+        FROM geography_area child JOIN tree ON child.parent_id = tree.id
+    )
+    UPDATE geography_area SET path = tree.path
+    FROM tree
+    WHERE geography_area.id = tree.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geography', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunSQL(
+            BACKFILL_PATHS,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -3,12 +3,13 @@ from django.contrib.gis.db import models
 from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
 from django.contrib.gis.geos import MultiPolygon
+from ngao_core.apps.common.mixins import TreePathModel
 
 
 User = settings.AUTH_USER_MODEL
 
 
-class Area(models.Model):
+class Area(TreePathModel):
     """
     Generic administrative unit.
     Used for Country, Region, County, etc.
@@ -1,12 +1,28 @@
 # ngao_core/apps/geography/serializers.py
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
 from rest_framework import serializers
 from .models import Area
+from ngao_core.api.sparse import SparseFieldsMixin
+
+
+class AreaListSerializer(serializers.ListSerializer):
+    """Loads the subtrees of every listed area up front, in one query."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        self.child.load_subtrees(items)
+        return super().to_representation(items)
+
 
-class AreaSerializer(serializers.ModelSerializer):
+class AreaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
 
     class Meta:
         model = Area
+        list_serializer_class = AreaListSerializer
         fields = [
             "id",
             "name",
@@ -18,9 +34,37 @@ class AreaSerializer(serializers.ModelSerializer):
             "children",
         ]
 
+    def load_subtrees(self, areas):
+        # Children by parent id, shared by every nested serializer of this response
+        children = self.context.setdefault("_area_children", {})
+        pending = [area for area in areas if area.pk not in children]
+        if not pending:
+            return
+
+        roots = []
+        for path in sorted(area.path for area in pending if area.path):
+            if not roots or not path.startswith(roots[-1]):
+                roots.append(path)
+        descendants = []
+        if roots:
+            descendants = list(
+                Area.objects.filter(reduce(or_, (Q(path__startswith=root) for root in roots)))
+                .exclude(pk__in=[area.pk for area in pending])
+                .order_by("name")
+            )
+
+        for area in pending + descendants:
+            children.setdefault(area.pk, [])
+        loaded = {area.pk for area in pending} | {area.pk for area in descendants}
+        for area in descendants:
+            if area.parent_id in loaded:
+                children[area.parent_id].append(area)
+
     def get_children(self, obj):
-        children_qs = obj.children.all().order_by("name")
-        if children_qs.exists():
-            return AreaSerializer(children_qs, many=True, context=self.context).data
+        children = self.context.get("_area_children", {})
+        if obj.pk not in children:
+            self.load_subtrees([obj])
+            children = self.context["_area_children"]
+        if children[obj.pk]:
+            return AreaSerializer(children[obj.pk], many=True, context=self.context).data
         return []
-
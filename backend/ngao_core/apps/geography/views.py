@@ -5,9 +5,11 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from .models import Area
 from .serializers import AreaSerializer
+from ngao_core.api.sparse import SparseQuerysetMixin
+from ngao_core.apps.common.cache import cached_view
 
 
-class AreaViewSet(viewsets.ReadOnlyModelViewSet):
+class AreaViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Provides nested geography data for Leaflet maps.
     
@@ -16,6 +18,8 @@ class AreaViewSet(viewsets.ReadOnlyModelViewSet):
     Filter by code: /api/areas/?code=KE-001
     """
     serializer_class = AreaSerializer
+    # The page, then one query for every subtree under it
+    query_budget = 4
 
     def get_queryset(self):
         queryset = Area.objects.all()
@@ -147,6 +151,7 @@ class AreaTypeListView(APIView):
     Returns all available area types.
     /api/geography/area-types/
     """
+    @cached_view(ttl=60 * 60 * 24)
     def get(self, request):
         area_types = [
             {'value': choice[0], 'label': choice[1]}
@@ -164,6 +169,7 @@ class AreaByTypeView(APIView):
     /api/geography/by-type/country/
     /api/geography/by-type/county/?parent=<region-uuid>
     """
+    @cached_view(ttl=60 * 60, tags=("geography",))
     def get(self, request, area_type):
         # Validate area_type
         valid_types = [choice[0] for choice in Area.AREA_TYPES]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+import ngao_core.apps.common.partitions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0005_remove_incident_witnesses_alter_witness_incident'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['date_reported'], name='incident_reported_brin'),
+        ),
+        ngao_core.apps.common.partitions.ConvertToPartitioned(
+            model_name='Response',
+            column='timestamp',
+        ),
+    ]
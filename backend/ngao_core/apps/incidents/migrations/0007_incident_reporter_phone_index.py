@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0006_response_partitions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['reporter_phone', '-date_reported'], name='incidents_i_reporte_98376c_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0007_incident_reporter_phone_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Escalation Level'),
+        ),
+    ]
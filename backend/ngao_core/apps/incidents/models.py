@@ -4,6 +4,7 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.contrib.gis.db import models as gis_models
 from django.contrib.gis.geos import Point
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models, transaction
 from ngao_core.apps.accounts.models import CustomUser
 from ngao_core.apps.admin_structure.models import AdminUnit
@@ -48,6 +49,8 @@ class Incident(models.Model):
     # Workflow fields
     handlers = models.ManyToManyField(CustomUser, blank=True, related_name="assigned_incidents", verbose_name=_("Handlers"),)
     current_handler = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.SET_NULL, related_name="current_incidents", verbose_name=_("Current Handler"),)
+    # ROLE_ORDER rank of the current handler (0 while unassigned), see routing.py
+    escalation_level = models.PositiveSmallIntegerField(default=0, verbose_name=_("Escalation Level"))
 
     # Location & GIS
     location = models.ForeignKey(AdminUnit, on_delete=models.SET_NULL, null=True, blank=True, related_name="incidents", verbose_name=_("Administrative Location Unit"),)
@@ -65,6 +68,11 @@ class Incident(models.Model):
         indexes = [
             models.Index(fields=["incident_type"]),
             models.Index(fields=["status"]),
+            # USSD "check status": a reporter's latest incident
+            models.Index(fields=["reporter_phone", "-date_reported"]),
+            # Rows arrive in date order, so a BRIN index serves date ranges
+            # at a fraction of a B-tree's size
+            BrinIndex(fields=["date_reported"], name="incident_reported_brin"),
         ]
 
     @staticmethod
@@ -79,28 +87,22 @@ class Incident(models.Model):
 
     def alert_next_handler(self):
         """
-        Assign the next handler if the incident is active.
-        Stops workflow if resolved/closed.
+        Route the incident to the next handler up its area's escalation
+        chain (see routing.py), or to the first one if it has none yet.
+        Stops workflow if resolved/closed or nobody is above.
         """
+        from . import routing
+
         if self.status in ["resolved", "closed"]:
             return
 
-        handler_list = list(self.handlers.all())
-        if not handler_list:
-            return  # No handlers assigned
-
-        if self.current_handler is None:
-            self.current_handler = handler_list[0]
-        else:
-            try:
-                current_index = handler_list.index(self.current_handler)
-                next_index = (current_index + 1) % len(handler_list)
-                self.current_handler = handler_list[next_index]
-            except ValueError:
-                self.current_handler = handler_list[0]
+        handler_id = routing.assign(self) if self.current_handler_id is None else routing.escalate(self)
+        if handler_id is None:
+            return
 
         with transaction.atomic():
-            self.save()
+            self.save(update_fields=["current_handler", "escalation_level"])
+            self.handlers.add(handler_id)
             self.notify_current_handler()
 
     def notify_current_handler(self):
@@ -130,11 +132,11 @@ class Response(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Trigger next handler assignment automatically when response is added,
-        only if incident is still active.
+        Assign the incident a first handler when a response is added to an
+        active, unhandled incident. Escalation is left to the escalate action.
         """
         super().save(*args, **kwargs)
-        if self.incident.status not in ["resolved", "closed"]:
+        if self.incident.current_handler_id is None and self.incident.status not in ["resolved", "closed"]:
             self.incident.alert_next_handler()
             
 class Witness(models.Model):
@@ -152,3 +154,26 @@ class Witness(models.Model):
     def __str__(self):
         return f"{self.name} - {self.phone}"
 
+
+class ArchivedIncidentCount(models.Model):
+    """
+    Archived incidents of one month grouped by status, type, location and
+    owners, written with each incident archive (see archive_cold_data) so
+    history reads never open the archive files. The scope fields mirror
+    Incident's, so the same jurisdiction filters apply.
+    """
+    manifest = models.ForeignKey("common.ArchiveManifest", on_delete=models.CASCADE, related_name="incident_counts")
+    month = models.DateField()
+    status = models.CharField(max_length=50)
+    incident_type = models.CharField(max_length=50)
+    area = models.ForeignKey(Area, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    location = models.ForeignKey(AdminUnit, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    reported_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    current_handler = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["month"])]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.status}/{self.incident_type}: {self.count}"
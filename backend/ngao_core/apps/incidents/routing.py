@@ -0,0 +1,112 @@
+# ngao_core/apps/incidents/routing.py
+"""
+Incident handler routing.
+
+Each Area has an escalation chain: the active officers posted to the area
+or one of its ancestors, grouped into ranks by role (ROLE_ORDER in
+utils.py) from the lowest up, e.g.
+
+    ((2, (<elder>,)), (4, (<chief>,)), (6, (<dcc>, <dcc>)))
+
+Chains are built with one query (an Area's path holds every ancestor id,
+see common.mixins.TreePathModel) and kept in the shared cache under the
+"routing" tag, which is invalidated whenever an officer profile, role or
+area changes. Routing an incident is then a walk of at most len(ROLE_ORDER)
+ranks of a cached tuple.
+
+`Incident.escalation_level` holds the rank of the current handler, not a
+position in the chain, so escalation stays correct when the chain is
+rebuilt in between. Within a rank the officer with the fewest open
+incidents gets the next one, nearest area first on a tie.
+"""
+import uuid
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from ngao_core.apps.accounts.models import CustomUser, OfficerProfile
+from ngao_core.apps.common.cache import cached
+from ngao_core.apps.geography.models import Area
+
+from .utils import ROLE_ORDER
+
+OPEN_STATUSES = ("reported", "dispatched", "on_scene", "urgent")
+
+_ROLE_NAMES = {rank: role for role, rank in ROLE_ORDER.items()}
+
+
+def role_rank(name):
+    """ROLE_ORDER rank of a Role name ("Assistant Chief" -> 3), or None for roles outside the hierarchy."""
+    return ROLE_ORDER.get("_".join((name or "").lower().replace("-", " ").split()))
+
+
+def role_name(rank):
+    return _ROLE_NAMES.get(rank, "")
+
+
+# ---------- Chains ----------
+def _build_chain(area_id):
+    path = Area.objects.filter(pk=area_id).values_list("path", flat=True).first()
+    if not path:
+        return ()
+    officers = OfficerProfile.objects.filter(
+        area_id__in=[uuid.UUID(segment) for segment in path.split("/") if segment],
+        is_active=True,
+        user__is_active=True,
+    ).values_list("user_id", "role__name", "area__path")
+
+    ranks = {}
+    for user_id, name, area_path in officers:
+        rank = role_rank(name)
+        # Citizens are never handlers
+        if rank is not None and rank > ROLE_ORDER["citizen"]:
+            ranks.setdefault(rank, []).append((-len(area_path), str(user_id), user_id))
+    return tuple(
+        (rank, tuple(user_id for *_, user_id in sorted(members)))
+        for rank, members in sorted(ranks.items())
+    )
+
+
+def chain(area_id):
+    """((rank, (user ids, nearest area first)), ...) for incidents in `area_id`, lowest rank first."""
+    if area_id is None:
+        return ()
+    return cached(
+        f"incidents:routing:{area_id}",
+        lambda: _build_chain(area_id),
+        ttl=settings.INCIDENT_ROUTING_TTL,
+        tags=("routing",),
+    )
+
+
+# ---------- Assignment ----------
+def least_loaded(user_ids):
+    """The active user among `user_ids` holding the fewest open incidents, or None."""
+    loads = dict(
+        CustomUser.objects.filter(pk__in=user_ids, is_active=True)
+        .annotate(load=Count("current_incidents", filter=Q(current_incidents__status__in=OPEN_STATUSES)))
+        .values_list("pk", "load")
+    )
+    return min((user_id for user_id in user_ids if user_id in loads), key=loads.get, default=None)
+
+
+def _route(incident, above):
+    for rank, user_ids in chain(incident.area_id):
+        if rank <= above:
+            continue
+        handler_id = least_loaded(user_ids)
+        if handler_id is not None:
+            incident.current_handler_id = handler_id
+            incident.escalation_level = rank
+            return handler_id
+    return None
+
+
+def assign(incident):
+    """Hand `incident` to the lowest rank of its area's chain; returns the handler's id or None. Does not save."""
+    return _route(incident, 0)
+
+
+def escalate(incident):
+    """Hand `incident` to the next rank above its current one; returns the handler's id or None. Does not save."""
+    return _route(incident, incident.escalation_level)
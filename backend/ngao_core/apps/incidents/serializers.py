@@ -5,8 +5,9 @@ from ngao_core.apps.admin_structure.serializers import AdminUnitSerializer
 from ngao_core.apps.geography.serializers import AreaSerializer
 from ngao_core.apps.admin_structure.models import AdminUnit
 from .models import Incident, Response, Witness
+from ngao_core.api.sparse import SparseFieldsMixin
 
-class ResponseSerializer(serializers.ModelSerializer):
+class ResponseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for incident response objects."""
     incident = serializers.SlugRelatedField(
         queryset=Incident.objects.all(),
@@ -18,7 +19,7 @@ class ResponseSerializer(serializers.ModelSerializer):
         model = Response
         fields = ["id", "incident", "responder", "comment", "timestamp"]
 
-class WitnessSerializer(serializers.ModelSerializer):
+class WitnessSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for incident response objects."""
 
     class Meta:
@@ -27,7 +28,7 @@ class WitnessSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class IncidentSerializer(serializers.ModelSerializer):
+class IncidentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Incident model.
     """
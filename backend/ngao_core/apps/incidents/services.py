@@ -1,12 +1,22 @@
-from .models import Incident
+from collections import Counter, defaultdict
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from ngao_core.apps.common.archive import read_archived
+from ngao_core.apps.common.models import ArchiveManifest
+
+from . import routing
+from .models import ArchivedIncidentCount, Incident
 from .utils import can_handle, get_next_status
 
 def advance_incident(incident_id: int, user):
     """
     Moves the incident to the next stage if the user has the right role.
     """
-    incident = Incident.objects.get(uid=incident_id)
-    user_role = user.role.lower()
+    incident = Incident.objects.get(id=incident_id)
+    rank = routing.role_rank(user.role.name if user.role_id else None)
+    user_role = routing.role_name(rank)
 
     if not can_handle(user_role, incident.status):
         raise PermissionError(
@@ -15,8 +25,54 @@ def advance_incident(incident_id: int, user):
 
     incident.status = get_next_status(incident.status)
     incident.current_handler = user
+    # Escalation continues from the advancing officer's rank
+    incident.escalation_level = rank
     incident.save()
     # Optionally trigger next handler assignment
     if hasattr(incident, "alert_next_handler"):
         incident.alert_next_handler()
     return incident
+
+
+def monthly_history(queryset, start, end, scope=None, allowed=None):
+    """
+    Incident counts per month in [start, end), by status and type, over the
+    live `queryset` plus the archived incidents (see common.archive).
+
+    Archived incidents come from the per-month ArchivedIncidentCount rows
+    matching the `scope` Q (all when None), so whole months are counted.
+    Archives written before those counts existed are read back and
+    filtered with the `allowed` row predicate (all when None).
+    """
+    months = defaultdict(lambda: {"total": 0, "by_status": Counter(), "by_type": Counter(), "archived": 0})
+
+    def add(key, status, incident_type, count, archived=False):
+        month = months[key]
+        month["total"] += count
+        month["by_status"][status] += count
+        month["by_type"][incident_type] += count
+        if archived:
+            month["archived"] += count
+
+    live = (
+        queryset.filter(date_reported__gte=start, date_reported__lt=end)
+        .annotate(month=TruncMonth("date_reported"))
+        .values("month", "status", "incident_type")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in live:
+        add(f"{row['month']:%Y-%m}", row["status"], row["incident_type"], row["count"])
+
+    counts = ArchivedIncidentCount.objects.filter(month__gte=start.date(), month__lt=end.date())
+    if scope is not None:
+        counts = counts.filter(scope)
+    for row in counts.values("month", "status", "incident_type").annotate(total=Sum("count")).order_by():
+        add(f"{row['month']:%Y-%m}", row["status"], row["incident_type"], row["total"], archived=True)
+
+    uncounted = ArchiveManifest.objects.filter(incident_counts__isnull=True)
+    for row in read_archived("incidents.Incident", start, end, manifests=uncounted):
+        if allowed is None or allowed(row):
+            add(f"{row['date_reported']:%Y-%m}", row["status"], row["incident_type"], 1, archived=True)
+
+    return [{"month": key, **months[key]} for key in sorted(months)]
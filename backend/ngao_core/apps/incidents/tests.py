@@ -0,0 +1,166 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ngao_core.apps.accounts.models import CustomUser, OfficerProfile, Role
+from ngao_core.apps.common import archive
+from ngao_core.apps.geography.models import Area
+
+from . import routing
+from .models import ArchivedIncidentCount, Incident, Response
+
+
+class RoutingTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        self.county = Area.objects.create(name="Nyeri", code="C-NY", area_type="county")
+        self.location = Area.objects.create(name="Karatina", code="L-KA", area_type="location", parent=self.county)
+        self.village = Area.objects.create(name="Gitunduti", code="V-GI", area_type="village", parent=self.location)
+        self.roles = {name: Role.objects.create(name=name) for name in ("Village Elder", "Chief", "DCC", "Clerk")}
+        self.officers = {}
+        for name, area, role in [("elder", self.village, "Village Elder"), ("chief_a", self.location, "Chief"),
+                                 ("chief_b", self.location, "Chief"), ("dcc", self.county, "DCC"),
+                                 ("clerk", self.location, "Clerk")]:
+            self.add_officer(name, area, role)
+
+    def add_officer(self, name, area, role):
+        n = len(self.officers) + 1
+        user = self.officers[name] = CustomUser.objects.create_user(email=f"{name}@example.com", password="pw")
+        return OfficerProfile.objects.create(
+            user=user, phone=f"+2547400000{n:02d}", badge_number=f"R{n}", id_number=f"RID{n}",
+            office_email=f"{name}@example.com", area=area, role=self.roles[role],
+        )
+
+    def report(self, area=None):
+        incident = Incident.objects.create(title="Fire", description=".", reporter_phone="0", area=area or self.village)
+        incident.alert_next_handler()
+        return incident
+
+    def test_chain_ranks_officers_by_role_up_the_area_tree(self):
+        chain = routing.chain(self.village.pk)
+        self.assertEqual([rank for rank, _ in chain], [2, 4, 6])
+        self.assertEqual(set(chain[1][1]), {self.officers["chief_a"].pk, self.officers["chief_b"].pk})
+        # The village elder is not on the chain of the location above it
+        self.assertEqual([rank for rank, _ in routing.chain(self.location.pk)], [4, 6])
+
+    def test_escalation_walks_the_chain_and_balances_equal_ranks(self):
+        incident = self.report()
+        self.assertEqual((incident.current_handler_id, incident.escalation_level), (self.officers["elder"].pk, 2))
+
+        incident.alert_next_handler()
+        first_chief = incident.current_handler_id
+        second = self.report(self.location)
+        self.assertEqual(second.escalation_level, 4)
+        self.assertNotEqual(second.current_handler_id, first_chief)
+
+        incident.alert_next_handler()
+        incident.alert_next_handler()
+        incident.refresh_from_db()
+        self.assertEqual((incident.current_handler_id, incident.escalation_level), (self.officers["dcc"].pk, 6))
+        self.assertEqual(incident.handlers.count(), 3)
+
+    def test_chain_is_rebuilt_when_an_officer_changes(self):
+        self.assertEqual(len(routing.chain(self.village.pk)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            OfficerProfile.objects.filter(user=self.officers["dcc"]).get().delete()
+        self.assertEqual([rank for rank, _ in routing.chain(self.village.pk)], [2, 4])
+
+    def test_escalate_endpoint(self):
+        incident = self.report()
+        self.client.force_authenticate(self.officers["elder"])
+        response = self.client.post(f"/api/incidents/escalate/{incident.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Incident escalated to chief")
+
+    def test_escalate_endpoint_checks_the_caller_and_never_closes(self):
+        other = Area.objects.create(name="Kisumu", code="C-KS", area_type="county")
+        self.add_officer("outsider", other, "DCC")
+        incident = self.report()
+        url = f"/api/incidents/escalate/{incident.pk}/"
+
+        self.client.force_authenticate(self.officers["outsider"])
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.force_authenticate(self.officers["dcc"])
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 200)
+        # Nobody above the DCC: the incident stays open with them
+        self.assertEqual(self.client.post(url).status_code, 409)
+        incident.refresh_from_db()
+        self.assertEqual((incident.status, incident.current_handler_id), ("reported", self.officers["dcc"].pk))
+
+        Incident.objects.filter(pk=incident.pk).update(status="resolved")
+        self.assertEqual(self.client.post(url).status_code, 409)
+
+    def test_responses_do_not_escalate_a_handled_incident(self):
+        incident = Incident.objects.create(title="Fire", description=".", reporter_phone="0", area=self.village)
+        Response.objects.create(incident=incident, responder=self.officers["clerk"], comment="On it")
+        self.assertEqual(incident.current_handler_id, self.officers["elder"].pk)
+        Response.objects.create(incident=incident, responder=self.officers["elder"], comment="At the scene")
+        incident.refresh_from_db()
+        self.assertEqual((incident.current_handler_id, incident.escalation_level), (self.officers["elder"].pk, 2))
+
+
+class HistoryTest(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        storage = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage)
+        archive._storage = None
+        self.addCleanup(setattr, archive, "_storage", None)
+        config = {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": storage}}
+        self.enterContext(override_settings(ARCHIVE_STORAGE=config))
+
+        nyeri = Area.objects.create(name="Nyeri", code="C-NY", area_type="county")
+        kisumu = Area.objects.create(name="Kisumu", code="C-KS", area_type="county")
+        self.staff = CustomUser.objects.create_user(email="staff@example.com", password="pw", is_staff=True)
+        self.officer = CustomUser.objects.create_user(email="nyeri@example.com", password="pw")
+        OfficerProfile.objects.create(
+            user=self.officer, phone="+254750000001", badge_number="H1", id_number="HID1",
+            office_email="nyeri@example.com", area=nyeri,
+        )
+        for area, status, incident_type in [(nyeri, "resolved", "fire"), (nyeri, "closed", "crime"),
+                                            (kisumu, "resolved", "fire")]:
+            Incident.objects.create(
+                title="Old", description=".", reporter_phone="0", area=area, status=status, incident_type=incident_type,
+            )
+        Incident.objects.update(date_reported=datetime.datetime(2024, 3, 10, tzinfo=datetime.timezone.utc))
+        call_command("archive_cold_data", only="incidents", months=1, stdout=StringIO())
+
+    def history(self, user):
+        caches["default"].clear()
+        caches["local"].clear()
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/incidents/history/?from=2024-03&to=2024-03")
+        self.assertEqual(response.status_code, 200)
+        return response.data["months"]
+
+    def test_archived_months_are_read_from_counts(self):
+        self.assertFalse(Incident.objects.exists())
+        self.assertTrue(ArchivedIncidentCount.objects.exists())
+        with mock.patch.object(archive, "_lines", side_effect=AssertionError("archive file opened")):
+            everything, nyeri = self.history(self.staff), self.history(self.officer)
+
+        self.assertEqual(everything[0]["month"], "2024-03")
+        self.assertEqual((everything[0]["total"], everything[0]["archived"]), (3, 3))
+        self.assertEqual(everything[0]["by_type"], {"fire": 2, "crime": 1})
+        self.assertEqual(nyeri[0]["total"], 2)
+        self.assertEqual(nyeri[0]["by_status"], {"resolved": 1, "closed": 1})
+
+    def test_archives_without_counts_are_read_back(self):
+        ArchivedIncidentCount.objects.all().delete()
+        self.assertEqual(self.history(self.staff)[0]["total"], 3)
+        self.assertEqual(self.history(self.officer)[0]["by_status"], {"resolved": 1, "closed": 1})
@@ -10,5 +10,5 @@ router.register("incidents", IncidentViewSet, basename="incident")
 urlpatterns = [
     path("", include(router.urls)),
     path("submit/", views.submit_incident, name="submit_incident"),
-    path("escalate/<int:incident_id>/", views.escalate_incident, name="escalate_incident"),
+    path("escalate/<uuid:incident_id>/", views.escalate_incident, name="escalate_incident"),
 ]
@@ -1,7 +1,10 @@
 from ngao_core.apps.accounts.permissions import IsCountyCommissioner
+from django.db import transaction
 from django.db.models import Count, Q
 from calendar import month_abbr
+from datetime import datetime, timezone as dt_timezone
 from django.db.models.functions import TruncMonth
+from django.conf import settings
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
@@ -26,10 +29,17 @@ from .models import Incident, Response, Witness
 from ngao_core.apps.geography.models import Area
 from .permissions import IsReporterOrAbove
 from .serializers import IncidentSerializer, ResponseSerializer
+from . import routing
+from ngao_core.api.queries import query_budget
+from ngao_core.api.scope import JurisdictionScopeMixin, jurisdiction_filter, jurisdiction_q
+from ngao_core.apps.common.cache import cached_view
+from ngao_core.apps.common.partitions import add_months, month_start
+from .services import monthly_history
+from ngao_core.api.sparse import SparseQuerysetMixin
 from ngao_core.apps.civil_registration.models import BirthRegistration, DeathRegistration, MarriageRegistration
 
 
-class IncidentViewSet(viewsets.ModelViewSet):
+class IncidentViewSet(JurisdictionScopeMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Incident.objects.all()
     serializer_class = IncidentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -48,23 +58,12 @@ class IncidentViewSet(viewsets.ModelViewSet):
         filters.SearchFilter,
     ]
     
-    def get_queryset(self):
-        """
-        Restrict ONLY the `list` action.
-        Other actions remain intact.
-        """
-        qs = super().get_queryset()
-        user = self.request.user
+    # Officers see incidents in their area / admin unit subtree, plus the
+    # ones they reported or are currently handling
+    scope_area_fields = ("area",)
+    scope_unit_fields = ("location",)
+    scope_owner_fields = ("reported_by", "current_handler")
 
-        # Only apply restriction when fetching ALL incidents
-        if self.action == "list":
-            if user.is_staff or user.is_superuser:
-                return qs
-            return qs.filter(reported_by=user)
-
-        return qs
-    
-    
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -132,8 +131,39 @@ class IncidentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(qs, many=True)
         return DRFResponse(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["get"], url_path="history")
+    @query_budget(10)
+    @cached_view(ttl=settings.DASHBOARD_CACHE_TTL, tags=("incidents", "archive"), vary_on_user=True)
+    def history(self, request):
+        """
+        Monthly incident counts for ?from=YYYY-MM&to=YYYY-MM (inclusive,
+        default the last 24 months), archived incidents included.
+        """
+        today = now().date()
+        default_from = add_months(month_start(today), -23)
+        try:
+            first = datetime.strptime(request.query_params.get("from", f"{default_from:%Y-%m}"), "%Y-%m")
+            last = datetime.strptime(request.query_params.get("to", f"{today:%Y-%m}"), "%Y-%m")
+        except ValueError:
+            raise ValidationError({"detail": "from and to must be YYYY-MM."})
+
+        start = first.replace(tzinfo=dt_timezone.utc)
+        end = datetime.combine(add_months(last.date(), 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+        # ArchivedIncidentCount has the same scope fields as Incident
+        fields = (self.scope_area_fields, self.scope_unit_fields, self.scope_owner_fields)
+        scope = jurisdiction_q(request.user, *fields)
+        allowed = jurisdiction_filter(request.user, *fields)
+        return DRFResponse(
+            {
+                "from": f"{first:%Y-%m}",
+                "to": f"{last:%Y-%m}",
+                "months": monthly_history(self.get_queryset(), start, end, scope, allowed),
+            }
+        )
+
     # Dashboard stats
     @action(detail=False, methods=["get"], url_path="dashboard-stats")
+    @cached_view(ttl=settings.DASHBOARD_CACHE_TTL, tags=("incidents", "registrations"), vary_on_user=True)
     def dashboard_stats(self, request):
         user = request.user
         today = now().date()
@@ -317,35 +347,11 @@ class ResponseViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(responder=self.request.user)
 
-        @api_view(["POST"])
-        @permission_classes([IsAuthenticated])
-        def submit_incident(request):
-            data = request.data
-            user = request.user
-
-        village_elder = CustomUser.objects.filter(
-            role="village_elder", location=user.location
-        ).first()
-        
-        admin_unit = AdminUnit.objects.filter(id=data.get("location")).first()
-
-        incident = Incident.objects.create(
-            title=data.get("title"),
-            description=data.get("description"),
-            incident_type=data.get("incident_type"),
-            reporter_phone=data.get("reporter_phone"),
-            location=admin_unit,
-            reported_by=user,
-            current_handler=village_elder,
-        )
-
-        serializer = IncidentSerializer(incident)
-        return DRFResponse(serializer.data)
-
 
 class DashboardStats(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @cached_view(ttl=settings.DASHBOARD_CACHE_TTL, tags=("incidents",), vary_on_user=True)
     def get(self, request):
         user = request.user
         today = now().date()
@@ -403,126 +409,60 @@ class DashboardStats(APIView):
         )
 
 
-class IncidentListView(generics.ListAPIView):
+class IncidentListView(JurisdictionScopeMixin, generics.ListAPIView):
     queryset = Incident.objects.all()
     serializer_class = IncidentSerializer
-
-
-# Helper function to get next handler
-ROLE_HIERARCHY = ["assistant_chief", "chief", "acc", "dcc", "cc", "rc", "ps_cs"]
-
-
-def get_next_handler(incident):
-    try:
-        next_level = incident.escalation_level + 1
-        role = ROLE_HIERARCHY[next_level]
-        return CustomUser.objects.filter(
-            role=role, location=incident.created_by.location
-        ).first()
-    except IndexError:
-        return None
-
-
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def submit_incident(request):
-    user = request.user
-    data = request.data
-    village_elder = CustomUser.objects.filter(
-        role="village_elder", location=user.location
-    ).first()
-
-    incident = Incident.objects.create(
-        title=data.get("title"),
-        description=data.get("description"),
-        created_by=user,
-        current_handler=village_elder,
-    )
-    serializer = IncidentSerializer(incident)
-    return DRFResponse(serializer.data)
-
-
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def escalate_incident(request, incident_id):
-    try:
-        incident = Incident.objects.get(id=incident_id)
-    except Incident.DoesNotExist:
-        return Response({"error": "Incident not found"}, status=404)
-
-    next_handler = get_next_handler(incident)
-    if next_handler:
-        incident.current_handler = next_handler
-        incident.escalation_level += 1
-        incident.status = "escalated"
-        incident.save()
-        return Response({"message": f"Incident escalated to {next_handler.role}"})
-    else:
-        incident.status = "closed"
-        incident.current_handler = None
-        incident.save()
-        return DRFResponse({"message": "Incident closed, no further escalation"})
+    scope_area_fields = ("area",)
+    scope_unit_fields = ("location",)
+    scope_owner_fields = ("reported_by", "current_handler")
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def submit_incident(request):
     """
-    Create an incident and assign the first handler automatically.
+    Create an incident and route it to the first handler of its area's
+    escalation chain.
     """
-    user = request.user
     data = request.data
+    area = None
+    if data.get("area"):
+        try:
+            area = Area.objects.get(id=data["area"])
+        except Area.DoesNotExist:
+            raise ValidationError({"area": "Selected area does not exist."})
+    location = AdminUnit.objects.filter(id=data.get("location")).first() if data.get("location") else None
 
-    # Assign the village_elder as first handler
-    village_elder = CustomUser.objects.filter(
-        role="village_elder", location=user.location
-    ).first()
-
-    incident = Incident.objects.create(
-        title=data.get("title"),
-        description=data.get("description"),
-        reported_by=user,
-        current_handler=village_elder,
-    )
-
-    serializer = IncidentSerializer(incident)
-    return DRFResponse(serializer.data)
-
-
-def get_next_handler(incident):
-    """
-    Determine the next handler in the escalation hierarchy.
-    """
-    try:
-        next_level = incident.escalation_level + 1
-        role = ROLE_HIERARCHY[next_level]
-        return CustomUser.objects.filter(
-            role=role, location=incident.reported_by.location
-        ).first()
-    except (IndexError, AttributeError):
-        return None
+    serializer = IncidentSerializer(data=data, context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    serializer.save(reported_by=request.user, area=area, location=location)
+    return DRFResponse(serializer.data, status=status.HTTP_201_CREATED)
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def escalate_incident(request, incident_uid):
+def escalate_incident(request, incident_id):
     """
-    Escalate an incident to the next handler.
+    Escalate an incident to the next rank of its area's escalation chain.
+    Only its current handler or an officer whose jurisdiction covers it may
+    escalate; an incident at the top of its chain stays with its handler.
     """
-    try:
-        incident = Incident.objects.get(uid=incident_uid)
-    except Incident.DoesNotExist:
+    incident = Incident.objects.filter(id=incident_id).first()
+    if incident is None:
         return DRFResponse({"error": "Incident not found"}, status=404)
 
-    next_handler = get_next_handler(incident)
-    if next_handler:
-        incident.current_handler = next_handler
-        incident.escalation_level = getattr(incident, "escalation_level", 0) + 1
-        incident.status = "escalated"
-        incident.save()
-        return DRFResponse({"message": f"Incident escalated to {next_handler.role}"})
-    else:
-        incident.status = "closed"
-        incident.current_handler = None
-        incident.save()
-        return DRFResponse({"message": "Incident closed, no further escalation"})
+    allowed = jurisdiction_q(request.user, ("area",), ("location",), ("current_handler",))
+    if allowed is not None and not Incident.objects.filter(allowed, pk=incident.pk).exists():
+        return DRFResponse({"error": "You cannot escalate this incident"}, status=403)
+    if incident.status in ("resolved", "closed"):
+        return DRFResponse({"error": f"Incident is already {incident.status}"}, status=409)
+
+    handler_id = routing.escalate(incident)
+    if handler_id is None:
+        return DRFResponse({"error": "No officer above the current handler to escalate to"}, status=409)
+
+    with transaction.atomic():
+        incident.save(update_fields=["current_handler", "escalation_level"])
+        incident.handlers.add(handler_id)
+    incident.notify_current_handler()
+    return DRFResponse({"message": f"Incident escalated to {routing.role_name(incident.escalation_level)}"})
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import ChangeLog
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(admin.ModelAdmin):
+    list_display = ("seq", "model", "object_id", "op", "txid", "changed_at")
+    list_filter = ("model", "op")
+    search_fields = ("object_id",)
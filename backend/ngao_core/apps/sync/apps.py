@@ -0,0 +1,12 @@
+# ngao_core/apps/sync/apps.py
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    name = "ngao_core.apps.sync"
+    verbose_name = "Mobile Sync"
+
+    def ready(self):
+        from .registry import register_defaults
+        register_defaults()
+        import ngao_core.apps.sync.signals
@@ -0,0 +1,19 @@
+# ngao_core/apps/sync/management/commands/prune_sync_log.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ngao_core.apps.sync.services import prune
+
+
+class Command(BaseCommand):
+    help = "Delete sync change log rows older than the token retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = prune(timezone.now() - timedelta(days=options["days"]))
+        self.stdout.write(f"Deleted {deleted} change log rows")
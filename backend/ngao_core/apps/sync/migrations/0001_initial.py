@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:10
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(db_default=django.db.models.expressions.Func(function='txid_current', output_field=models.BigIntegerField()), db_index=True)),
+                ('model', models.CharField(max_length=40)),
+                ('object_id', models.CharField(max_length=64)),
+                ('op', models.CharField(choices=[('u', 'Upsert'), ('d', 'Delete')], default='u', max_length=1)),
+                ('changed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'object_id'], name='sync_change_model_b5df7f_idx')],
+            },
+        ),
+    ]
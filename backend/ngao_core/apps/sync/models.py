@@ -0,0 +1,40 @@
+# ngao_core/apps/sync/models.py
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import Func
+
+
+class ChangeLog(models.Model):
+    """
+    One row per change to a syncable object.
+
+    `seq` orders changes; `txid` is the writing transaction, which lets the
+    sync endpoint hand out tokens that never skip a change committed late
+    by a long-running transaction. `area_path`, `unit_path` and `owners`
+    record the object's jurisdiction at the time of the change, so a device
+    is only told about changes it is allowed to see.
+    """
+    UPSERT = "u"
+    DELETE = "d"
+    OP_CHOICES = ((UPSERT, "Upsert"), (DELETE, "Delete"))
+
+    seq = models.BigAutoField(primary_key=True)
+    txid = models.BigIntegerField(
+        db_default=Func(function="txid_current", output_field=models.BigIntegerField()),
+        db_index=True,
+    )
+    model = models.CharField(max_length=40)
+    object_id = models.CharField(max_length=64)
+    op = models.CharField(max_length=1, choices=OP_CHOICES, default=UPSERT)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    area_path = models.CharField(max_length=512, blank=True, default="")
+    unit_path = models.CharField(max_length=512, blank=True, default="")
+    owners = ArrayField(models.CharField(max_length=64), blank=True, default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.seq} {self.op} {self.model}:{self.object_id}"
@@ -0,0 +1,148 @@
+# ngao_core/apps/sync/registry.py
+"""
+Models exposed to the mobile app through /api/sync/.
+
+Each model is registered under a short alias with the columns the app
+needs; deltas ship those columns only, as positional rows. Models with
+scope fields are limited to the caller's jurisdiction, the same way as
+their list endpoints (see api.scope).
+"""
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db.models import CharField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+from ngao_core.api.scope import jurisdiction_q
+
+from .models import ChangeLog
+
+_registry = {}
+_aliases = {}
+
+
+@dataclass(frozen=True)
+class SyncSpec:
+    alias: str
+    model: type
+    fields: tuple
+    area_fields: tuple = ()
+    unit_fields: tuple = ()
+    owner_fields: tuple = ()
+
+    @property
+    def scoped(self):
+        return bool(self.area_fields or self.unit_fields or self.owner_fields)
+
+    def rows(self, ids, user):
+        """Current values of `fields` for the given primary keys within `user`'s jurisdiction, as lists."""
+        queryset = self.model._default_manager.filter(pk__in=ids)
+        if self.scoped:
+            q = jurisdiction_q(user, self.area_fields, self.unit_fields, self.owner_fields)
+            if q is not None:
+                queryset = queryset.filter(q)
+        values = queryset.values_list(*self.fields)
+        return [[_plain(value) for value in row] for row in values]
+
+    def scopes(self, ids, with_logged=False):
+        """
+        {pk: (area path, unit path, owner ids)} for the given primary keys, as
+        stored on their change log entries. Registered models have at most one
+        area and one unit field, so the first non-empty path of each is kept.
+
+        With `with_logged`, returns (scopes, logged): `logged` holds the scope
+        on each object's latest change log entry, read in the same query.
+        """
+        if not self.scoped:
+            return ({}, {}) if with_logged else {}
+        area = [f"{field}__path" for field in self.area_fields]
+        unit = [f"{field}__path" for field in self.unit_fields]
+        queryset = self.model._default_manager.filter(pk__in=ids)
+        logged_columns = []
+        if with_logged:
+            latest = ChangeLog.objects.filter(
+                model=self.alias, object_id=Cast(OuterRef("pk"), CharField())
+            ).order_by("-seq")
+            logged_columns = ["logged_area", "logged_unit", "logged_owners"]
+            queryset = queryset.annotate(**{
+                name: Subquery(latest.values(column)[:1])
+                for name, column in zip(logged_columns, ("area_path", "unit_path", "owners"))
+            })
+        rows = queryset.values_list("pk", *area, *unit, *self.owner_fields, *logged_columns)
+
+        scopes, logged = {}, {}
+        for pk, *values in rows:
+            if with_logged:
+                *values, logged_area, logged_unit, logged_owners = values
+                if logged_area is not None:
+                    logged[str(pk)] = (logged_area, logged_unit, sorted(logged_owners))
+            areas, units = values[:len(area)], values[len(area):len(area) + len(unit)]
+            owners = values[len(area) + len(unit):]
+            scopes[str(pk)] = (
+                next((path for path in areas if path), ""),
+                next((path for path in units if path), ""),
+                sorted({str(owner) for owner in owners if owner}),
+            )
+        return (scopes, logged) if with_logged else scopes
+
+
+def register(alias, model, fields, area_fields=(), unit_fields=(), owner_fields=()):
+    spec = SyncSpec(
+        alias=alias, model=model, fields=tuple(fields), area_fields=tuple(area_fields),
+        unit_fields=tuple(unit_fields), owner_fields=tuple(owner_fields),
+    )
+    _registry[alias] = spec
+    _aliases[model] = alias
+    return spec
+
+
+def get_spec(alias):
+    return _registry.get(alias)
+
+
+def alias_for(model):
+    return _aliases.get(model)
+
+
+def all_specs():
+    return list(_registry.values())
+
+
+def _plain(value):
+    # Geometry columns go over the wire as bare coordinates
+    if hasattr(value, "coords"):
+        return value.coords
+    return value
+
+
+def register_defaults():
+    # Areas are shared reference data; everything else follows its list
+    # endpoint's scope, and responses and witnesses their incident's
+    incident_owners = ["incident__reported_by", "incident__current_handler"]
+    register("area", apps.get_model("geography", "Area"), [
+        "id", "name", "code", "area_type", "parent_id", "latitude", "longitude", "updated_at",
+    ])
+    register("incident", apps.get_model("incidents", "Incident"), [
+        "id", "title", "description", "incident_type", "status", "area_id", "location_id",
+        "coordinates", "reporter_name", "reporter_phone", "current_handler_id",
+        "reported_by_id", "date_reported", "date_resolved",
+    ], area_fields=["area"], unit_fields=["location"], owner_fields=["reported_by", "current_handler"])
+    register("response", apps.get_model("incidents", "Response"), [
+        "id", "incident_id", "responder_id", "comment", "timestamp",
+    ], area_fields=["incident__area"], unit_fields=["incident__location"],
+        owner_fields=[*incident_owners, "responder"])
+    register("witness", apps.get_model("incidents", "Witness"), [
+        "id", "incident_id", "name", "phone", "email", "statement", "id_number", "updated_at",
+    ], area_fields=["incident__area"], unit_fields=["incident__location"], owner_fields=incident_owners)
+    register("birth", apps.get_model("civil_registration", "BirthRegistration"), [
+        "id", "reference_number", "status", "child_id", "mother_id", "father_id",
+        "place_of_birth", "date_of_birth", "gender", "area_id", "approved_at", "created_at",
+    ], area_fields=["area"], owner_fields=["initiated_by"])
+    register("death", apps.get_model("civil_registration", "DeathRegistration"), [
+        "id", "reference_number", "status", "citizen_id", "date_of_death", "place_of_death",
+        "cause_of_death", "age", "area_id", "approved_at", "created_at",
+    ], area_fields=["area"], owner_fields=["initiated_by"])
+    register("marriage", apps.get_model("civil_registration", "MarriageRegistration"), [
+        "id", "reference_number", "status", "spouse_1_id", "spouse_2_id", "date_of_marriage",
+        "place_of_marriage", "venue_of_marriage", "area_id", "approved_at",
+    ], area_fields=["area"], owner_fields=["initiated_by"])
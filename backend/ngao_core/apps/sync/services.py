@@ -0,0 +1,169 @@
+# ngao_core/apps/sync/services.py
+"""
+Change tracking and delta computation for mobile sync.
+
+Sync tokens are built from the Postgres snapshot xmin: every transaction
+with a lower id had finished when the token was issued, so "changes written
+by transactions >= token" can never miss a row committed late. The price
+is that changes from transactions still in flight at issue time may be
+sent twice, which is harmless because deltas are idempotent upserts.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from ngao_core.api.scope import get_jurisdiction
+
+from .models import ChangeLog
+from .registry import all_specs, get_spec
+
+_NO_SCOPE = ("", "", [])
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def record_change(alias, object_id, op=ChangeLog.UPSERT, scope=None):
+    record_changes(alias, [object_id], op, scopes={str(object_id): scope} if scope else None)
+
+
+def record_changes(alias, object_ids, op=ChangeLog.UPSERT, scopes=None):
+    """
+    Log changes made without model signals (bulk_create, update(), raw SQL).
+
+    Each entry carries the object's jurisdiction. Upserts read it from the
+    rows; deletes use `scopes` when the caller captured it before deleting,
+    else the last logged one. An object whose jurisdiction changed also gets
+    a tombstone under the old one, which removes it from devices it left.
+    """
+    ids = [str(pk) for pk in object_ids]
+    if not ids:
+        return
+    spec = get_spec(alias)
+    scoped = bool(spec and spec.scoped)
+    if op == ChangeLog.UPSERT:
+        current, previous = spec.scopes(ids, with_logged=True) if scoped else ({}, {})
+        # Rows already gone (raw SQL deletes) can only be traced through the log
+        gone = [pk for pk in ids if pk not in current]
+        if scoped and gone:
+            previous.update(_logged_scopes(alias, gone))
+    else:
+        captured = scopes or {}
+        unknown = [pk for pk in ids if pk not in captured]
+        current = {**(_logged_scopes(alias, unknown) if scoped and unknown else {}), **captured}
+        previous = {}
+
+    entries = []
+    for pk in ids:
+        scope = current.get(pk, _NO_SCOPE)
+        if op == ChangeLog.UPSERT and previous.get(pk, scope) != scope:
+            entries.append(_entry(alias, pk, ChangeLog.DELETE, previous[pk]))
+        entries.append(_entry(alias, pk, op, scope))
+    ChangeLog.objects.bulk_create(entries, batch_size=1000)
+
+
+def _entry(alias, object_id, op, scope):
+    area_path, unit_path, owners = scope
+    return ChangeLog(
+        model=alias, object_id=object_id, op=op,
+        area_path=area_path, unit_path=unit_path, owners=list(owners),
+    )
+
+
+def _logged_scopes(alias, ids):
+    latest = (
+        ChangeLog.objects.filter(model=alias, object_id__in=ids)
+        .order_by("object_id", "-seq")
+        .distinct("object_id")
+        .values_list("object_id", "area_path", "unit_path", "owners")
+    )
+    return {pk: (area_path, unit_path, sorted(owners)) for pk, area_path, unit_path, owners in latest}
+
+
+def visible_changes_q(user):
+    """Q matching change log entries inside `user`'s jurisdiction, or None when unrestricted."""
+    jurisdiction = get_jurisdiction(user)
+    if jurisdiction is None:
+        return None
+    area_path, unit_path = jurisdiction
+    q = Q(model__in=[spec.alias for spec in all_specs() if not spec.scoped]) | Q(owners__contains=[str(user.pk)])
+    if area_path:
+        q |= Q(area_path__startswith=area_path)
+    if unit_path:
+        q |= Q(unit_path__startswith=unit_path)
+    return q
+
+
+def current_token():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        xmin = cursor.fetchone()[0]
+    return f"{xmin}-{int(time.time())}"
+
+
+def parse_token(token):
+    try:
+        txid, issued = (int(part) for part in token.split("-"))
+    except (AttributeError, ValueError):
+        raise InvalidToken("Malformed sync token")
+    return txid, issued
+
+
+def changes_since(token, user):
+    """
+    Returns {"token", "reset", "changes"} for `user`. `reset` means the
+    device is too far behind (token older than the log retention, or more
+    than SYNC_MAX_CHANGES objects changed) and must re-download everything.
+
+    Only changes logged inside the user's jurisdiction are considered, so
+    the limit counts what the device would actually receive. A row that
+    has just left their jurisdiction is sent as a tombstone, because its
+    move was logged as a delete under the old jurisdiction.
+    """
+    new_token = current_token()
+    if not token:
+        return {"token": new_token, "reset": True, "changes": {}}
+
+    since, issued = parse_token(token)
+    if time.time() - issued > settings.SYNC_RETENTION_DAYS * 86400:
+        return {"token": new_token, "reset": True, "changes": {}}
+
+    candidates = ChangeLog.objects.filter(txid__gte=since)
+    visible = visible_changes_q(user)
+    if visible is not None:
+        candidates = candidates.filter(visible)
+
+    limit = settings.SYNC_MAX_CHANGES
+    # Latest change per object only: ten edits to an incident ship as one row
+    latest = list(
+        candidates.order_by("model", "object_id", "-seq")
+        .distinct("model", "object_id")
+        .values_list("model", "object_id", "op")[: limit + 1]
+    )
+    if len(latest) > limit:
+        return {"token": new_token, "reset": True, "changes": {}}
+
+    grouped = {}
+    for alias, object_id, op in latest:
+        bucket = grouped.setdefault(alias, {"upserts": [], "deleted": []})
+        bucket["upserts" if op == ChangeLog.UPSERT else "deleted"].append(object_id)
+
+    changes = {}
+    for alias, bucket in grouped.items():
+        spec = get_spec(alias)
+        if spec is None:
+            continue
+        rows = spec.rows(bucket["upserts"], user) if bucket["upserts"] else []
+        # Rows removed without a signal (raw SQL) reach devices as tombstones
+        present = {str(row[0]) for row in rows}
+        deleted = bucket["deleted"] + [pk for pk in bucket["upserts"] if pk not in present]
+        changes[alias] = {"fields": spec.fields, "rows": rows, "deleted": deleted}
+
+    return {"token": new_token, "reset": False, "changes": changes}
+
+
+def prune(older_than):
+    return ChangeLog.objects.filter(changed_at__lt=older_than).delete()[0]
@@ -0,0 +1,31 @@
+# ngao_core/apps/sync/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import ChangeLog
+from .registry import alias_for, get_spec
+from .services import record_change
+
+
+@receiver(post_save)
+def log_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    alias = alias_for(sender)
+    if alias:
+        record_change(alias, instance.pk)
+
+
+@receiver(pre_delete)
+def capture_scope(sender, instance, **kwargs):
+    # The row is gone by post_delete; its tombstone needs its jurisdiction
+    alias = alias_for(sender)
+    if alias:
+        instance._sync_scope = get_spec(alias).scopes([instance.pk]).get(str(instance.pk))
+
+
+@receiver(post_delete)
+def log_delete(sender, instance, **kwargs):
+    alias = alias_for(sender)
+    if alias:
+        record_change(alias, instance.pk, op=ChangeLog.DELETE, scope=getattr(instance, "_sync_scope", None))
@@ -0,0 +1,114 @@
+import datetime
+
+from django.test import TestCase, override_settings
+
+from ngao_core.apps.accounts.models import CustomUser, OfficerProfile
+from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.apps.civil_registration.models import DeathRegistration
+from ngao_core.apps.geography.models import Area
+
+from .services import changes_since, current_token, record_changes
+
+
+class SyncTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(email="admin@example.com", password="pw", is_staff=True)
+
+    def make_death(self, **kwargs):
+        citizen = Citizen.objects.create(
+            first_name="Amina", last_name="Njeri", gender="F",
+            date_of_birth=datetime.date(1950, 1, 1), place_of_birth="Nyeri",
+        )
+        return DeathRegistration.objects.create(
+            citizen=citizen, date_of_death=datetime.date(2025, 3, 1), place_of_death="Nyeri", **kwargs
+        )
+
+    def make_officer(self, area):
+        user = CustomUser.objects.create_user(email="officer@example.com", password="pw")
+        OfficerProfile.objects.create(
+            user=user, phone="+254710000001", badge_number="S1", id_number="SID1",
+            office_email="officer@example.com", area=area,
+        )
+        return user
+
+    def test_first_sync_resets(self):
+        delta = changes_since(None, self.admin)
+        self.assertTrue(delta["reset"])
+        self.assertTrue(delta["token"])
+
+    def test_deltas_are_compacted_and_include_tombstones(self):
+        token = current_token()
+        death = self.make_death()
+        death.place_of_death = "Karatina"
+        death.save()
+        gone = self.make_death()
+        gone_id = str(gone.id)
+        gone.delete()
+
+        delta = changes_since(token, self.admin)
+
+        self.assertFalse(delta["reset"])
+        deaths = delta["changes"]["death"]
+        self.assertEqual(len(deaths["rows"]), 1)
+        row = dict(zip(deaths["fields"], deaths["rows"][0]))
+        self.assertEqual(row["place_of_death"], "Karatina")
+        self.assertEqual(deaths["deleted"], [gone_id])
+
+    def test_bulk_changes_without_rows_become_tombstones(self):
+        token = current_token()
+        record_changes("death", ["00000000-0000-0000-0000-000000000000"])
+        delta = changes_since(token, self.admin)
+        self.assertEqual(delta["changes"]["death"]["deleted"], ["00000000-0000-0000-0000-000000000000"])
+
+    def test_changes_outside_the_jurisdiction_are_not_sent(self):
+        clerk = CustomUser.objects.create_user(email="clerk@example.com", password="pw")
+        token = current_token()
+        theirs = self.make_death()
+        theirs.initiated_by = clerk
+        theirs.save()
+        self.make_death()
+
+        deaths = changes_since(token, clerk)["changes"]["death"]
+        self.assertEqual([row[0] for row in deaths["rows"]], [theirs.id])
+        self.assertEqual(deaths["deleted"], [])
+
+    def test_rows_leaving_the_jurisdiction_become_tombstones(self):
+        nyeri = Area.objects.create(name="Nyeri", code="NYR", area_type="county")
+        kisumu = Area.objects.create(name="Kisumu", code="KSM", area_type="county")
+        officer = self.make_officer(nyeri)
+        death = self.make_death(area=nyeri)
+        token = current_token()
+        death.area = kisumu
+        death.save()
+
+        deaths = changes_since(token, officer)["changes"]["death"]
+        self.assertEqual(deaths["rows"], [])
+        self.assertEqual(deaths["deleted"], [str(death.id)])
+        # Whoever can see both areas just gets the update
+        self.assertEqual(len(changes_since(token, self.admin)["changes"]["death"]["rows"]), 1)
+
+    def test_rows_deleted_without_signals_reach_their_jurisdiction(self):
+        nyeri = Area.objects.create(name="Nyeri", code="NYR", area_type="county")
+        officer = self.make_officer(nyeri)
+        death = self.make_death(area=nyeri)
+        token = current_token()
+        DeathRegistration.objects.filter(pk=death.pk)._raw_delete("default")
+        record_changes("death", [death.pk])
+
+        self.assertEqual(changes_since(token, officer)["changes"]["death"]["deleted"], [str(death.id)])
+
+    @override_settings(SYNC_MAX_CHANGES=3)
+    def test_limit_counts_only_changes_in_the_jurisdiction(self):
+        nyeri = Area.objects.create(name="Nyeri", code="NYR", area_type="county")
+        kisumu = Area.objects.create(name="Kisumu", code="KSM", area_type="county")
+        officer = self.make_officer(nyeri)
+        token = current_token()
+        for _ in range(3):
+            self.make_death(area=kisumu)
+        mine = self.make_death(area=nyeri)
+
+        # Everything runs in the test transaction, so both areas count too
+        self.assertTrue(changes_since(token, self.admin)["reset"])
+        delta = changes_since(token, officer)
+        self.assertFalse(delta["reset"])
+        self.assertEqual([row[0] for row in delta["changes"]["death"]["rows"]], [mine.id])
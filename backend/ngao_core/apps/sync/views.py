@@ -0,0 +1,30 @@
+# ngao_core/apps/sync/views.py
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ngao_core.apps.common.routers import PRIMARY
+
+from .services import InvalidToken, changes_since
+
+
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<token>
+
+    Without `since` (first launch) returns a token and reset=true. With a
+    token, returns the latest state of every object in the caller's
+    jurisdiction changed since then:
+    {alias: {"fields": [...], "rows": [[...]], "deleted": [ids]}}.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # Sync tokens are primary positions; a lagging replica would skip changes
+    db_route = PRIMARY
+    # A few queries per synced model, however many rows changed
+    query_budget = 40
+
+    def get(self, request):
+        try:
+            return Response(changes_since(request.query_params.get("since"), request.user))
+        except InvalidToken as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
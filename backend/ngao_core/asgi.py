@@ -0,0 +1,16 @@
+"""
+ASGI config for ngao_core project.
+
+It exposes the ASGI callable as a module-level variable named "application".
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ngao_core.settings.dev")
+
+application = get_asgi_application()
@@ -0,0 +1,10 @@
+# ngao_core/benchmark/__init__.py
+"""
+API benchmark suite.
+
+`manage.py bench_seed` fills an empty database with a seeded, national-scale
+dataset (dataset.py); `manage.py bench_api` drives the key endpoints against
+it and reports latency percentiles, throughput and query counts (load.py).
+The same seed and options always produce the same rows and the same request
+sequence, so results from different commits are comparable.
+"""
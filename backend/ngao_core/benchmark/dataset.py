@@ -0,0 +1,323 @@
+# ngao_core/benchmark/dataset.py
+"""
+Seeded synthetic dataset.
+
+Everything is derived from one random.Random(seed): ids, names, places and
+timestamps (relative to `anchor`), so two runs with the same options insert
+identical rows. Citizens are never held in memory: the id and gender of
+citizen n are functions of n, which is how registrations refer to them.
+"""
+import datetime
+import random
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+
+from ngao_core.apps.accounts.models import CustomUser, OfficerProfile, Role
+from ngao_core.apps.citizen_repo.models import Citizen
+from ngao_core.apps.civil_registration.models import BirthRegistration, DeathRegistration
+from ngao_core.apps.geography.models import Area
+from ngao_core.apps.incidents.models import Incident, Response, Witness
+
+ROOT_CODE = "BENCH"
+EMAIL_DOMAIN = "bench.local"
+PASSWORD = "bench"
+BATCH_SIZE = 5000
+
+LEVELS = [area_type for area_type, _ in Area.AREA_TYPES]
+# Children per area below each level: 8 regions, 48 counties, 288 sub
+# counties ... 51,840 villages
+DEFAULT_FANOUT = (8, 6, 6, 3, 4, 3, 5)
+DEFAULT_OFFICER_LEVELS = ("county", "sub_county")
+
+# Kenya's bounding box
+LATITUDE = (-4.7, 5.0)
+LONGITUDE = (33.9, 41.9)
+
+FIRST_NAMES = {
+    "M": ["John", "Peter", "Joseph", "David", "Samuel", "Daniel", "James", "Kevin", "Brian", "Collins",
+          "Otieno", "Kamau", "Mwangi", "Kiprop", "Wafula", "Mutua", "Omondi", "Njoroge", "Kibet", "Barasa"],
+    "F": ["Mary", "Grace", "Faith", "Mercy", "Esther", "Jane", "Ann", "Joyce", "Purity", "Sharon",
+          "Akinyi", "Wanjiru", "Njeri", "Chebet", "Nafula", "Mwikali", "Atieno", "Wambui", "Jepkosgei", "Nekesa"],
+}
+LAST_NAMES = [
+    "Ochieng", "Kariuki", "Mutai", "Wekesa", "Musyoka", "Odhiambo", "Kimani", "Rotich", "Simiyu", "Kilonzo",
+    "Onyango", "Maina", "Korir", "Wanyama", "Ndungu", "Owino", "Githinji", "Langat", "Makokha", "Mwende",
+    "Abdi", "Hassan", "Mohamed", "Lekishon", "Ekai", "Lokiru", "Nyaga", "Gitau", "Chege", "Opiyo",
+]
+INCIDENT_STATUSES = (("reported", 20), ("dispatched", 10), ("on_scene", 5), ("resolved", 40), ("closed", 20), ("urgent", 5))
+INCIDENT_TYPES = (("crime", 35), ("accident", 25), ("medical", 20), ("fire", 5), ("other", 15))
+
+
+def citizen_id(seed, n):
+    return uuid.uuid5(uuid.NAMESPACE_OID, f"ngao-bench:{seed}:citizen:{n}")
+
+
+def citizen_gender(n):
+    return "F" if n % 2 else "M"
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create write the given auto_now / auto_now_add fields as set."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def exists():
+    return Area.objects.filter(code=ROOT_CODE).exists()
+
+
+class Generator:
+    def __init__(self, seed, anchor, log=print):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.anchor = datetime.datetime.combine(anchor, datetime.time.min, tzinfo=datetime.timezone.utc)
+        self.log = log
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def weighted(self, choices):
+        values, weights = zip(*choices)
+        return self.rng.choices(values, weights)[0]
+
+    def moment(self, days):
+        """A timestamp within `days` before the anchor."""
+        return self.anchor - datetime.timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def phone(self):
+        return f"+2547{self.rng.randrange(10 ** 8):08d}"
+
+    # ---------- Entry point ----------
+    def run(self, fanout=DEFAULT_FANOUT, officer_levels=DEFAULT_OFFICER_LEVELS, citizens=2_000_000,
+            births=100_000, deaths=20_000, incidents=300_000, responses=2, witnesses=1, days=730):
+        # Each step commits on its own; a failed run is cleaned up by reseeding a fresh database
+        with transaction.atomic():
+            villages = self.areas(fanout, officer_levels)
+        self.citizens(citizens, births, deaths, villages, days)
+        self.registrations(citizens, births, deaths, villages, days)
+        self.incidents(incidents, responses, witnesses, villages, days)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    # ---------- Areas and officers ----------
+    def areas(self, fanout, officer_levels):
+        """Build the tree and its officers; returns (village, officer user id) pairs."""
+        if len(fanout) != len(LEVELS) - 1:
+            raise ValueError(f"fanout needs {len(LEVELS) - 1} levels")
+
+        role, _ = Role.objects.get_or_create(name="Bench Officer", defaults={"hierarchy_level": 1})
+        password = make_password(PASSWORD)
+        CustomUser.objects.create(
+            email=f"admin@{EMAIL_DOMAIN}", first_name="Bench", last_name="Admin",
+            password=password, is_staff=True, role=role,
+        )
+
+        root = Area(id=self.uuid(), name="Bench", code=ROOT_CODE, area_type=LEVELS[0])
+        root.path = root.path_segment
+        level, areas = [(root, None)], [root]
+        users, profiles = [], []
+        for depth, (area_type, children) in enumerate(zip(LEVELS[1:], fanout), start=1):
+            next_level = []
+            for parent, officer in level:
+                for n in range(children):
+                    index = len(next_level)
+                    area = Area(
+                        id=self.uuid(),
+                        name=f"{area_type.replace('_', ' ').title()} {index}",
+                        code=f"B{depth}-{index}",
+                        area_type=area_type,
+                        parent=parent,
+                        latitude=Decimal(f"{self.rng.uniform(*LATITUDE):.6f}"),
+                        longitude=Decimal(f"{self.rng.uniform(*LONGITUDE):.6f}"),
+                    )
+                    area.path = parent.path + area.path_segment
+                    if area_type in officer_levels:
+                        officer = self.officer(area, role, password, users, profiles)
+                    next_level.append((area, officer))
+                    areas.append(area)
+            level = next_level
+
+        Area.objects.bulk_create(areas, batch_size=BATCH_SIZE)
+        CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        OfficerProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+        self.log(f"{len(areas)} areas, {len(users)} officers")
+        return level
+
+    def officer(self, area, role, password, users, profiles):
+        n = len(users)
+        user = CustomUser(
+            id=self.uuid(),
+            email=f"officer{n}@{EMAIL_DOMAIN}",
+            first_name=self.rng.choice(FIRST_NAMES["M"] + FIRST_NAMES["F"]),
+            last_name=self.rng.choice(LAST_NAMES),
+            password=password,
+            role=role,
+        )
+        users.append(user)
+        profiles.append(OfficerProfile(
+            id=self.uuid(), user=user, phone=f"+25470{n:07d}", role=role, role_text=area.area_type,
+            badge_number=f"BENCH{n}", id_number=f"BENCH{n}", office_email=user.email, area=area,
+        ))
+        return user.id
+
+    # ---------- Citizens and registrations ----------
+    def citizens(self, count, births, deaths, villages, days):
+        # The last `births` citizens are the newborns registered below;
+        # deaths are drawn from the others
+        adults = count - births
+        self.dead = set(self.rng.sample(range(adults), min(deaths, adults)))
+        batch = []
+        for n in range(count):
+            gender = citizen_gender(n)
+            newborn = n >= adults
+            born = (self.moment(days) if newborn else self.moment(90 * 365)).date()
+            batch.append(Citizen(
+                id=citizen_id(self.seed, n),
+                id_number=None if newborn else f"{20_000_000 + n}",
+                first_name=self.rng.choice(FIRST_NAMES[gender]),
+                middle_name=self.rng.choice(FIRST_NAMES[gender]),
+                last_name=self.rng.choice(LAST_NAMES),
+                gender=gender,
+                date_of_birth=born,
+                place_of_birth=self.rng.choice(villages)[0].name,
+                current_area=self.rng.choice(villages)[0],
+                is_alive=n not in self.dead,
+                date_of_death=self.moment(days).date() if n in self.dead else None,
+            ))
+            if len(batch) == BATCH_SIZE:
+                Citizen.objects.bulk_create(batch)
+                batch = []
+        Citizen.objects.bulk_create(batch)
+        self.log(f"{count} citizens")
+
+    def registrations(self, count, births, deaths, villages, days):
+        adults = count - births
+        created = [BirthRegistration._meta.get_field("created_at")]
+        with explicit_timestamps(*created):
+            batch = []
+            for k in range(births):
+                child = adults + k
+                mother = self.rng.randrange(1, adults, 2)
+                village, officer = self.rng.choice(villages)
+                batch.append(BirthRegistration(
+                    id=self.uuid(),
+                    child_id=citizen_id(self.seed, child),
+                    mother_id=citizen_id(self.seed, mother),
+                    father_id=citizen_id(self.seed, self.rng.randrange(0, adults, 2)),
+                    place_of_birth=village.name,
+                    date_of_birth=self.moment(days).date(),
+                    gender=citizen_gender(child),
+                    initiated_by_id=officer,
+                    area=village,
+                    status=self.weighted((("approved", 70), ("submitted", 20), ("draft", 8), ("rejected", 2))),
+                    reference_number=f"BENCH-B-{k:07d}",
+                    created_at=self.moment(days),
+                ))
+                if len(batch) == BATCH_SIZE:
+                    BirthRegistration.objects.bulk_create(batch)
+                    batch = []
+            BirthRegistration.objects.bulk_create(batch)
+
+        batch = []
+        for k, n in enumerate(sorted(self.dead)):
+            village, officer = self.rng.choice(villages)
+            batch.append(DeathRegistration(
+                id=self.uuid(),
+                citizen_id=citizen_id(self.seed, n),
+                date_of_death=self.moment(days).date(),
+                place_of_death=village.name,
+                initiated_by_id=officer,
+                area=village,
+                reference_number=f"BENCH-D-{k:07d}",
+                status=self.weighted((("approved", 70), ("submitted", 28), ("rejected", 2))),
+                age=self.rng.randrange(90),
+                created_at=self.moment(days),
+            ))
+        DeathRegistration.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        self.log(f"{births} births, {len(self.dead)} deaths")
+
+    # ---------- Incidents ----------
+    def incidents(self, count, responses, witnesses, villages, days):
+        timestamps = [
+            Incident._meta.get_field("reported_at"),
+            Incident._meta.get_field("date_reported"),
+            Response._meta.get_field("timestamp"),
+            Witness._meta.get_field("created_at"),
+            Witness._meta.get_field("updated_at"),
+        ]
+        handlers = Incident.handlers.through
+        total_responses = 0
+        with explicit_timestamps(*timestamps):
+            for start in range(0, count, BATCH_SIZE):
+                batch, related, assigned = [], [], []
+                for _ in range(min(BATCH_SIZE, count - start)):
+                    village, officer = self.rng.choice(villages)
+                    reported = self.moment(days)
+                    status = self.weighted(INCIDENT_STATUSES)
+                    kind = self.weighted(INCIDENT_TYPES)
+                    incident = Incident(
+                        id=self.uuid(),
+                        reporter_phone=self.phone(),
+                        reporter_name=f"{self.rng.choice(FIRST_NAMES['F'])} {self.rng.choice(LAST_NAMES)}",
+                        title=f"{kind.title()} at {village.name}",
+                        description=f"{kind.title()} reported at {village.name}.",
+                        incident_type=kind,
+                        area=village,
+                        status=status,
+                        current_handler_id=officer,
+                        coordinates=Point(float(village.longitude), float(village.latitude)),
+                        reported_at=reported,
+                        date_reported=reported,
+                        date_resolved=(
+                            reported + datetime.timedelta(hours=self.rng.randrange(1, 240))
+                            if status in ("resolved", "closed") else None
+                        ),
+                    )
+                    batch.append(incident)
+                    assigned.append(handlers(incident_id=incident.id, customuser_id=officer))
+                    for n in range(self.rng.randint(0, 2 * responses)):
+                        related.append(Response(
+                            id=self.uuid(), incident_id=incident.id, responder_id=officer,
+                            comment=f"Update {n + 1}",
+                            timestamp=reported + datetime.timedelta(minutes=self.rng.randrange(1, 2880)),
+                        ))
+                    for _ in range(self.rng.randint(0, 2 * witnesses)):
+                        related.append(Witness(
+                            id=self.uuid(), incident_id=incident.id, phone=self.phone(),
+                            name=f"{self.rng.choice(FIRST_NAMES['M'])} {self.rng.choice(LAST_NAMES)}",
+                            created_at=reported, updated_at=reported,
+                        ))
+
+                with transaction.atomic():
+                    Incident.objects.bulk_create(batch)
+                    handlers.objects.bulk_create(assigned)
+                    Response.objects.bulk_create([row for row in related if isinstance(row, Response)])
+                    Witness.objects.bulk_create([row for row in related if isinstance(row, Witness)])
+                total_responses += sum(isinstance(row, Response) for row in related)
+        self.log(f"{count} incidents, {total_responses} responses")
+
+
+def summary():
+    """Row counts of the benchmarked tables, for the report."""
+    return {
+        "areas": Area.objects.count(),
+        "officers": OfficerProfile.objects.count(),
+        "citizens": Citizen.objects.count(),
+        "births": BirthRegistration.objects.count(),
+        "deaths": DeathRegistration.objects.count(),
+        "incidents": Incident.objects.count(),
+        "responses": Response.objects.count(),
+        "witnesses": Witness.objects.count(),
+    }
@@ -0,0 +1,160 @@
+# ngao_core/benchmark/load.py
+"""
+Load driver for the key endpoints.
+
+Requests go through Django in this process (the test client: full
+middleware stack, no network), or to a running server with `base_url`.
+In-process runs read the query count from QueryCountMiddleware; against a
+server the X-DB-* headers are used, which it only sends with DEBUG on.
+
+Each scenario is run on its own: `warmup` unmeasured requests, then
+`requests` more spread over `concurrency` threads. Requests are made as
+randomly chosen bench officers, or as the bench admin with `staff`.
+"""
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ngao_core.apps.accounts.models import CustomUser
+from ngao_core.apps.geography.models import Area
+
+from .dataset import EMAIL_DOMAIN, LAST_NAMES, ROOT_CODE
+
+SCENARIOS = {
+    "incident_list": lambda ctx, rng: ("GET", "/api/incidents/", None),
+    "dashboard_stats": lambda ctx, rng: ("GET", "/api/incidents/dashboard-stats/", None),
+    "citizen_lookup": lambda ctx, rng: ("POST", "/api/citizens/lookup/", {"query": rng.choice(LAST_NAMES)[:4]}),
+    "geojson": lambda ctx, rng: ("GET", f"/api/geography/geojson/?id={rng.choice(ctx['sub_counties'])}&recursive=true", None),
+    "officer_stats": lambda ctx, rng: ("GET", "/api/officers/stats/", None),
+}
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# ---------- Transports ----------
+class InProcess:
+    def __init__(self):
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        self.client = Client(HTTP_HOST=host, raise_request_exception=False)
+
+    def request(self, method, path, body, token):
+        response = self.client.generic(
+            method, path, json.dumps(body) if body is not None else "",
+            content_type="application/json", HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+        stats = getattr(response, "query_stats", None) or {}
+        return response.status_code, stats.get("queries"), stats.get("db_ms")
+
+    def close(self):
+        connections.close_all()
+
+
+class Remote:
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        connection = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection(url.netloc, timeout=60)
+        self.prefix = url.path.rstrip("/")
+
+    def request(self, method, path, body, token):
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self.connection.request(
+            method, self.prefix + path, json.dumps(body) if body is not None else None, headers
+        )
+        response = self.connection.getresponse()
+        response.read()
+        queries = response.getheader("X-DB-Queries")
+        db_ms = response.getheader("X-DB-Time-Ms")
+        return (
+            response.status,
+            int(queries) if queries is not None else None,
+            float(db_ms) if db_ms is not None else None,
+        )
+
+    def close(self):
+        self.connection.close()
+
+
+# ---------- Runner ----------
+def context(staff=False):
+    users = CustomUser.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}", is_staff=staff)
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+    if not tokens:
+        raise RuntimeError("No bench users; run bench_seed first")
+    root = Area.objects.get(code=ROOT_CODE)
+    sub_counties = [
+        str(pk) for pk in
+        Area.objects.filter(path__startswith=root.path, area_type="sub_county").order_by("code").values_list("pk", flat=True)
+    ]
+    return {"tokens": tokens, "sub_counties": sub_counties}
+
+
+def run_scenario(name, ctx, requests, concurrency, warmup=0, seed=0, base_url=None):
+    build = SCENARIOS[name]
+    samples, lock = [], threading.Lock()
+    per_thread = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    def worker(index, count):
+        rng = random.Random(f"{seed}:{name}:{index}")
+        transport = Remote(base_url) if base_url else InProcess()
+        mine = []
+        try:
+            for n in range(warmup // concurrency + count):
+                method, path, body = build(ctx, rng)
+                token = rng.choice(ctx["tokens"])
+                start = time.perf_counter()
+                status, queries, db_ms = transport.request(method, path, body, token)
+                if n >= warmup // concurrency:
+                    mine.append(((time.perf_counter() - start) * 1000, status, queries, db_ms))
+        finally:
+            transport.close()
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(per_thread)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return summarize(samples, elapsed)
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[0] for sample in samples)
+    queries = sorted(sample[2] for sample in samples if sample[2] is not None)
+    db_ms = [sample[3] for sample in samples if sample[3] is not None]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample[1])] = statuses.get(str(sample[1]), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample[1] >= 400),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(statistics.fmean(latencies), 2),
+            "max": round(latencies[-1], 2),
+        } if latencies else None,
+        "queries": {
+            "mean": round(statistics.fmean(queries), 2),
+            "p95": percentile(queries, 95),
+            "max": queries[-1],
+        } if queries else None,
+        "db_ms_mean": round(statistics.fmean(db_ms), 2) if db_ms else None,
+    }
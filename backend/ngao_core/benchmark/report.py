@@ -0,0 +1,31 @@
+# ngao_core/benchmark/report.py
+"""Machine-readable benchmark reports: one JSON object per run, tagged with the commit."""
+import datetime
+import json
+import subprocess
+
+from django.conf import settings
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_report(**fields):
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit(),
+        **fields,
+    }
+
+
+def append(path, report):
+    """Append `report` to a JSON lines file, for tracking results across commits."""
+    with open(path, "a") as output:
+        output.write(json.dumps(report) + "\n")
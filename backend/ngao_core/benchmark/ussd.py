@@ -0,0 +1,145 @@
+# ngao_core/benchmark/ussd.py
+"""
+USSD load generator.
+
+Simulates many concurrent USSD sessions against a running instance the way
+the telco aggregator drives the callback: one form POST per hop, with the
+session's whole input history in `text`, and the subscriber's think time
+between hops. Sessions follow weighted scripted paths through the menu.
+
+Sessions are coroutines, so thousands can be open at once; the HTTP calls
+run on a pool of worker threads, each with its own keep-alive connection.
+Hop latency is measured around the HTTP call only, not time spent waiting
+for a free worker.
+"""
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+
+import requests
+
+from .dataset import LAST_NAMES
+from .load import percentile
+
+# (flow, weight): inputs per flow are built by `script`
+FLOWS = (("report", 70), ("status", 20), ("invalid", 5), ("abandon", 5))
+DESCRIPTIONS = (
+    "Fire at the market", "Road accident near the school", "Cattle theft last night",
+    "Sick child needs help", "Burst water pipe", "Fight at the bus stage",
+)
+
+
+def script(flow, rng):
+    """The inputs a subscriber sends, and whether the last reply should end the session."""
+    if flow == "report":
+        return ["1", rng.choice("12345"), f"{rng.choice(DESCRIPTIONS)} - {rng.choice(LAST_NAMES)}"], True
+    if flow == "status":
+        return ["2"], True
+    if flow == "invalid":
+        return [rng.choice("0789")], True
+    return ["1"], False  # abandon: hang up on the type menu
+
+
+class Driver:
+    def __init__(self, url, workers, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.local = threading.local()
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="ussd")
+
+    def post(self, data):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        start = time.perf_counter()
+        response = session.post(self.url, data=data, timeout=self.timeout)
+        return response.status_code, response.text, (time.perf_counter() - start) * 1000
+
+    async def session(self, n, seed, think_ms, semaphore):
+        rng = Random(f"{seed}:{n}")
+        flow = rng.choices(*zip(*FLOWS))[0]
+        inputs, ends = script(flow, rng)
+        data = {
+            "sessionId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "phoneNumber": f"+2547{rng.randrange(10 ** 8):08d}",
+            "serviceCode": "*384#",
+        }
+        result = {"flow": flow, "hops": [], "error": None}
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            started = time.perf_counter()
+            for hop in range(len(inputs) + 1):
+                if hop:
+                    await asyncio.sleep(rng.expovariate(1000 / think_ms) if think_ms else 0)
+                text = "*".join(inputs[:hop])
+                try:
+                    status, body, latency = await loop.run_in_executor(self.pool, self.post, {**data, "text": text})
+                except requests.RequestException as exc:
+                    result["error"] = type(exc).__name__
+                    break
+                result["hops"].append(latency)
+                last = hop == len(inputs)
+                expected = "END " if last and ends else "CON "
+                if status != 200:
+                    result["error"] = f"http_{status}"
+                    break
+                if not body.startswith(expected):
+                    result["error"] = "unexpected_reply"
+                    break
+            result["wall_ms"] = (time.perf_counter() - started) * 1000
+        return result
+
+    async def run(self, sessions, concurrency, think_ms, seed):
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(self.session(n, seed, think_ms, semaphore) for n in range(sessions)))
+
+
+def run(url, sessions=1000, concurrency=500, think_ms=2000, workers=64, timeout=10, seed=1):
+    driver = Driver(url, workers, timeout)
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(driver.run(sessions, concurrency, think_ms, seed))
+    finally:
+        driver.pool.shutdown()
+    return summarize(results, time.perf_counter() - start)
+
+
+def _latency(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        "p50": round(statistics.median(values), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(values[-1], 2),
+    }
+
+
+def summarize(results, elapsed):
+    completed = [result for result in results if result["error"] is None]
+    errors, flows = {}, {}
+    for result in results:
+        flow = flows.setdefault(result["flow"], {"sessions": 0, "errors": 0})
+        flow["sessions"] += 1
+        if result["error"]:
+            flow["errors"] += 1
+            errors[result["error"]] = errors.get(result["error"], 0) + 1
+    hops = [latency for result in results for latency in result["hops"]]
+    return {
+        "sessions": len(results),
+        "completed": len(completed),
+        "error_rate": round(1 - len(completed) / len(results), 4) if results else None,
+        "errors": errors,
+        "flows": flows,
+        "hops": len(hops),
+        "hops_per_second": round(len(hops) / elapsed, 2) if elapsed else None,
+        "hop_latency_ms": _latency(hops),
+        # Time the server spent on a completed session, and what the subscriber waited in total
+        "session_service_ms": _latency([sum(result["hops"]) for result in completed]),
+        "session_wall_ms": _latency([result["wall_ms"] for result in completed]),
+    }
@@ -26,6 +26,7 @@ INSTALLED_APPS: List[str] = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.gis",
+    "django.contrib.postgres",
 
     # Third-party
     "rest_framework",
@@ -44,18 +45,25 @@ INSTALLED_APPS: List[str] = [
     "ngao_core.apps.communications",
     "ngao_core.apps.geography",
     "ngao_core.apps.identity_registration",
+    "ngao_core.apps.sync",
+    "ngao_core.apps.common",
 ]
 
 # --------------------------------------------------
 # Middleware
 # --------------------------------------------------
 MIDDLEWARE = [
+    "ngao_core.apps.common.metrics.MetricsMiddleware",
+    "ngao_core.apps.common.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "ngao_core.api.queries.QueryCountMiddleware",
+    "ngao_core.api.middleware.CompressionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "ngao_core.apps.common.routers.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "ngao_core.apps.accounts.middleware.DeviceCheckMiddleware",
@@ -138,6 +146,17 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "ngao_core.api.renderers.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "ngao_core.api.parsers.MessagePackParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -179,6 +198,309 @@ CSRF_TRUSTED_ORIGINS = os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",")
 # SECURE_BROWSER_XSS_FILTER = True
 # X_FRAME_OPTIONS = "DENY"
 
+# --------------------------------------------------
+# Database connections
+# --------------------------------------------------
+# DB_POOL picks how each worker process holds Postgres connections:
+#   "psycopg"   - a psycopg 3 connection pool per process (default)
+#   "pgbouncer" - persistent connections to PgBouncer in transaction mode,
+#                 without server-side cursors
+#   "off"       - persistent connections (CONN_MAX_AGE) only
+# Peak connections per instance = worker processes x DB_POOL_MAX_SIZE.
+DB_POOL = os.getenv("DB_POOL", "psycopg")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 60 * 5))
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 60 * 10))
+
+
+def configure_connections(database):
+    """Apply the DB_POOL settings to a DATABASES entry (used by dev.py and prod.py)."""
+    options = database.setdefault("OPTIONS", {})
+    # Pooled or persistent, check a connection before reusing it
+    database["CONN_HEALTH_CHECKS"] = True
+    if DB_POOL == "psycopg":
+        # The pool owns connection lifetime; Django refuses CONN_MAX_AGE with it
+        database["CONN_MAX_AGE"] = 0
+        options["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+        }
+    else:
+        database["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+        if DB_POOL == "pgbouncer":
+            database["DISABLE_SERVER_SIDE_CURSORS"] = True
+    return database
+
+
+# --------------------------------------------------
+# Read replicas
+# --------------------------------------------------
+# Space-separated replica URLs become the "replica_1".."replica_n" aliases.
+# Safe requests read from them (ngao_core.apps.common.routers) unless the
+# user wrote within REPLICA_STICKY_SECONDS; replicas more than
+# REPLICA_MAX_LAG seconds behind are skipped, re-checked every
+# REPLICA_CHECK_INTERVAL seconds.
+DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "").split()
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 15))
+
+DATABASE_ROUTERS = ["ngao_core.apps.common.routers.ReplicaRouter"]
+
+
+def add_replicas(databases, ssl_require=False):
+    """Add a DATABASES entry per DATABASE_REPLICA_URLS (used by dev.py and prod.py)."""
+    import dj_database_url
+
+    for index, url in enumerate(DATABASE_REPLICA_URLS, start=1):
+        replica = dj_database_url.parse(
+            url,
+            engine="django.contrib.gis.db.backends.postgis",
+            ssl_require=ssl_require,
+        )
+        # Tests read the primary's test database through the replica's
+        # server (streaming replication copies it) instead of creating one
+        replica["TEST"] = {"MIRROR": "default"}
+        databases[f"replica_{index}"] = configure_connections(replica)
+    return databases
+
+
+# --------------------------------------------------
+# Cache
+# --------------------------------------------------
+# "default" is shared by all workers (Redis when REDIS_URL is set); "local"
+# is a short-lived per-process tier in front of it (ngao_core.apps.common.cache)
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    _shared_cache = {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "ngao",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
+            "SOCKET_CONNECT_TIMEOUT": 1,
+            "SOCKET_TIMEOUT": 1,
+            # A Redis outage degrades to cache misses, not errors
+            "IGNORE_EXCEPTIONS": True,
+        },
+    }
+else:
+    _shared_cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ngao-shared"}
+
+CACHES = {
+    "default": _shared_cache,
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "ngao-local",
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+}
+CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", 60 * 5))
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", 5))
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 60))
+
+# --------------------------------------------------
+# USSD (ngao_core.apps.communications.ussd)
+# --------------------------------------------------
+# Session state is kept in the shared cache between hops; aggregators end
+# idle sessions after about three minutes. USSDLog rows are inserted in
+# batches by a background thread unless USSD_LOG_ASYNC is off.
+USSD_SESSION_TTL = int(os.getenv("USSD_SESSION_TTL", 300))
+USSD_LOG_ASYNC = os.getenv("USSD_LOG_ASYNC", "True") == "True"
+USSD_LOG_BATCH_SIZE = int(os.getenv("USSD_LOG_BATCH_SIZE", 500))
+USSD_LOG_FLUSH_SECONDS = float(os.getenv("USSD_LOG_FLUSH_SECONDS", 1))
+USSD_LOG_QUEUE_SIZE = int(os.getenv("USSD_LOG_QUEUE_SIZE", 50000))
+
+# --------------------------------------------------
+# SMS (ngao_core.apps.communications.sms)
+# --------------------------------------------------
+# Messages are queued and sent by `manage.py send_sms --loop`. RATE is
+# recipients per second per worker process; BATCH_SIZE numbers go in one
+# provider call. The fake provider sends nothing, for development and
+# load tests.
+SMS_DEFAULT_PROVIDER = os.getenv("SMS_PROVIDER", "africastalking")
+SMS_PROVIDERS = {
+    "africastalking": {
+        "BACKEND": "ngao_core.apps.communications.sms.AfricasTalkingProvider",
+        "OPTIONS": {
+            "username": os.getenv("AT_USERNAME", "sandbox"),
+            "api_key": os.getenv("AT_API_KEY", ""),
+            "sender_id": os.getenv("AT_SENDER_ID", ""),
+            "sandbox": os.getenv("AT_USERNAME", "sandbox") == "sandbox",
+        },
+        "RATE": float(os.getenv("AT_SMS_RATE", 50)),
+        "BATCH_SIZE": int(os.getenv("AT_SMS_BATCH_SIZE", 500)),
+    },
+    "fake": {
+        "BACKEND": "ngao_core.apps.communications.sms.FakeProvider",
+        "OPTIONS": {
+            "latency": float(os.getenv("FAKE_SMS_LATENCY", 0.05)),
+            "fail_rate": float(os.getenv("FAKE_SMS_FAIL_RATE", 0)),
+        },
+        "RATE": float(os.getenv("FAKE_SMS_RATE", 1000)),
+        "BATCH_SIZE": 500,
+    },
+}
+SMS_DISPATCH_LIMIT = int(os.getenv("SMS_DISPATCH_LIMIT", 2000))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", 5))
+SMS_RETRY_BASE_SECONDS = float(os.getenv("SMS_RETRY_BASE_SECONDS", 30))
+SMS_RETRY_MAX_SECONDS = float(os.getenv("SMS_RETRY_MAX_SECONDS", 60 * 60))
+# A claimed recipient is retried after this long if its worker dies mid-send
+SMS_CLAIM_SECONDS = int(os.getenv("SMS_CLAIM_SECONDS", 300))
+# Shared secret for the delivery report callback (?token=...); reports are refused when empty
+SMS_DELIVERY_TOKEN = os.getenv("SMS_DELIVERY_TOKEN", "")
+
+# --------------------------------------------------
+# Inbox (ngao_core.apps.communications.inbox)
+# --------------------------------------------------
+INBOX_PAGE_SIZE = int(os.getenv("INBOX_PAGE_SIZE", 30))
+INBOX_MAX_PAGE_SIZE = int(os.getenv("INBOX_MAX_PAGE_SIZE", 200))
+# How far back a user's first inbox view pulls in broadcast announcements
+INBOX_BROADCAST_BACKFILL_DAYS = int(os.getenv("INBOX_BROADCAST_BACKFILL_DAYS", 30))
+# Pulls look this far behind the newest broadcast already pulled, for posts that commit late
+INBOX_BROADCAST_OVERLAP_SECONDS = int(os.getenv("INBOX_BROADCAST_OVERLAP_SECONDS", 300))
+
+# --------------------------------------------------
+# Incident routing (ngao_core.apps.incidents.routing)
+# --------------------------------------------------
+# Escalation chains are dropped as soon as an officer, role or area
+# changes; the TTL only bounds how long an unused area's chain is kept.
+INCIDENT_ROUTING_TTL = int(os.getenv("INCIDENT_ROUTING_TTL", 60 * 60 * 6))
+
+# --------------------------------------------------
+# IPRS (citizen identity verification)
+# --------------------------------------------------
+IPRS_API_URL = os.getenv("IPRS_API_URL", "https://iprs.example.com/api/citizens")
+IPRS_TIMEOUT = float(os.getenv("IPRS_TIMEOUT", 5))
+IPRS_POOL_SIZE = int(os.getenv("IPRS_POOL_SIZE", 20))
+IPRS_MAX_WORKERS = int(os.getenv("IPRS_MAX_WORKERS", 16))
+IPRS_CACHE_TTL = int(os.getenv("IPRS_CACHE_TTL", 60 * 60 * 24))
+IPRS_NEGATIVE_CACHE_TTL = int(os.getenv("IPRS_NEGATIVE_CACHE_TTL", 60 * 5))
+IPRS_BREAKER_THRESHOLD = int(os.getenv("IPRS_BREAKER_THRESHOLD", 5))
+IPRS_BREAKER_RESET_SECONDS = float(os.getenv("IPRS_BREAKER_RESET_SECONDS", 30))
+
+# --------------------------------------------------
+# Accounts
+# --------------------------------------------------
+OFFICER_STATS_CACHE_TTL = int(os.getenv("OFFICER_STATS_CACHE_TTL", 60 * 15))
+
+# --------------------------------------------------
+# Civil registration
+# --------------------------------------------------
+# Reference numbers reserved per process per round-trip to the sequence
+REFERENCE_BLOCK_SIZE = int(os.getenv("REFERENCE_BLOCK_SIZE", 50))
+# Maximum records accepted by /api/registrations/batch/ per request
+INTAKE_BATCH_LIMIT = int(os.getenv("INTAKE_BATCH_LIMIT", 5000))
+
+# Certificates: local filesystem by default, any S3-compatible bucket when
+# CERTIFICATE_S3_BUCKET is set (needs django-storages[s3])
+CERTIFICATE_WORKERS = int(os.getenv("CERTIFICATE_WORKERS", os.cpu_count() or 2))
+CERTIFICATE_BATCH_LIMIT = int(os.getenv("CERTIFICATE_BATCH_LIMIT", 1000))
+# Batches are rendered by `manage.py render_certificate_batches --loop`; the
+# in-process thread (True) loses batches on restart and suits development only
+CERTIFICATE_BACKGROUND_BATCHES = os.getenv("CERTIFICATE_BACKGROUND_BATCHES", "False") == "True"
+# A batch still rendering after this long is presumed dead and queued again
+CERTIFICATE_BATCH_LEASE_SECONDS = int(os.getenv("CERTIFICATE_BATCH_LEASE_SECONDS", 1800))
+CERTIFICATE_FONT_REGULAR = os.getenv("CERTIFICATE_FONT_REGULAR")
+CERTIFICATE_FONT_BOLD = os.getenv("CERTIFICATE_FONT_BOLD")
+CERTIFICATE_EMBLEM = os.getenv("CERTIFICATE_EMBLEM")
+
+if os.getenv("CERTIFICATE_S3_BUCKET"):
+    CERTIFICATE_STORAGE = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": os.getenv("CERTIFICATE_S3_BUCKET"),
+            "endpoint_url": os.getenv("CERTIFICATE_S3_ENDPOINT_URL"),
+            "location": "certificates",
+            "file_overwrite": False,
+        },
+    }
+else:
+    CERTIFICATE_STORAGE = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": BASE_DIR / "media" / "certificates"},
+    }
+
+# --------------------------------------------------
+# Mobile sync
+# --------------------------------------------------
+# Tokens older than this force a full re-download; prune_sync_log uses it too
+SYNC_RETENTION_DAYS = int(os.getenv("SYNC_RETENTION_DAYS", 30))
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", 5000))
+
+# --------------------------------------------------
+# Partitioned log tables
+# --------------------------------------------------
+# manage_partitions (run daily) creates monthly partitions this far ahead
+# and detaches those older than the retention; detached partitions stay
+# as plain tables until archived
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", 24))
+
+# --------------------------------------------------
+# Cold-data archive
+# --------------------------------------------------
+# archive_cold_data exports detached partitions and resolved/closed
+# incidents older than ARCHIVE_INCIDENT_MONTHS as compressed JSON lines:
+# local filesystem by default, any S3-compatible bucket (MinIO included)
+# when ARCHIVE_S3_BUCKET is set (needs django-storages[s3])
+ARCHIVE_INCIDENT_MONTHS = int(os.getenv("ARCHIVE_INCIDENT_MONTHS", 12))
+ARCHIVE_ZSTD_LEVEL = int(os.getenv("ARCHIVE_ZSTD_LEVEL", 10))
+
+if os.getenv("ARCHIVE_S3_BUCKET"):
+    ARCHIVE_STORAGE = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": os.getenv("ARCHIVE_S3_BUCKET"),
+            "endpoint_url": os.getenv("ARCHIVE_S3_ENDPOINT_URL"),
+            "location": "archive",
+            "file_overwrite": False,
+        },
+    }
+else:
+    ARCHIVE_STORAGE = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": BASE_DIR / "archive"},
+    }
+
+# --------------------------------------------------
+# Query instrumentation (ngao_core.api.queries)
+# --------------------------------------------------
+# Per-request query counts: X-DB-* headers in DEBUG, a JSON log line when a
+# view goes over its query_budget or repeats one statement shape
+# QUERY_REPEAT_THRESHOLD times (an N+1). QUERY_BUDGET_STRICT raises
+# instead, for CI.
+QUERY_INSTRUMENTATION = os.getenv("QUERY_INSTRUMENTATION", "True") == "True"
+QUERY_DEFAULT_BUDGET = int(os.getenv("QUERY_DEFAULT_BUDGET", 0)) or None
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 10))
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "False") == "True"
+QUERY_LOG_ALL = os.getenv("QUERY_LOG_ALL", "False") == "True"
+
+# --------------------------------------------------
+# Metrics (ngao_core.apps.common.metrics)
+# --------------------------------------------------
+# Prometheus sends METRICS_TOKEN as a bearer token to /metrics; with no
+# token set the endpoint answers 403 unless DEBUG is on. Under gunicorn, gunicorn.conf.py sets
+# PROMETHEUS_MULTIPROC_DIR so samples are aggregated across workers.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# --------------------------------------------------
+# Request profiling (ngao_core.apps.common.profiling)
+# --------------------------------------------------
+# Off by default. When on, requests slower than PROFILE_SLOW_MS (or a view's
+# profile_slow_ms) and a PROFILE_SAMPLE_RATE fraction of the rest are stored
+# as RequestProfile rows with their stack samples.
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "False") == "True"
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 1000))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 10))
+
 # --------------------------------------------------
 # Logging
 # --------------------------------------------------
@@ -187,6 +509,8 @@ LOGGING = {
     "disable_existing_loggers": False,
     "handlers": {"console": {"class": "logging.StreamHandler"}},
     "root": {"handlers": ["console"], "level": "INFO"},
+    # Kept at INFO when the root level is raised, for QUERY_LOG_ALL
+    "loggers": {"ngao_core.queries": {"level": "INFO"}},
 }
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
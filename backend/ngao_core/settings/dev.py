@@ -17,7 +17,6 @@ if DATABASE_URL:
         "default": dj_database_url.config(
             default=DATABASE_URL,
             engine="django.contrib.gis.db.backends.postgis",
-            conn_max_age=600,
             ssl_require=True,
         )
     }
@@ -33,6 +32,9 @@ else:
         }
     }
 
+configure_connections(DATABASES["default"])
+add_replicas(DATABASES, ssl_require=bool(DATABASE_URL))
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 LOGGING["root"]["level"] = "DEBUG"
@@ -11,7 +11,6 @@ if DATABASE_URL:
         "default": dj_database_url.config(
             default=DATABASE_URL,
             engine="django.contrib.gis.db.backends.postgis",
-            conn_max_age=600,
             ssl_require=True,
         )
     }
@@ -27,6 +26,9 @@ else:
         }
     }
 
+configure_connections(DATABASES["default"])
+add_replicas(DATABASES, ssl_require=bool(DATABASE_URL))
+
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
 
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "").split(",")
@@ -27,6 +27,7 @@ from ngao_core.apps.incidents.views import (
     IncidentViewSet,
     ResponseViewSet,
 )
+from ngao_core.apps.common.views import metrics_view
 
 # ---------------------------------------------------------
 # Swagger Schema
@@ -86,6 +87,11 @@ urlpatterns = [
     path("api/dashboard/", include("ngao_core.apps.dashboard.urls")),
 
     path("api/registrations/", include("ngao_core.apps.civil_registration.urls")),
+    path("api/sync/", include("ngao_core.apps.sync.urls")),
+    path("api/health/", include("ngao_core.apps.common.urls")),
+    # Messages, announcements and the inbox only ever return the caller's own
+    # rows; the USSD and SMS gateway callbacks are the only anonymous routes
+    path("api/communications/", include("ngao_core.apps.communications.urls")),
     
     path("api/geography/", include("ngao_core.apps.geography.urls")),
 
@@ -97,13 +103,18 @@ urlpatterns = [
     # Swagger
     # --------------------
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="swagger-ui"),
+
+    # --------------------
+    # Prometheus
+    # --------------------
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # ---------------------------------------------------------
 # React Frontend Fallback (MUST BE LAST)
 # ---------------------------------------------------------
 urlpatterns += [
-  re_path(r'^(?!api|admin|swagger|static).*', TemplateView.as_view(template_name='index.html')),
+  re_path(r'^(?!api|admin|swagger|static|metrics).*', TemplateView.as_view(template_name='index.html')),
 ]
 
 # ---------------------------------------------------------